@@ -47,7 +47,7 @@ def register(data: RegisterRequest, db: Session = Depends(get_db)):
     db.refresh(user)
     
     # Generate access token
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = create_access_token(data={"sub": user.id, "role": user.role, "email": user.email})
     
     return TokenResponse(access_token=access_token, role=user.role)
 
@@ -64,6 +64,6 @@ def login(data: LoginRequest, db: Session = Depends(get_db)):
         )
     
     # Generate access token
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = create_access_token(data={"sub": user.id, "role": user.role, "email": user.email})
     
     return TokenResponse(access_token=access_token, role=user.role)
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import join
+from sqlalchemy import and_, func
 from typing import List, Optional
-from ..core.security import get_db, require_role
+from ..core.responses import json_rows
+from ..core.security import get_db, require_role, AuthUser
 from ..models.user import UserRole, User
 from ..models.farm import Farm
+from ..models.farmer import Farmer
 from ..models.score import Score
 
 
@@ -42,47 +44,65 @@ class FarmDetail(BaseModel):
 @router.get("/farmers", response_model=List[FarmerSummary])
 def list_all_farmers(
     risk_category: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="No limit by default"),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
-    """List all farms with scores for bank portfolio management"""
-    # Join farms, scores, and users
+    """List all farms with their latest score for bank portfolio management"""
+    # Latest score per farm, picked in SQL (served by ix_scores_farm_id_created_at)
+    ranked = (
+        db.query(
+            Score.farm_id,
+            Score.numeric_score,
+            Score.risk_category,
+            Score.created_at,
+            func.row_number().over(
+                partition_by=Score.farm_id,
+                order_by=(Score.created_at.desc(), Score.id.desc())
+            ).label("rank")
+        )
+        .subquery()
+    )
+    
     query = (
-        db.query(Farm, Score, User)
-        .join(Score, Score.farm_id == Farm.id)
-        .join(User, User.id == Farm.owner_id)
-        .order_by(Score.created_at.desc())
+        db.query(
+            Farm.id, Farm.name, Farm.crop_type, Farm.acreage,
+            func.coalesce(User.email, "unknown"), ranked.c.numeric_score, ranked.c.risk_category
+        )
+        .join(ranked, and_(ranked.c.farm_id == Farm.id, ranked.c.rank == 1))
+        .outerjoin(Farmer, Farmer.id == Farm.farmer_id)
+        .outerjoin(User, User.id == Farmer.user_id)
     )
     
-    # Filter by risk category if provided
+    # Filter by the risk category of the latest score
     if risk_category:
-        query = query.filter(Score.risk_category == risk_category)
+        query = query.filter(ranked.c.risk_category == risk_category)
     
-    results = []
-    seen_farms = set()
+    rows = query.order_by(ranked.c.created_at.desc(), Farm.id.desc()).limit(limit).offset(offset).all()
     
-    for farm, score, user in query.all():
-        # Only include the latest score for each farm
-        if farm.id not in seen_farms:
-            seen_farms.add(farm.id)
-            results.append(FarmerSummary(
-                farm_id=farm.id,
-                farm_name=farm.name,
-                farmer_email=user.email,
-                crop_type=farm.crop_type,
-                acreage=farm.acreage,
-                numeric_score=score.numeric_score,
-                risk_category=score.risk_category
-            ))
+    # Plain dicts shaped like FarmerSummary (fast JSON path skips validation)
+    results = [
+        {
+            "farm_id": farm_id,
+            "farm_name": name,
+            "farmer_email": email,
+            "crop_type": crop_type,
+            "acreage": acreage,
+            "numeric_score": numeric_score,
+            "risk_category": category
+        }
+        for farm_id, name, crop_type, acreage, email, numeric_score, category in rows
+    ]
     
-    return results
+    return json_rows(results)
 
 
 @router.get("/farms/{farm_id}", response_model=FarmDetail)
 def get_farm_detail(
     farm_id: int,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
     """Get detailed farm analysis for bank officers"""
     # Get farm with owner info
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Dict, Any
-from ..core.security import get_db, require_role
-from ..models import User, UserRole, Credit, Farmer, CreditStatus
+from sqlalchemy import and_, case, func
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from ..core.cache import dashboard_cache
+from ..core.config import settings
+from ..core.responses import json_rows
+from ..core.security import get_db, require_role, AuthUser
+from ..models import UserRole, Credit, Farmer, CreditStatus
 
 router = APIRouter(prefix="/bank", tags=["bank-extended"])
 
@@ -23,59 +27,50 @@ class DashboardStats(BaseModel):
 @router.get("/dashboard/stats", response_model=DashboardStats)
 def get_dashboard_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.bank_officer))
+    current_user: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
-    """Get statistics for bank dashboard"""
-    
-    # Total credits
-    total_credits = db.query(func.count(Credit.id)).scalar()
-    
-    # Total amount disbursed
-    total_amount = db.query(func.sum(Credit.amount)).scalar() or 0
-    
-    # Total outstanding
-    total_outstanding = db.query(func.sum(Credit.remaining)).scalar() or 0
-    
-    # Total paid
-    total_paid = db.query(func.sum(Credit.paid)).scalar() or 0
-    
-    # Active credits
-    active_credits = db.query(func.count(Credit.id)).filter(
-        Credit.status == CreditStatus.active
-    ).scalar()
-    
-    # Overdue credits
-    overdue_credits = db.query(func.count(Credit.id)).filter(
-        Credit.status == CreditStatus.overdue
-    ).scalar()
+    """Get statistics for bank dashboard (cached; payments invalidate it)"""
+    return dashboard_cache.get_or_compute(
+        "bank.dashboard_stats", ("credits",), settings.DASHBOARD_CACHE_TTL,
+        lambda: _compute_dashboard_stats(db)
+    )
+
+
+def _compute_dashboard_stats(db: Session) -> DashboardStats:
+    this_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
-    # Risk distribution (based on progress)
-    low_risk = db.query(func.count(Credit.id)).filter(Credit.progress >= 70).scalar() or 0
-    medium_risk = db.query(func.count(Credit.id)).filter(
-        Credit.progress >= 30, Credit.progress < 70
-    ).scalar() or 0
-    high_risk = db.query(func.count(Credit.id)).filter(Credit.progress < 30).scalar() or 0
+    def count_if(condition):
+        return func.sum(case((condition, 1), else_=0))
     
-    # Monthly disbursement (sum of credits created this month)
-    from datetime import datetime, timedelta
-    this_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    monthly_disbursement = db.query(func.sum(Credit.amount)).filter(
-        Credit.created_at >= this_month_start
-    ).scalar() or 0
+    # All figures in one scan over credits
+    row = db.query(
+        func.count(Credit.id).label("total_credits"),
+        func.sum(Credit.amount).label("total_amount"),
+        func.sum(Credit.remaining).label("total_outstanding"),
+        func.sum(Credit.paid).label("total_paid"),
+        count_if(Credit.status == CreditStatus.active).label("active_credits"),
+        count_if(Credit.status == CreditStatus.overdue).label("overdue_credits"),
+        # Risk distribution (based on progress)
+        count_if(Credit.progress >= 70).label("low_risk"),
+        count_if(and_(Credit.progress >= 30, Credit.progress < 70)).label("medium_risk"),
+        count_if(Credit.progress < 30).label("high_risk"),
+        # Monthly disbursement (sum of credits created this month)
+        func.sum(case((Credit.created_at >= this_month_start, Credit.amount), else_=0)).label("monthly_disbursement")
+    ).one()
     
     return DashboardStats(
-        total_credits=total_credits,
-        total_amount_disbursed=total_amount,
-        total_outstanding=total_outstanding,
-        total_paid=total_paid,
-        active_credits=active_credits,
-        overdue_credits=overdue_credits,
+        total_credits=row.total_credits,
+        total_amount_disbursed=row.total_amount or 0,
+        total_outstanding=row.total_outstanding or 0,
+        total_paid=row.total_paid or 0,
+        active_credits=row.active_credits or 0,
+        overdue_credits=row.overdue_credits or 0,
         risk_distribution={
-            "low": low_risk,
-            "medium": medium_risk,
-            "high": high_risk
+            "low": row.low_risk or 0,
+            "medium": row.medium_risk or 0,
+            "high": row.high_risk or 0
         },
-        monthly_disbursement=monthly_disbursement
+        monthly_disbursement=row.monthly_disbursement or 0
     )
 
 
@@ -95,23 +90,39 @@ class FarmerCreditInfo(BaseModel):
 
 @router.get("/farmers/credits", response_model=List[FarmerCreditInfo])
 def get_farmers_credits(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="No limit by default"),
+    offset: int = Query(0, ge=0),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort by total outstanding"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.bank_officer))
+    current_user: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
-    """Get aggregated credit information for all farmers"""
+    """Get aggregated credit information for farmers, by outstanding amount"""
+    # One GROUP BY over credits instead of a query per farmer
+    totals = (
+        db.query(
+            Credit.farmer_id.label("farmer_id"),
+            func.count(Credit.id).label("total_credits"),
+            func.sum(Credit.amount).label("total_amount"),
+            func.sum(Credit.remaining).label("total_outstanding"),
+            func.avg(func.coalesce(Credit.progress, 0.0)).label("average_progress")
+        )
+        .group_by(Credit.farmer_id)
+        .subquery()
+    )
     
-    farmers = db.query(Farmer).all()
-    result = []
+    outstanding = totals.c.total_outstanding.desc() if order == "desc" else totals.c.total_outstanding.asc()
+    rows = (
+        db.query(Farmer.id, Farmer.full_name, Farmer.location, totals)
+        .join(totals, totals.c.farmer_id == Farmer.id)
+        .order_by(outstanding, Farmer.id)
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
     
-    for farmer in farmers:
-        credits = db.query(Credit).filter(Credit.farmer_id == farmer.id).all()
-        
-        if not credits:
-            continue
-        
-        total_amount = sum(c.amount for c in credits)
-        total_outstanding = sum(c.remaining for c in credits)
-        avg_progress = sum(c.progress for c in credits) / len(credits) if credits else 0
+    result = []
+    for row in rows:
+        avg_progress = row.average_progress or 0.0
         
         # Determine risk level
         if avg_progress >= 70:
@@ -121,15 +132,16 @@ def get_farmers_credits(
         else:
             risk_level = "high"
         
-        result.append(FarmerCreditInfo(
-            farmer_id=farmer.id,
-            farmer_name=farmer.full_name,
-            location=farmer.location or "Не указано",
-            total_credits=len(credits),
-            total_amount=total_amount,
-            total_outstanding=total_outstanding,
-            average_progress=avg_progress,
-            risk_level=risk_level
-        ))
+        # Plain dicts shaped like FarmerCreditInfo (fast JSON path skips validation)
+        result.append({
+            "farmer_id": row.id,
+            "farmer_name": row.full_name,
+            "location": row.location or "Не указано",
+            "total_credits": row.total_credits,
+            "total_amount": row.total_amount or 0.0,
+            "total_outstanding": row.total_outstanding or 0.0,
+            "average_progress": avg_progress,
+            "risk_level": risk_level
+        })
     
-    return result
+    return json_rows(result)
@@ -3,10 +3,15 @@ Extended Bank API Routes с интеграцией scoring database
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from ..core.security import require_role
-from ..models.user import UserRole, User
+from typing import List, Optional, Dict, Any, Iterator
+import json
+from ..core.cache import dashboard_cache
+from ..core.config import settings
+from ..core.responses import json_rows
+from ..core.security import require_role, AuthUser
+from ..models.user import UserRole
 from ..database_adapter import get_db_adapter
 
 
@@ -74,7 +79,7 @@ class UpdateStatusRequest(BaseModel):
 @router.get("/applications", response_model=List[ApplicationSummary])
 async def get_all_applications(
     status: Optional[str] = None,
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
     """
     Получить все заявки на кредит (для банка)
@@ -84,7 +89,7 @@ async def get_all_applications(
     try:
         adapter = get_db_adapter()
         applications = adapter.get_all_loan_applications(status=status)
-        return applications
+        return json_rows(applications)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -95,7 +100,7 @@ async def get_all_applications(
 @router.get("/applications/{loan_id}", response_model=ApplicationDetail)
 async def get_application_detail(
     loan_id: int,
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
     """Получить полную информацию о заявке"""
     try:
@@ -152,7 +157,7 @@ async def get_application_detail(
 @router.post("/applications/{loan_id}/calculate-score", response_model=ScoringDetail)
 async def calculate_application_score(
     loan_id: int,
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
     """Рассчитать скоринг для заявки"""
     try:
@@ -185,11 +190,54 @@ async def calculate_application_score(
         )
 
 
+def _format_sse(event: Dict[str, Any]) -> str:
+    """Событие в формате Server-Sent Events"""
+    payload = {key: value for key, value in event.items() if key != "event"}
+    return f"event: {event['event']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _sse_stream(events: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    # Комментарий сразу открывает поток, чтобы прокси не буферизовали ответ
+    yield ": stream-open\n\n"
+    try:
+        for event in events:
+            yield _format_sse(event)
+    except Exception as e:
+        yield _format_sse({"event": "error", "error": str(e)})
+
+
+@router.get("/applications/{loan_id}/analysis/stream")
+def stream_application_analysis(
+    loan_id: int,
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
+):
+    """
+    Потоковый GPT анализ заявки (Server-Sent Events)
+    
+    События: scoring, item, field, escalate, done, error.
+    Итоговый анализ сохраняется в результат скоринга по завершении потока.
+    """
+    adapter = get_db_adapter()
+    try:
+        events = adapter.stream_application_analysis(loan_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.patch("/applications/{loan_id}/status")
 async def update_application_status(
     loan_id: int,
     request: UpdateStatusRequest,
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
     """Обновить статус заявки"""
     try:
@@ -215,12 +263,15 @@ async def update_application_status(
 
 @router.get("/statistics")
 async def get_bank_statistics(
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
-    """Получить статистику по заявкам"""
+    """Получить статистику по заявкам (кэшируется; новые заявки, смена статуса и скоринг сбрасывают кэш)"""
     try:
         adapter = get_db_adapter()
-        stats = adapter.db_manager.get_statistics()
+        stats = dashboard_cache.get_or_compute(
+            "bank.statistics", ("loans", "scoring"), settings.DASHBOARD_CACHE_TTL,
+            adapter.db_manager.get_statistics
+        )
         
         return {
             "total_applications": stats.get('total_loan_requests', 0),
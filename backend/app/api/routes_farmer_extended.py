@@ -3,8 +3,9 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
-from ..core.security import get_db, require_role, get_current_user
-from ..models import User, UserRole, Farmer, Credit, CreditStatus, Card, Payment, PaymentStatus, Field, FieldStatus
+from ..core.security import get_db, require_role, get_current_user, AuthUser
+from ..database_adapter import get_db_adapter
+from ..models import UserRole, Farmer, Credit, CreditStatus, Card, Payment, PaymentStatus, Field, FieldStatus
 
 router = APIRouter(prefix="/farmer", tags=["farmer-extended"])
 
@@ -79,7 +80,7 @@ class PaymentOut(BaseModel):
 @router.get("/profile", response_model=FarmerProfileOut)
 def get_farmer_profile(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get farmer profile with cards"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
@@ -96,7 +97,7 @@ def get_farmer_profile(
 @router.get("/credits", response_model=List[CreditOut])
 def get_farmer_credits(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get all credits for current farmer"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
@@ -115,7 +116,7 @@ def get_farmer_credits(
 def get_credit_details(
     credit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get detailed information about a specific credit"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
@@ -145,7 +146,7 @@ def make_payment(
     credit_id: int,
     payment_data: PaymentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Make a payment for a credit"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
@@ -213,6 +214,8 @@ def make_payment(
     farmer.existing_credit -= payment_data.amount
     
     db.commit()
+    # Invalidate cached bank dashboards in every worker
+    get_db_adapter().db_manager.bump_data_version("credits")
     db.refresh(payment)
     
     return payment
@@ -222,7 +225,7 @@ def make_payment(
 def get_credit_payments(
     credit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get payment history for a credit"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
@@ -271,7 +274,7 @@ class FieldOut(BaseModel):
 @router.get("/fields", response_model=List[FieldOut])
 def get_farmer_fields(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get all fields for current farmer"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
@@ -290,7 +293,7 @@ def get_farmer_fields(
 def get_field_details(
     field_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get detailed information about a specific field"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
@@ -325,7 +328,7 @@ class AIRecommendationResponse(BaseModel):
 def get_ai_recommendation(
     field_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get AI recommendation for a specific field"""
     farmer = db.query(Farmer).filter(Farmer.user_id == current_user.id).first()
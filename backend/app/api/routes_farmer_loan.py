@@ -6,8 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional
 from datetime import datetime
-from ..core.security import get_current_user
-from ..models.user import User
+from ..core.security import get_current_user, AuthUser
 from ..database_adapter import get_db_adapter
 
 
@@ -58,7 +57,7 @@ class FarmerSummary(BaseModel):
 
 @router.get("/summary", response_model=FarmerSummary)
 async def get_farmer_summary(
-    current_user: User = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user)
 ):
     """
     Получить сводку по фермеру (для главной страницы)
@@ -132,7 +131,7 @@ async def get_farmer_summary(
 @router.post("/loan-applications", response_model=LoanApplicationResponse, status_code=status.HTTP_201_CREATED)
 async def create_loan_application(
     data: LoanApplicationCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user)
 ):
     """
     Создать новую заявку на кредит (фермер)
@@ -163,7 +162,7 @@ async def create_loan_application(
 
 @router.get("/loan-applications", response_model=List[LoanApplicationResponse])
 async def get_my_loan_applications(
-    current_user: User = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user)
 ):
     """Получить все заявки текущего фермера"""
     try:
@@ -180,7 +179,7 @@ async def get_my_loan_applications(
 @router.get("/loan-applications/{loan_id}", response_model=LoanApplicationResponse)
 async def get_loan_application(
     loan_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_user)
 ):
     """Получить детали конкретной заявки"""
     try:
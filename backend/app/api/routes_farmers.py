@@ -1,11 +1,12 @@
+import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import List, Optional
-import httpx
-import os
-from ..core.security import get_db, require_role, get_current_user
-from ..models.user import UserRole, User
+from ..core import ml_scoring
+from ..core.responses import json_rows
+from ..core.security import get_db, require_role, get_current_user, AuthUser
+from ..models.user import UserRole
 from ..models.farm import Farm
 from ..models.score import Score
 
@@ -42,7 +43,7 @@ class FarmOut(BaseModel):
 async def create_farm(
     data: FarmCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Create a new farm and generate credit score"""
     # Create farm
@@ -58,7 +59,6 @@ async def create_farm(
     db.refresh(farm)
     
     # Call ML service for scoring
-    ml_url = os.getenv("ML_SERVICE_URL", "http://ml_service:8001/score")
     payload = {
         "crop_type": farm.crop_type,
         "acreage": farm.acreage,
@@ -66,14 +66,20 @@ async def create_farm(
     }
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(ml_url, json=payload, timeout=20.0)
-            response.raise_for_status()
-            score_data = response.json()
-    except Exception as e:
+        score_data = await ml_scoring.score_field(payload)
+    except ml_scoring.MLUnavailableError as e:
+        # Breaker open, connection error or 5xx
+        headers = {"Retry-After": str(int(e.retry_after) + 1)} if e.retry_after is not None else None
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"ML service unavailable: {str(e)}"
+            detail=str(e),
+            headers=headers
+        )
+    except httpx.HTTPStatusError as e:
+        # ML service rejected the request (4xx)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"ML service rejected the field: {e.response.status_code}"
         )
     
     # Save score
@@ -104,7 +110,7 @@ async def create_farm(
 @router.get("/farms", response_model=List[FarmOut])
 def list_farms(
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """List all farms owned by the current farmer"""
     farms = db.query(Farm).filter(Farm.owner_id == current_user.id).all()
@@ -116,29 +122,30 @@ def list_farms(
         
         score_out = None
         if latest_score:
-            score_out = ScoreOut(
-                numeric_score=latest_score.numeric_score,
-                risk_category=latest_score.risk_category,
-                factors=latest_score.factors
-            )
+            score_out = {
+                "numeric_score": latest_score.numeric_score,
+                "risk_category": latest_score.risk_category,
+                "factors": latest_score.factors
+            }
         
-        result.append(FarmOut(
-            id=farm.id,
-            name=farm.name,
-            crop_type=farm.crop_type,
-            acreage=farm.acreage,
-            geometry=farm.geometry,
-            score=score_out
-        ))
+        # Plain dicts shaped like FarmOut (fast JSON path skips validation)
+        result.append({
+            "id": farm.id,
+            "name": farm.name,
+            "crop_type": farm.crop_type,
+            "acreage": farm.acreage,
+            "geometry": farm.geometry,
+            "score": score_out
+        })
     
-    return result
+    return json_rows(result)
 
 
 @router.get("/farms/{farm_id}", response_model=FarmOut)
 def get_farm(
     farm_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.farmer))
+    current_user: AuthUser = Depends(require_role(UserRole.farmer))
 ):
     """Get detailed farm information with score"""
     farm = db.query(Farm).filter(
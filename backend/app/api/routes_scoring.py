@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-import httpx
-import os
-from ..core.security import get_db, require_role
-from ..models.user import UserRole, User
+from typing import List, Optional
+from datetime import date, datetime
+from ..core import ml_scoring
+from ..core.http import get_http_client, ml_service_url, ml_timeout
+from ..core.ml_scoring import MLUnavailableError
+from ..core.security import get_db, require_role, AuthUser
+from ..models.user import UserRole
+from ..models.meteorology import Meteorology
 
 
 router = APIRouter(prefix="/api/v1", tags=["scoring"])
@@ -14,27 +19,152 @@ class ScoreRequest(BaseModel):
     crop_type: str
     acreage: float
     geometry: dict
+    farm_id: Optional[int] = None  # Enables the stale-score fallback when the ML service is down
 
 
 class ScoreResponse(BaseModel):
     numeric_score: float
     risk_category: str
     factors: dict
+    model_version: Optional[str] = None
+    stale: bool = False
+    scored_at: Optional[datetime] = None
+
+
+def ml_unavailable(error: MLUnavailableError) -> HTTPException:
+    headers = {"Retry-After": str(int(error.retry_after) + 1)} if error.retry_after is not None else None
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(error), headers=headers)
+
+
+class BatchScoreRequest(BaseModel):
+    fields: List[ScoreRequest]
+
+
+class BatchScoreResponse(BaseModel):
+    results: List[ScoreResponse]
 
 
 @router.post("/score", response_model=ScoreResponse)
 async def score_field(
     request: ScoreRequest,
     db: Session = Depends(get_db),
-    _: User = Depends(require_role(UserRole.bank_officer))
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
 ):
     """
     Public API endpoint for bank systems to generate credit scores.
+    If the ML service is unavailable and `farm_id` is given, the farm's latest
+    stored score is returned with `stale: true`.
+    Requires bank_officer authentication.
+    """
+    try:
+        return await ml_scoring.score_field(request.dict(exclude={"farm_id"}))
+    except MLUnavailableError as e:
+        fallback = ml_scoring.stale_score(db, request.farm_id) if request.farm_id is not None else None
+        if fallback is None:
+            raise ml_unavailable(e)
+        return fallback
+
+
+@router.post("/score/batch", response_model=BatchScoreResponse)
+async def score_fields_batch(
+    request: BatchScoreRequest,
+    http_request: Request,
+    stream: bool = False,
+    db: Session = Depends(get_db),
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
+):
+    """
+    Score a portfolio of fields in a single round trip to the ML service.
+    Large batches (or `?stream=true`) are relayed as NDJSON, one result per line.
+    In embedded scoring mode the batch is scored in-process and returned as JSON.
     Requires bank_officer authentication.
     """
-    ml_url = os.getenv("ML_SERVICE_URL", "http://ml_service:8001/score")
+    scorer = ml_scoring.get_scorer()
+    if scorer.mode == "embedded":
+        results = await scorer.score_batch([field.dict() for field in request.fields])
+        return {"results": results}
+    
+    ml_url = ml_service_url("/score/batch")
+    headers = {}
+    if "application/x-ndjson" in http_request.headers.get("accept", ""):
+        headers["Accept"] = "application/x-ndjson"
+    
+    client = get_http_client()
+    
+    async def send():
+        response = await client.send(
+            client.build_request(
+                "POST", ml_url, json=request.dict(), params={"stream": str(stream).lower()},
+                headers=headers, timeout=ml_timeout(read=120.0)
+            ),
+            stream=True
+        )
+        if response.is_error:
+            await response.aclose()
+            response.raise_for_status()
+        return response
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(ml_url, json=request.dict(), timeout=20.0)
+    try:
+        upstream = await ml_scoring.call_ml(send)
+    except MLUnavailableError as e:
+        raise ml_unavailable(e)
+    
+    media_type = upstream.headers.get("content-type", "application/json")
+    if "application/x-ndjson" not in media_type:
+        body = await upstream.aread()
+        await upstream.aclose()
+        return Response(content=body, media_type=media_type)
+    
+    async def relay():
+        try:
+            async for chunk in upstream.aiter_raw():
+                yield chunk
+        finally:
+            await upstream.aclose()
+    
+    return StreamingResponse(relay(), media_type="application/x-ndjson")
+
+
+@router.post("/weather/sync")
+async def sync_weather(
+    since: Optional[date] = None,
+    db: Session = Depends(get_db),
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
+):
+    """
+    Push daily Meteorology rows to the ML service weather store in one bulk request.
+    The ML service keeps rolling 7/30/90-day aggregates per location from them.
+    Requires bank_officer authentication.
+    """
+    query = db.query(Meteorology).filter(Meteorology.location.isnot(None))
+    if since:
+        query = query.filter(Meteorology.date >= since)
+    observations = [
+        {
+            "date": row.date.isoformat(),
+            "location": row.location,
+            "precipitation": row.precipitation,
+            "temperature": row.temperature
+        }
+        for row in query.order_by(Meteorology.date).all()
+    ]
+    
+    async def ingest():
+        response = await get_http_client().post(
+            ml_service_url("/weather/ingest"), json={"observations": observations}, timeout=ml_timeout(read=60.0)
+        )
         response.raise_for_status()
         return response.json()
+    
+    try:
+        return await ml_scoring.call_ml(ingest)
+    except MLUnavailableError as e:
+        raise ml_unavailable(e)
+
+
+@router.get("/ml/status")
+def ml_service_status(
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
+):
+    """Circuit breaker state and ML call counters (requests, coalesced, rejected, stale_served, ...)"""
+    return ml_scoring.status()
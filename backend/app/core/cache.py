@@ -0,0 +1,69 @@
+"""
+Response cache for read-heavy endpoints (bank dashboards).
+
+Each entry remembers the data versions it was computed from. Versions are
+counters in the scoring database (data_versions table) that writers bump in
+the same transaction as their change, so every worker process sees an
+invalidation as soon as the write commits. The TTL bounds staleness for
+changes that don't bump a version (time-dependent values, other writers).
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class ResponseCache:
+    def __init__(self, versions: Callable[[Tuple[str, ...]], Dict[str, int]]):
+        """
+        Args:
+            versions: returns the current version of each requested scope
+        """
+        self._versions = versions
+        self._entries: Dict[Hashable, Tuple[float, Dict[str, int], Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidated": 0, "expired": 0}
+
+    def get_or_compute(self, key: Hashable, scopes: Tuple[str, ...], ttl: float, compute: Callable[[], Any]) -> Any:
+        # Versions are read before computing: a write racing with the
+        # computation can only leave newer data under an older version
+        current = self._versions(scopes)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, versions, value = entry
+                if versions != current:
+                    self._stats["invalidated"] += 1
+                elif now >= expires_at:
+                    self._stats["expired"] += 1
+                else:
+                    self._stats["hits"] += 1
+                    return value
+            self._stats["misses"] += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (now + ttl, current, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else None
+            }
+
+
+def _scoring_db_versions(scopes: Tuple[str, ...]) -> Dict[str, int]:
+    from ..database_adapter import get_db_adapter
+    return get_db_adapter().db_manager.get_data_versions(scopes)
+
+
+# Bank dashboard endpoints (routes_bank_extended, routes_bank_loan)
+dashboard_cache = ResponseCache(_scoring_db_versions)
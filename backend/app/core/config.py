@@ -8,10 +8,6 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
 ENV_FILE = PROJECT_ROOT / ".env"
 
-print(f"[CONFIG] Looking for .env file at: {ENV_FILE}")
-print(f"[CONFIG] .env file exists: {ENV_FILE.exists()}")
-
-
 class Settings(BaseSettings):
     PROJECT_NAME: str = "AgroScoring.AI"
     BACKEND_CORS_ORIGINS: str = "http://localhost:3000"
@@ -19,13 +15,55 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = "CHANGE_ME_IN_PRODUCTION"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    TOKEN_CACHE_SIZE: int = 10000  # verified tokens kept in memory
+    USER_CACHE_SIZE: int = 1000
+    USER_CACHE_TTL: float = 300.0  # seconds a cached user record is trusted
     
     # Optional fields that may be in .env but not required
     SUPABASE_URL: str = ""
     SUPABASE_ANON_KEY: str = ""
     ML_SERVICE_URL: str = "http://localhost:8001/score"
+    ML_SCORING_MODE: str = "remote"  # "remote" (HTTP) or "embedded" (in-process, see core/ml_scoring.py)
+    ML_SERVICE_DIR: str = str((PROJECT_ROOT / "ml_service").resolve())  # embedded mode imports the pipeline from here
+    ML_EMBEDDED_WORKERS: int = 4
     NEXT_PUBLIC_API_URL: str = "http://localhost:8000"
     
+    # Fast cold start: no config diagnostics, OpenAI check in the background (see core/startup.py)
+    FAST_START: bool = False
+    
+    # Shared HTTP client for ML service calls (see core/http.py)
+    ML_HTTP_MAX_CONNECTIONS: int = 100
+    ML_HTTP_MAX_KEEPALIVE: int = 20
+    ML_HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept
+    ML_HTTP_CONNECT_TIMEOUT: float = 2.0
+    ML_HTTP_READ_TIMEOUT: float = 20.0
+    ML_HTTP_WRITE_TIMEOUT: float = 10.0
+    ML_HTTP_POOL_TIMEOUT: float = 5.0  # wait for a free pooled connection
+    ML_HTTP2: bool = True  # used only when the h2 package is installed
+    
+    # Large list endpoints: encode trusted rows with orjson, skipping per-row validation (see core/responses.py)
+    FAST_JSON_RESPONSES: bool = False
+    
+    # Request metrics at /api/metrics (see core/metrics.py)
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_RATE: float = 1.0  # share of requests recorded; lower it to cut overhead
+    
+    # Slow-query log at /api/metrics/slow-queries (see core/slow_queries.py)
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 500
+    
+    # Bank dashboard response cache (see core/cache.py); writes invalidate it immediately
+    DASHBOARD_CACHE_TTL: float = 10.0
+    
+    # Circuit breaker around ML service calls (see core/ml_scoring.py)
+    ML_BREAKER_WINDOW: int = 20  # last N calls considered
+    ML_BREAKER_MIN_CALLS: int = 10
+    ML_BREAKER_ERROR_RATE: float = 0.5
+    ML_BREAKER_SLOW_CALL_SECONDS: float = 5.0
+    ML_BREAKER_SLOW_RATE: float = 0.5
+    ML_BREAKER_OPEN_SECONDS: float = 30.0  # cool-down before a probe call
+    
     @property
     def cors_origins(self) -> List[str]:
         """Parse CORS origins from comma-separated string"""
@@ -40,11 +78,14 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-# Debug: Print loaded database URL (hide password)
-db_url = settings.DATABASE_URL
-if '@' in db_url:
-    parts = db_url.split('@')
-    masked = parts[0].rsplit(':', 1)[0] + ':****@' + parts[1]
-    print(f"[CONFIG] Loaded DATABASE_URL: {masked}")
-else:
-    print(f"[CONFIG] Loaded DATABASE_URL: {db_url}")
+# Debug: Print .env location and loaded database URL (hide password); quiet with FAST_START
+if not settings.FAST_START:
+    print(f"[CONFIG] Looking for .env file at: {ENV_FILE}")
+    print(f"[CONFIG] .env file exists: {ENV_FILE.exists()}")
+    db_url = settings.DATABASE_URL
+    if '@' in db_url:
+        parts = db_url.split('@')
+        masked = parts[0].rsplit(':', 1)[0] + ':****@' + parts[1]
+        print(f"[CONFIG] Loaded DATABASE_URL: {masked}")
+    else:
+        print(f"[CONFIG] Loaded DATABASE_URL: {db_url}")
@@ -0,0 +1,80 @@
+"""
+Application-scoped HTTP client for backend -> ML service calls.
+
+One httpx.AsyncClient is created on startup and closed on shutdown, so
+requests reuse pooled keep-alive connections instead of paying TCP setup on
+every score. Pool limits and per-phase timeouts come from settings; HTTP/2 is
+enabled when the optional `h2` package is installed.
+"""
+from typing import Optional
+
+import httpx
+
+from .config import settings
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def ml_timeout(read: Optional[float] = None) -> httpx.Timeout:
+    """Per-phase timeouts; `read` overrides the default for slow endpoints (batch scoring)"""
+    return httpx.Timeout(
+        connect=settings.ML_HTTP_CONNECT_TIMEOUT,
+        read=settings.ML_HTTP_READ_TIMEOUT if read is None else read,
+        write=settings.ML_HTTP_WRITE_TIMEOUT,
+        pool=settings.ML_HTTP_POOL_TIMEOUT
+    )
+
+
+def create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.ML_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.ML_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=settings.ML_HTTP_KEEPALIVE_EXPIRY
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=ml_timeout(),
+        http2=settings.ML_HTTP2 and http2_available()
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Startup: create the shared client"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client():
+    """Shutdown: close pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The shared client. Created on first use if the startup hook has not run
+    (scripts, tests without lifespan).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+def ml_service_url(path: str = "/score") -> str:
+    """ML service endpoint; ML_SERVICE_URL points at its /score endpoint"""
+    base = settings.ML_SERVICE_URL.rstrip("/").rsplit("/score", 1)[0]
+    return base + path
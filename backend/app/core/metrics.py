@@ -0,0 +1,229 @@
+"""
+Per-route request metrics in Prometheus text format (served at /api/metrics).
+
+MetricsMiddleware records, for a sampled share of requests
+(METRICS_SAMPLE_RATE), the latency and response size per route template,
+and the number and total time of SQL statements the request ran. SQL is
+observed on both databases: SQLAlchemy engine events and the scoring
+DatabaseManager connections (database/instrumentation.py). ML service and
+GPT call times are recorded for every call and also attributed to the
+sampled request that made them.
+
+Unsampled requests skip the middleware bookkeeping entirely; statement and
+call hooks then only check a context variable.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The database package lives next to app/ (as in database_adapter)
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from database import instrumentation  # noqa: E402
+
+from .config import settings  # noqa: E402
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a label tuple"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: Iterable[float]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values: Tuple[str, ...], value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            sep = "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{_number(bound)}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {values[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {_number(values[-2])}")
+            lines.append(f"{self.name}_count{{{labels}}} {values[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+response_size = Histogram(
+    "http_response_size_bytes", "Response body size by route template",
+    ("method", "route"), SIZE_BUCKETS
+)
+request_sql_statements = Histogram(
+    "http_request_sql_statements", "SQL statements executed per request (both databases)",
+    ("method", "route"), COUNT_BUCKETS
+)
+request_sql_duration = Histogram(
+    "http_request_sql_duration_seconds", "Total SQL time per request (both databases)",
+    ("method", "route"), LATENCY_BUCKETS
+)
+request_external_duration = Histogram(
+    "http_request_external_duration_seconds", "ML service / GPT time per request",
+    ("method", "route", "service"), LATENCY_BUCKETS
+)
+external_call_duration = Histogram(
+    "external_call_duration_seconds", "Duration of each ML service / GPT call",
+    ("service",), LATENCY_BUCKETS
+)
+HISTOGRAMS = (
+    request_duration, response_size, request_sql_statements,
+    request_sql_duration, request_external_duration, external_call_duration
+)
+
+
+class RequestStats:
+    __slots__ = ("sql_statements", "sql_seconds", "external")
+
+    def __init__(self):
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.external: Dict[str, float] = {}
+
+
+# Stats of the sampled request being handled (copied into worker threads with the context)
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _on_statement(statement, parameters, seconds: float, db_path=None):
+    stats = _current.get()
+    if stats is not None:
+        stats.sql_statements += 1
+        stats.sql_seconds += seconds
+
+
+def record_external(service: str, seconds: float):
+    """One ML service / GPT call"""
+    if not settings.METRICS_ENABLED:
+        return
+    external_call_duration.observe((service,), seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.external[service] = stats.external.get(service, 0.0) + seconds
+
+
+def install_sqlalchemy(engine: Engine):
+    """Time SQLAlchemy statements and report them like the scoring DB's"""
+    if getattr(engine, "_statements_timed", False):
+        return
+    engine._statements_timed = True
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        instrumentation.notify_statement(statement, parameters, time.perf_counter() - started, None)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def install(engine: Engine):
+    if not settings.METRICS_ENABLED:
+        return
+    install_sqlalchemy(engine)
+    instrumentation.add_statement_hook(_on_statement)
+    instrumentation.add_call_hook(record_external)
+
+
+class MetricsMiddleware:
+    """ASGI middleware; unsampled requests pass straight through"""
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = settings.METRICS_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = [500]
+        size = [0]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            # Route template, not the raw path, to keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            request_duration.observe((method, route, str(status[0])), elapsed)
+            response_size.observe((method, route), size[0])
+            request_sql_statements.observe((method, route), stats.sql_statements)
+            request_sql_duration.observe((method, route), stats.sql_seconds)
+            for service, seconds in stats.external.items():
+                request_external_duration.observe((method, route, service), seconds)
+
+
+def render() -> str:
+    lines = [
+        "# HELP metrics_sample_rate Share of requests recorded by the request histograms",
+        "# TYPE metrics_sample_rate gauge",
+        f"metrics_sample_rate {_number(settings.METRICS_SAMPLE_RATE)}"
+    ]
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,207 @@
+"""
+Field scoring, either through the ML service or in-process.
+
+ML_SCORING_MODE selects the scorer:
+    remote    HTTP calls to the ML service (ML_SERVICE_URL), behind a
+              circuit breaker. When the service is failing or slow the
+              breaker opens and calls fail fast with MLUnavailableError;
+              callers that know the farm can then serve its latest stored
+              Score, flagged as stale.
+    embedded  the ML service scoring pipeline is imported from ML_SERVICE_DIR
+              and run on a worker thread pool, skipping JSON/HTTP/validation
+              round trips. For deployments where both run on one host; the
+              ML service environment (FEATURE_STORE_PATH, NDVI_SCENE_DIR,
+              MODEL_REGISTRY_DIR, ...) is then read by this process.
+
+Either way, identical score requests in flight are coalesced into one call.
+"""
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from .config import settings
+from . import metrics
+from .http import get_http_client, ml_service_url
+from .resilience import CircuitBreaker, CircuitOpenError, Coalescer, Counters
+from ..models.score import Score
+
+
+class MLUnavailableError(Exception):
+    """The ML service could not be used: breaker open, connection error or 5xx"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+counters = Counters()
+breaker = CircuitBreaker(
+    "ml_service",
+    window=settings.ML_BREAKER_WINDOW,
+    min_calls=settings.ML_BREAKER_MIN_CALLS,
+    error_rate=settings.ML_BREAKER_ERROR_RATE,
+    slow_call_seconds=settings.ML_BREAKER_SLOW_CALL_SECONDS,
+    slow_rate=settings.ML_BREAKER_SLOW_RATE,
+    open_seconds=settings.ML_BREAKER_OPEN_SECONDS,
+    counters=counters
+)
+coalescer = Coalescer("ml_service", counters=counters)
+
+
+def _is_failure(error: BaseException) -> bool:
+    """Client errors (4xx) are the caller's problem, not a sign of an unhealthy service"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return True
+
+
+async def call_ml(fn: Callable[[], Awaitable]):
+    """
+    Run an ML service call through the breaker. Open breaker, transport errors
+    and 5xx responses are raised as MLUnavailableError; 4xx errors propagate.
+    """
+    started = time.perf_counter()
+    try:
+        return await breaker.call(fn, is_failure=_is_failure)
+    except CircuitOpenError as e:
+        started = None  # rejected without a call
+        raise MLUnavailableError(str(e), retry_after=e.retry_after)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code < 500:
+            raise
+        raise MLUnavailableError(f"ML service error: {e.response.status_code}")
+    except httpx.TransportError as e:
+        raise MLUnavailableError(f"ML service unavailable: {type(e).__name__}: {e}")
+    finally:
+        if started is not None:
+            metrics.record_external("ml", time.perf_counter() - started)
+
+
+class RemoteScorer:
+    """Scores through the ML service HTTP API"""
+
+    mode = "remote"
+
+    async def _post(self, path: str, payload: Dict) -> Dict:
+        response = await get_http_client().post(ml_service_url(path), json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def score(self, payload: Dict) -> Dict:
+        return await call_ml(lambda: self._post("/score", payload))
+
+    async def score_batch(self, payloads: List[Dict]) -> List[Dict]:
+        result = await call_ml(lambda: self._post("/score/batch", {"fields": payloads}))
+        return result["results"]
+
+    def close(self):
+        pass
+
+
+class EmbeddedScorer:
+    """Runs the ML service scoring pipeline in this process on a thread pool"""
+
+    mode = "embedded"
+
+    def __init__(self, ml_service_dir: str, workers: int):
+        # The ML service uses flat imports; appended so backend packages win on name clashes
+        if ml_service_dir not in sys.path:
+            sys.path.append(ml_service_dir)
+        from model_dummy import score_batch
+        from model_registry import load_active_model
+
+        load_active_model()
+        self._score_batch = score_batch
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ml-embedded")
+
+    @staticmethod
+    def _normalize(payload: Dict) -> Dict:
+        # Same shape the ML service request model produces
+        return {
+            "crop_type": str(payload["crop_type"]),
+            "acreage": float(payload["acreage"]),
+            "geometry": payload["geometry"],
+            "observation_date": payload.get("observation_date")
+        }
+
+    async def score_batch(self, payloads: List[Dict]) -> List[Dict]:
+        rows = [self._normalize(p) for p in payloads]
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, self._score_batch, rows)
+        finally:
+            metrics.record_external("ml", time.perf_counter() - started)
+
+    async def score(self, payload: Dict) -> Dict:
+        return (await self.score_batch([payload]))[0]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+_scorer = None
+
+
+def create_scorer(mode: Optional[str] = None):
+    mode = (mode or settings.ML_SCORING_MODE).lower()
+    if mode == "embedded":
+        return EmbeddedScorer(settings.ML_SERVICE_DIR, settings.ML_EMBEDDED_WORKERS)
+    if mode != "remote":
+        raise ValueError(f"Unknown ML_SCORING_MODE {mode!r}; expected 'remote' or 'embedded'")
+    return RemoteScorer()
+
+
+def start_scorer():
+    """Startup: build the configured scorer (embedded mode loads the model here)"""
+    global _scorer
+    if _scorer is None:
+        _scorer = create_scorer()
+    return _scorer
+
+
+def close_scorer():
+    global _scorer
+    if _scorer is not None:
+        _scorer.close()
+        _scorer = None
+
+
+def get_scorer():
+    return start_scorer()
+
+
+async def score_field(payload: Dict) -> Dict:
+    """Score one field; concurrent calls with an identical payload share one scoring call"""
+    counters.incr("ml_service.requests")
+    key = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    scorer = get_scorer()
+    result = await coalescer.run(key, lambda: scorer.score(payload))
+    # Coalesced callers share the object; hand out copies
+    return dict(result)
+
+
+def stale_score(db: Session, farm_id: int) -> Optional[Dict]:
+    """Latest stored score of a farm, flagged as stale, or None"""
+    latest = db.query(Score).filter(Score.farm_id == farm_id).order_by(Score.created_at.desc()).first()
+    if latest is None:
+        return None
+    counters.incr("ml_service.stale_served")
+    return {
+        "numeric_score": latest.numeric_score,
+        "risk_category": latest.risk_category,
+        "factors": latest.factors,
+        "stale": True,
+        "scored_at": latest.created_at
+    }
+
+
+def status() -> Dict:
+    return {"mode": get_scorer().mode, "breaker": breaker.as_dict(), "counters": counters.as_dict()}
@@ -0,0 +1,195 @@
+"""
+Resilience primitives for calls to the ML service.
+
+CircuitBreaker - trips open when too many recent calls failed or were slow,
+                 fails fast while open, lets one probe through after a
+                 cool-down (half-open) and closes again when it succeeds.
+Coalescer      - identical requests in flight share one upstream call.
+Counters       - thread-safe named counters exposed through the API.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream service while the breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class Counters:
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class CircuitBreaker:
+    """
+    Sliding window over the last `window` calls. The breaker opens when at
+    least `min_calls` are recorded and either the error rate or the share of
+    calls slower than `slow_call_seconds` reaches its threshold.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 10,
+                 error_rate: float = 0.5, slow_call_seconds: float = 5.0,
+                 slow_rate: float = 0.5, open_seconds: float = 30.0,
+                 counters: Optional[Counters] = None):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.counters = counters or Counters()
+        self._calls = deque(maxlen=window)  # (failed, slow)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self.counters.incr(f"{self.name}.probes")
+                return
+            retry_after = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+        self.counters.incr(f"{self.name}.rejected")
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record(self, failed: bool, duration: float):
+        slow = duration >= self.slow_call_seconds
+        self.counters.incr(f"{self.name}.failures" if failed else f"{self.name}.successes")
+        if slow:
+            self.counters.incr(f"{self.name}.slow_calls")
+
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                # The probe decides: back to normal, or another cool-down
+                if failed or slow:
+                    self._trip()
+                else:
+                    self._state = self.CLOSED
+                    self._calls.clear()
+                self._probe_in_flight = False
+                return
+
+            self._calls.append((failed, slow))
+            if self._state == self.CLOSED and len(self._calls) >= self.min_calls:
+                n = len(self._calls)
+                errors = sum(1 for f, _ in self._calls if f)
+                slow_calls = sum(1 for _, s in self._calls if s)
+                if errors / n >= self.error_rate or slow_calls / n >= self.slow_rate:
+                    self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        self.counters.incr(f"{self.name}.opened")
+
+    async def call(self, fn: Callable[[], Awaitable], is_failure: Callable[[BaseException], bool] = lambda e: True):
+        """Run `fn` through the breaker; exceptions for which is_failure() is False don't count"""
+        self.before_call()
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # The caller went away; says nothing about the upstream service
+            with self._lock:
+                self._probe_in_flight = False
+            raise
+        except Exception as e:
+            self.record(is_failure(e), time.monotonic() - start)
+            raise
+        self.record(False, time.monotonic() - start)
+        return result
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "window_calls": len(self._calls),
+                "window_failures": sum(1 for f, _ in self._calls if f),
+                "window_slow_calls": sum(1 for _, s in self._calls if s)
+            }
+
+
+class _LeaderCancelled(Exception):
+    """The call followers were waiting on was cancelled; they retry it themselves"""
+
+
+class Coalescer:
+    """Concurrent calls with the same key await a single upstream call"""
+
+    def __init__(self, name: str, counters: Optional[Counters] = None):
+        self.name = name
+        self.counters = counters or Counters()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable]):
+        joined = False
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            if not joined:
+                self.counters.incr(f"{self.name}.coalesced")
+                joined = True
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # The leader's caller went away; the first follower to get here leads the retry
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Only this caller is cancelled: followers must not see CancelledError
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Followers get the exception; don't warn if nobody was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
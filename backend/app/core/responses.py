@@ -0,0 +1,61 @@
+"""
+Fast JSON path for large list endpoints.
+
+Normally a route returns rows, FastAPI validates each one against the
+response_model and serializes the result with the stdlib json module. For
+lists of trusted database rows that are already shaped like the model,
+json_rows() can skip both steps and encode the rows with orjson in one call.
+The route keeps its response_model, so the OpenAPI schema is unchanged.
+
+Opt-in with FAST_JSON_RESPONSES (orjson is in requirements.txt); if it is
+not installed a warning is printed at startup and the regular path is used.
+"""
+from decimal import Decimal
+from typing import Any, Dict, List, Union
+
+from fastapi.responses import Response
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    if settings.FAST_JSON_RESPONSES:
+        print("Warning: FAST_JSON_RESPONSES is set but orjson is not installed; using the regular JSON path")
+
+
+def orjson_available() -> bool:
+    return orjson is not None
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(Response):
+    """orjson-encoded response; datetimes, enums and numpy values are handled natively"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def fast_json_enabled() -> bool:
+    return settings.FAST_JSON_RESPONSES and orjson is not None
+
+
+def json_rows(rows: List[Dict[str, Any]]) -> Union[List[Dict[str, Any]], Response]:
+    """
+    Response for a list endpoint. `rows` must already match the route's
+    response_model field for field: with the fast path enabled they are sent
+    as they are, without per-row validation.
+    """
+    if not fast_json_enabled():
+        return rows
+    return FastJSONResponse(rows)
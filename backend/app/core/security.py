@@ -1,17 +1,23 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import jwt, JWTError
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends, Header
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from .config import settings
 from ..db import SessionLocal
 from ..models.user import User, UserRole
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# auto_error=False: requests without a bearer token fall back to the X-Role header
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 # Mock user data
 MOCK_FARMER_EMAIL = "farmer@example.com"
@@ -37,50 +43,199 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return hashed_password == f"hashed_{plain_password}"
 
 
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (expires_at if expires_at is not None else time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class AuthUser:
+    """
+    Authenticated principal built from token claims, without a database hit.
+    Exposes the User attributes routes rely on (id, email, role).
+    """
+
+    __slots__ = ("id", "email", "role")
+
+    def __init__(self, id: int, email: str, role: UserRole):
+        self.id = id
+        self.email = email
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthUser":
+        return cls(user.id, user.email, user.role)
+
+
+# Verified tokens -> AuthUser, until the token expires
+_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+# X-Role fallback principals and principals looked up for tokens without role/email claims
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+@lru_cache(maxsize=4)
+def _jwt_key(secret: str, algorithm: str) -> Key:
+    """Parsed signing key, built once instead of on every encode/decode"""
+    return jwk.construct(secret, algorithm)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a dummy token (kept for compatibility)"""
-    return "dummy-token"
+    """
+    Signed JWT. `data` carries sub (user id), role and email; the token is
+    verified in memory on every request (see get_current_user).
+    """
+    claims = dict(data)
+    claims["sub"] = str(claims["sub"])
+    if isinstance(claims.get("role"), UserRole):
+        claims["role"] = claims["role"].value
+    now = datetime.utcnow()
+    claims["iat"] = now
+    claims["exp"] = now + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    return jwt.encode(claims, _jwt_key(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM), algorithm=settings.JWT_ALGORITHM)
+
+
+def decode_access_token(token: str) -> AuthUser:
+    """
+    Verify a token (signature, expiry) and build the principal; verified tokens are cached.
+    Older tokens without role/email claims are resolved by user id (cached database lookup).
+    """
+    user = _token_cache.get(token)
+    if user is not None:
+        return user
+    
+    try:
+        claims = jwt.decode(token, _jwt_key(settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM),
+                            algorithms=[settings.JWT_ALGORITHM])
+        user_id = int(claims["sub"])
+        if "role" in claims and "email" in claims:
+            user = AuthUser(user_id, claims["email"], UserRole(claims["role"]))
+        else:
+            # Tokens issued before role/email claims were added carry only sub
+            user = _user_by_id(user_id)
+    except (JWTError, KeyError, ValueError):
+        user = None
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    
+    if "role" in claims and "email" in claims:
+        # Claims-based principals are fixed for the token's lifetime; looked-up ones
+        # expire with the user cache instead
+        _token_cache.set(token, user, expires_at=float(claims["exp"]) if "exp" in claims else None)
+    return user
+
+
+def _user_by_id(user_id: int) -> Optional[AuthUser]:
+    """Principal for a user id from the database, cached for USER_CACHE_TTL; None if the user is gone"""
+    cached = _user_cache.get(("user", user_id))
+    if cached is not None:
+        return cached
+    
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+        principal = AuthUser.from_user(user)
+    finally:
+        db.close()
+    
+    _user_cache.set(("user", user_id), principal)
+    return principal
+
+
+def _mock_user(role: UserRole) -> AuthUser:
+    """X-Role fallback: the demo user for a role, created on first use and then served from cache"""
+    cached = _user_cache.get(("mock", role))
+    if cached is not None:
+        return cached
+    
+    email = MOCK_FARMER_EMAIL if role == UserRole.farmer else MOCK_BANK_EMAIL
+    db = SessionLocal()
+    try:
+        # Check if mock user exists
+        user = db.query(User).filter(User.email == email).first()
+        
+        if not user:
+            # Create mock user without bcrypt
+            user = User(
+                email=email,
+                hashed_password=get_password_hash("mock"),  # Simple hash
+                role=role
+            )
+            db.add(user)
+            try:
+                db.commit()
+                db.refresh(user)
+            except IntegrityError:
+                # Created concurrently by another request
+                db.rollback()
+                user = db.query(User).filter(User.email == email).one()
+        principal = AuthUser.from_user(user)
+    finally:
+        db.close()
+    
+    _user_cache.set(("mock", role), principal)
+    return principal
 
 
 def get_current_user(
-    x_role: Optional[str] = Header(None, alias="X-Role"),
-    db: Session = Depends(get_db)
-) -> User:
+    token: Optional[str] = Depends(oauth2_scheme),
+    x_role: Optional[str] = Header(None, alias="X-Role")
+) -> AuthUser:
     """
-    Simplified mock auth - no bcrypt to avoid deployment issues
+    Bearer JWT when present, verified in memory; otherwise the demo user for
+    the X-Role header (farmer by default). No database round trip once warm.
     """
+    # Non-JWT bearer values (legacy "dummy-token", "null" from the frontend) fall through to X-Role
+    if token and token.count(".") == 2:
+        return decode_access_token(token)
+    
     # Default to farmer role
     role = UserRole.farmer
-    email = MOCK_FARMER_EMAIL
-    
     if x_role:
         try:
             role = UserRole(x_role.lower())
-            email = MOCK_FARMER_EMAIL if role == UserRole.farmer else MOCK_BANK_EMAIL
         except ValueError:
             # Invalid role, use default
             pass
-
-    # Check if mock user exists
-    user = db.query(User).filter(User.email == email).first()
     
-    if not user:
-        # Create mock user without bcrypt
-        user = User(
-            email=email,
-            hashed_password=get_password_hash("mock"),  # Simple hash
-            role=role
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-        
-    return user
+    return _mock_user(role)
 
 
 def require_role(*roles: UserRole):
     """Dependency to require specific user roles"""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
         if current_user.role not in roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
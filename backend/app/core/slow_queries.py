@@ -0,0 +1,183 @@
+"""
+Slow-query log for both databases (served at /api/metrics/slow-queries).
+
+Every SQL statement is timed: SQLAlchemy through engine events, the scoring
+DatabaseManager through its connection factory (database/instrumentation.py).
+A statement slower than SLOW_QUERY_THRESHOLD_MS is logged and aggregated
+under a fingerprint of its normalized text (literals and IN lists replaced by
+placeholders), together with the shape of its parameters and, on SQLite, the
+EXPLAIN QUERY PLAN output. The plan is captured once per fingerprint, on its
+first slow run, and flags full table scans and temporary sort b-trees so a
+missing index stands out in the report.
+"""
+import hashlib
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from . import metrics  # puts the database package on sys.path
+from .config import settings
+from database import instrumentation
+
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w.?])-?\d+(?:\.\d+)?(?![\w.])")
+_IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.I)
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement text with literals replaced, so queries differing only in values group together"""
+    sql = _COMMENTS.sub(" ", statement)
+    sql = _STRINGS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (?+)", sql)
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";").strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def _is_many(parameters: Any) -> bool:
+    return isinstance(parameters, list) and bool(parameters) and isinstance(parameters[0], (list, tuple, dict))
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Types of the bound parameters (never their values)"""
+    if parameters is None:
+        return None
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if _is_many(parameters):
+        return f"{len(parameters)} x {parameter_shape(parameters[0])}"
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def explain_query_plan(db_path: str, statement: str, parameters: Any) -> List[str]:
+    """EXPLAIN QUERY PLAN on a separate plain connection (not timed, so not logged again)"""
+    if _is_many(parameters):
+        parameters = parameters[0]
+    if not isinstance(parameters, (list, tuple, dict)):
+        parameters = ()
+    conn = sqlite3.connect(db_path, timeout=1)
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    finally:
+        conn.close()
+    depth = {0: -1}
+    plan = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        plan.append("  " * depth[node_id] + detail)
+    return plan
+
+
+def plan_warnings(plan: List[str]) -> List[str]:
+    """Full table scans and temporary sort b-trees; scans of materialized subqueries are expected"""
+    details = [line.strip() for line in plan]
+    derived = {
+        detail.split(" ", 1)[1] for detail in details
+        if detail.startswith(("MATERIALIZE ", "CO-ROUTINE "))
+    }
+    warnings = []
+    for detail in details:
+        if detail.startswith("SCAN ") and "INDEX" not in detail:
+            target = detail[len("SCAN "):]
+            if target not in derived and not target.startswith("("):
+                warnings.append(f"full scan: {target}")
+        elif "USE TEMP B-TREE" in detail:
+            warnings.append(f"temp b-tree: {detail[len('USE TEMP B-TREE FOR '):]}")
+    return warnings
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, max_fingerprints: int = 500):
+        self.threshold_ms = threshold_ms
+        self.max_fingerprints = max_fingerprints
+        self.sqlalchemy_db_path: Optional[str] = None  # SQLite file behind the engine, for EXPLAIN
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_statement(self, statement: str, parameters: Any, seconds: float, db_path: Optional[str] = None):
+        """instrumentation statement hook; db_path None means the SQLAlchemy engine"""
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.threshold_ms:
+            return
+
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        shape = parameter_shape(parameters)
+        source = "sqlalchemy" if db_path is None else "scoring_db"
+        now = datetime.utcnow().isoformat()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            first = entry is None
+            if first:
+                if len(self._entries) >= self.max_fingerprints:
+                    # Forget the least expensive fingerprint
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k]["total_ms"])]
+                entry = self._entries[key] = {
+                    "fingerprint": key, "sql": normalized, "source": source,
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "plan": None, "warnings": [], "first_seen": now
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_seen"] = now
+            entry["params"] = shape
+
+        print(f"[SLOW SQL] {elapsed_ms:.1f} ms {source} {key}: {normalized[:300]} params={shape}")
+        if first:
+            plan = self._explain(statement, parameters, db_path)
+            if plan is not None:
+                entry["plan"] = plan
+                entry["warnings"] = plan_warnings(plan)
+                for line in plan:
+                    print(f"[SLOW SQL]   {line}")
+
+    def _explain(self, statement: str, parameters: Any, db_path: Optional[str]) -> Optional[List[str]]:
+        path = db_path or self.sqlalchemy_db_path
+        if not path or not normalize_sql(statement).upper().startswith(_EXPLAINABLE):
+            return None
+        try:
+            return explain_query_plan(path, statement, parameters)
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+
+    def top(self, limit: int = 20, sort: str = "total_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries.values()]
+        for entry in entries:
+            entry["avg_ms"] = entry["total_ms"] / entry["count"]
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        for entry in entries:
+            for field in ("total_ms", "max_ms", "avg_ms"):
+                entry[field] = round(entry[field], 3)
+        return entries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_MAX_FINGERPRINTS)
+
+
+def install(engine: Engine):
+    if not settings.SLOW_QUERY_LOG_ENABLED:
+        return
+    if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        slow_query_log.sqlalchemy_db_path = engine.url.database
+    metrics.install_sqlalchemy(engine)
+    instrumentation.add_statement_hook(slow_query_log.on_statement)
@@ -0,0 +1,116 @@
+"""
+Startup bookkeeping: per-phase timing and readiness.
+
+StartupTimer measures each startup phase and prints one breakdown line, so a
+slow cold start shows where the time went. Readiness (/api/ready) turns true
+once startup has finished and the external checks are done; with FAST_START
+those checks (OpenAI API) run on a background thread instead of delaying
+startup.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+class StartupTimer:
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def add(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+    def as_dict(self) -> Dict[str, float]:
+        breakdown = {name: round(seconds * 1000, 1) for name, seconds in self.phases}
+        breakdown["total"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return breakdown
+
+    def report(self) -> str:
+        breakdown = self.as_dict()
+        total = breakdown.pop("total")
+        parts = ", ".join(f"{name} {ms:.0f} ms" for name, ms in breakdown.items())
+        return f"⏱ Startup {total:.0f} ms: {parts}"
+
+
+_ready = threading.Event()
+_state = {"startup_ms": None, "phases": {}, "checks": {}}
+
+
+def check_openai(live: bool = True) -> Dict:
+    """OpenAI key presence and, if `live`, a models.list() call (imports openai on first use)"""
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return {"status": "missing_key"}
+
+    # Mask key for security
+    masked_key = api_key[:8] + "..." + api_key[-4:] if len(api_key) > 12 else "***"
+    if not live:
+        return {"status": "configured", "key": masked_key}
+
+    start = time.perf_counter()
+    try:
+        from openai import OpenAI
+        client = OpenAI(api_key=api_key)
+        response = client.models.list()
+        return {"status": "ok", "key": masked_key, "models": len(response.data),
+                "seconds": round(time.perf_counter() - start, 3)}
+    except Exception as e:
+        return {"status": "error", "key": masked_key, "error": str(e),
+                "seconds": round(time.perf_counter() - start, 3)}
+
+
+def print_openai_check(result: Dict):
+    print("\n🔑 Checking OpenAI API configuration...")
+    if result["status"] == "missing_key":
+        print("   ⚠️  WARNING: OPENAI_API_KEY not set!")
+        print("   ⚠️  GPT scoring will NOT work")
+        print("   ⚠️  Set OPENAI_API_KEY in environment variables")
+        return
+    print(f"   ✓ OPENAI_API_KEY found: {result['key']}")
+    if result["status"] == "ok":
+        print(f"   ✓ OpenAI API is accessible!")
+        print(f"   ✓ Available models: {result['models']} found")
+    elif result["status"] == "error":
+        print(f"   ❌ OpenAI API test failed: {result['error']}")
+        print(f"   ⚠️  GPT scoring may not work properly")
+
+
+def run_external_checks():
+    _state["checks"]["openai"] = result = check_openai()
+    print_openai_check(result)
+
+
+def _background_checks():
+    try:
+        run_external_checks()
+    finally:
+        _ready.set()
+
+
+def mark_started(timer: StartupTimer, background_checks: bool):
+    """End of startup: record the breakdown; readiness follows now or after the background checks"""
+    _state["phases"] = timer.as_dict()
+    _state["startup_ms"] = _state["phases"]["total"]
+    print(timer.report())
+    if background_checks:
+        threading.Thread(target=_background_checks, name="startup-checks", daemon=True).start()
+    else:
+        _ready.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> Dict:
+    return {"ready": _ready.is_set(), **_state}
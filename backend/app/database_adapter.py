@@ -5,7 +5,7 @@ Database Adapter для интеграции SQLite scoring DB с FastAPI
 
 import sys
 import os
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator
 from datetime import datetime
 
 # Добавляем путь к модулю database
@@ -25,122 +25,12 @@ class DatabaseAdapter:
         self.db_manager = DatabaseManager(db_path)
         self.scoring_workflow = ScoringWorkflow(db_path)
         
-        # Инициализируем БД если нужно
+        # Схема и миграции: каждая применяется один раз (schema_version),
+        # на актуальной базе это одно чтение
         try:
             self.db_manager.initialize_database()
         except Exception as e:
-            print(f"Database already initialized: {e}")
-        
-        # MIGRATION: Add farmer_id column if missing
-        self._migrate_add_farmer_id_column()
-    
-    def _migrate_add_farmer_id_column(self):
-        """Добавить колонку farmer_id в таблицу farmers если отсутствует"""
-        try:
-            with self.db_manager.get_connection() as conn:
-                # Проверяем наличие колонки в farmers
-                cursor = conn.execute("PRAGMA table_info(farmers)")
-                columns = [row[1] for row in cursor.fetchall()]
-                
-                if 'farmer_id' not in columns:
-                    print("⚠️  MIGRATION: farmer_id column missing in farmers table, adding it...")
-                    
-                    # SQLite не поддерживает ALTER COLUMN, нужно пересоздать таблицу
-                    cursor = conn.execute("SELECT * FROM farmers")
-                    existing_data = cursor.fetchall()
-                    
-                    if existing_data:
-                        print(f"   Found {len(existing_data)} existing farmers, migrating...")
-                        conn.execute("ALTER TABLE farmers RENAME TO farmers_old")
-                        
-                        # Создаем новую таблицу с правильной схемой
-                        conn.execute("""
-                            CREATE TABLE farmers (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                farmer_id TEXT UNIQUE NOT NULL,
-                                age INTEGER NOT NULL CHECK(age >= 18 AND age <= 100),
-                                education_level TEXT NOT NULL,
-                                farming_experience_years INTEGER NOT NULL CHECK(farming_experience_years >= 0),
-                                number_of_loans INTEGER DEFAULT 0,
-                                past_defaults INTEGER DEFAULT 0,
-                                repayment_score INTEGER DEFAULT 0,
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                            )
-                        """)
-                        
-                        # Копируем данные, используя id как farmer_id
-                        conn.execute("""
-                            INSERT INTO farmers (id, farmer_id, age, education_level, 
-                                               farming_experience_years, number_of_loans,
-                                               past_defaults, repayment_score)
-                            SELECT id, 'farmer_' || id, age, education_level,
-                                   farming_experience_years, number_of_loans,
-                                   past_defaults, repayment_score
-                            FROM farmers_old
-                        """)
-                        
-                        conn.execute("DROP TABLE farmers_old")
-                        print(f"   ✓ Migration complete! Migrated {len(existing_data)} farmers")
-                    else:
-                        # Нет данных, просто пересоздаем таблицу
-                        conn.execute("DROP TABLE IF EXISTS farmers")
-                        conn.execute("""
-                            CREATE TABLE farmers (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                farmer_id TEXT UNIQUE NOT NULL,
-                                age INTEGER NOT NULL CHECK(age >= 18 AND age <= 100),
-                                education_level TEXT NOT NULL,
-                                farming_experience_years INTEGER NOT NULL CHECK(farming_experience_years >= 0),
-                                number_of_loans INTEGER DEFAULT 0,
-                                past_defaults INTEGER DEFAULT 0,
-                                repayment_score INTEGER DEFAULT 0,
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                            )
-                        """)
-                        print("   ✓ farmers table recreated with farmer_id column")
-                else:
-                    print("✓ farmers table schema up to date (farmer_id exists)")
-                
-                # НОВАЯ МИГРАЦИЯ: Проверяем farms table
-                cursor = conn.execute("PRAGMA table_info(farms)")
-                farm_columns = [row[1] for row in cursor.fetchall()]
-                
-                if 'farmer_id' not in farm_columns:
-                    print("⚠️  MIGRATION: farmer_id column missing in farms table, recreating...")
-                    
-                    # ПОЛНОСТЬЮ удаляем farms и пересоздаем
-                    conn.execute("DROP TABLE IF EXISTS farms")
-                    print("   Dropped old farms table")
-                    
-                    # Создаем farms с правильной схемой
-                    conn.execute("""
-                        CREATE TABLE farms (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            farmer_id INTEGER NOT NULL,
-                            farm_size_acres REAL NOT NULL CHECK(farm_size_acres > 0),
-                            ownership_status TEXT NOT NULL CHECK(ownership_status IN ('собственность', 'аренда', 'совладение')),
-                            land_valuation_usd REAL CHECK(land_valuation_usd >= 0),
-                            soil_quality_index INTEGER CHECK(soil_quality_index >= 0 AND soil_quality_index <= 100),
-                            water_availability_score INTEGER CHECK(water_availability_score >= 0 AND water_availability_score <= 100),
-                            irrigation_type TEXT CHECK(irrigation_type IN ('капельное', 'дождевание', 'поверхностное', 'арычное', 'отсутствует')),
-                            crop_rotation_history_years INTEGER DEFAULT 0 CHECK(crop_rotation_history_years >= 0),
-                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                            FOREIGN KEY (farmer_id) REFERENCES farmers(id) ON DELETE CASCADE
-                        )
-                    """)
-                    
-                    # Создаем индекс
-                    conn.execute("CREATE INDEX IF NOT EXISTS idx_farms_farmer_id ON farms(farmer_id)")
-                    
-                    print("   ✓ farms table recreated with farmer_id column and index")
-                else:
-                    print("✓ farms table schema up to date (farmer_id exists)")
-                    
-        except Exception as e:
-            print(f"⚠️  Migration error: {e}")
+            print(f"❌ Migration failed: {e}")
     
     # ========================================================================
     # Loan Applications (заявки)
@@ -345,6 +235,14 @@ class DatabaseAdapter:
         
         return result['scoring_result']
     
+    def stream_application_analysis(self, loan_id: int) -> Iterator[Dict[str, Any]]:
+        """Потоковый GPT анализ для заявки (события ScoringWorkflow.stream_farmer_analysis)"""
+        detail = self.get_loan_application_detail(loan_id)
+        if not detail:
+            raise ValueError(f"Loan application {loan_id} not found")
+        
+        return self.scoring_workflow.stream_farmer_analysis(detail['loan']['farmer_internal_id'])
+    
     def update_loan_status(self, loan_id: int, new_status: str) -> bool:
         """Обновить статус заявки"""
         return self.db_manager.update_loan_status(loan_id, new_status)
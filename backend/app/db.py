@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .core.config import settings
 
@@ -15,3 +15,14 @@ def init_db():
     """Initialize database tables"""
     from .models import user, farm, score  # Import all models
     Base.metadata.create_all(bind=engine)
+    
+    # create_all only creates indexes together with new tables; add indexes
+    # declared later to tables that already exist
+    existing = set(inspect(engine).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in existing:
+            for index in table.indexes:
+                try:
+                    index.create(bind=engine, checkfirst=True)
+                except Exception as e:
+                    print(f"⚠ Could not create index {index.name}: {e}")
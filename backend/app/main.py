@@ -1,7 +1,10 @@
-from fastapi import FastAPI, Request
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import Depends, FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 import os
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
@@ -29,8 +32,7 @@ def seed_database():
     except Exception as e:
         print(f"⚠ Database check warning: {e}")
 
-# Initialize database tables
-init_db()  # <--- RE-ENABLED: Necessary for 'users' table creation (auth). Conflicting farms table is now aligned in models.
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 
 app = FastAPI(
@@ -42,50 +44,50 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     """Initialize and seed database on startup"""
+    from .core.startup import StartupTimer, mark_started, run_external_checks
+    timer = StartupTimer(started=_IMPORT_STARTED)
+    timer.add("imports", _IMPORT_SECONDS)
     print("🚀 Starting AgroCredit AI...")
     print("📊 Initializing database...")
     
-    # Run migrations (fixes missing columns in existing tables)
-    try:
+    # Initialize database tables (users table for auth etc.)
+    with timer.phase("init_db"):
+        init_db()
+    
+    # Scoring DB: pending schema migrations are applied once (see database/migrations.py)
+    with timer.phase("scoring_db"):
         from .database_adapter import get_db_adapter
-        adapter = get_db_adapter()
-        print("🔄 Running schema migrations...")
-        adapter._migrate_add_farmer_id_column()
-    except Exception as e:
-        print(f"❌ Migration failed: {e}")
+        get_db_adapter()
 
     seed_database()
     
-    # Check OpenAI API Key
-    print("\n🔑 Checking OpenAI API configuration...")
-    api_key = os.getenv('OPENAI_API_KEY')
+    # Pooled keep-alive client for ML service calls
+    with timer.phase("http_client"):
+        from .core.http import start_http_client
+        await start_http_client()
     
-    if not api_key:
-        print("   ⚠️  WARNING: OPENAI_API_KEY not set!")
-        print("   ⚠️  GPT scoring will NOT work")
-        print("   ⚠️  Set OPENAI_API_KEY in environment variables")
-    else:
-        # Mask key for security
-        masked_key = api_key[:8] + "..." + api_key[-4:] if len(api_key) > 12 else "***"
-        print(f"   ✓ OPENAI_API_KEY found: {masked_key}")
-        
-        # Test API connection
-        try:
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-            
-            # Simple test call
-            print("   Testing OpenAI API connection...")
-            response = client.models.list()
-            print(f"   ✓ OpenAI API is accessible!")
-            print(f"   ✓ Available models: {len(response.data)} found")
-            
-        except Exception as e:
-            print(f"   ❌ OpenAI API test failed: {str(e)}")
-            print(f"   ⚠️  GPT scoring may not work properly")
+    # Remote or embedded ML scoring (embedded loads the model now)
+    with timer.phase("ml_scorer"):
+        from .core.ml_scoring import start_scorer
+        print(f"🧮 ML scoring mode: {start_scorer().mode}")
+    
+    # External checks (OpenAI API): inline, or in the background with FAST_START
+    if not settings.FAST_START:
+        with timer.phase("openai_check"):
+            run_external_checks()
     
+    mark_started(timer, background_checks=settings.FAST_START)
     print("\n✓ Application ready!")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled ML service connections and the embedded scoring pool"""
+    from .core.http import close_http_client
+    from .core.ml_scoring import close_scorer
+    await close_http_client()
+    close_scorer()
+
 # Configure CORS - Allow all (no credentials used)
 app.add_middleware(
     CORSMiddleware,
@@ -95,6 +97,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency / SQL / payload metrics (outermost, so it times everything)
+from .core import metrics, slow_queries
+from .core.security import AuthUser, require_role
+from .models.user import UserRole
+from .db import engine
+metrics.install(engine)
+slow_queries.install(engine)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(farmers_router)
@@ -112,6 +123,39 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/ready")
+def readiness_check():
+    """Readiness: 503 until startup and its external checks have finished"""
+    from .core.startup import is_ready, readiness
+    return JSONResponse(status_code=200 if is_ready() else 503, content=readiness())
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Request metrics in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/metrics/slow-queries")
+def slow_queries_report(
+    limit: int = Query(20, ge=1, le=500),
+    sort: str = Query("total_ms", pattern="^(total_ms|max_ms|avg_ms|count)$"),
+    _: AuthUser = Depends(require_role(UserRole.bank_officer))
+):
+    """Slowest queries by fingerprint, with their EXPLAIN QUERY PLAN (exposes SQL: bank officers only)"""
+    log = slow_queries.slow_query_log
+    return {
+        "threshold_ms": log.threshold_ms,
+        "queries": log.top(limit=limit, sort=sort)
+    }
+
+
+@app.delete("/api/metrics/slow-queries", status_code=204)
+def reset_slow_queries(_: AuthUser = Depends(require_role(UserRole.bank_officer))):
+    """Start a fresh slow-query report (e.g. after adding an index)"""
+    slow_queries.slow_query_log.clear()
+
+
 @app.get("/api/db-check")
 def database_check():
     """
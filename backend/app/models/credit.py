@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..db import Base
@@ -16,7 +16,7 @@ class Credit(Base):
     __tablename__ = "credits"
     
     id = Column(Integer, primary_key=True, index=True)
-    farmer_id = Column(Integer, ForeignKey("farmers.id"), nullable=False)
+    farmer_id = Column(Integer, ForeignKey("farmers.id"), nullable=False, index=True)
     amount = Column(Float, nullable=False)  # total amount
     remaining = Column(Float, nullable=False)  # remaining amount
     rate = Column(Float, nullable=False)  # interest rate %
@@ -33,3 +33,8 @@ class Credit(Base):
     # Relationships
     farmer = relationship("Farmer", back_populates="credits")
     payments = relationship("Payment", back_populates="credit")
+    
+    __table_args__ = (
+        # Status counts and progress risk buckets on the bank dashboard
+        Index("ix_credits_status_progress", "status", "progress"),
+    )
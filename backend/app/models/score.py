@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, String, DateTime, JSON
+from sqlalchemy import Column, Integer, ForeignKey, Float, String, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..db import Base
@@ -16,3 +16,8 @@ class Score(Base):
     
     # Relationships
     farm = relationship("Farm", back_populates="scores")
+    
+    __table_args__ = (
+        # Latest score per farm (bank portfolio, farm detail, stale fallback)
+        Index("ix_scores_farm_id_created_at", "farm_id", "created_at"),
+    )
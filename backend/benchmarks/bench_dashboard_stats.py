@@ -0,0 +1,123 @@
+"""
+Consistency check and benchmark: bank dashboard statistics.
+
+Seeds a throwaway SQLite database with credits across every status, progress
+bucket (including NULL progress) and creation month, then compares the
+previous implementation (ten separate COUNT/SUM queries) with the current
+single-scan conditional aggregate
+(app/api/routes_bank_extended._compute_dashboard_stats). Exits non-zero if
+any figure differs; also checks an empty table.
+
+Usage (from backend/):
+    python benchmarks/bench_dashboard_stats.py
+    python benchmarks/bench_dashboard_stats.py --credits 500000 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+# Throwaway database; must be set before the app modules create the engine
+WORKDIR = tempfile.mkdtemp(prefix="bench-dashboard-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+
+from sqlalchemy import func, insert  # noqa: E402
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models import Credit, CreditStatus  # noqa: E402
+from app.api.routes_bank_extended import _compute_dashboard_stats  # noqa: E402
+
+
+def legacy_dashboard_stats(db) -> dict:
+    """The previous implementation: one query per figure"""
+    this_month_start = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return {
+        "total_credits": db.query(func.count(Credit.id)).scalar(),
+        "total_amount_disbursed": db.query(func.sum(Credit.amount)).scalar() or 0,
+        "total_outstanding": db.query(func.sum(Credit.remaining)).scalar() or 0,
+        "total_paid": db.query(func.sum(Credit.paid)).scalar() or 0,
+        "active_credits": db.query(func.count(Credit.id)).filter(Credit.status == CreditStatus.active).scalar(),
+        "overdue_credits": db.query(func.count(Credit.id)).filter(Credit.status == CreditStatus.overdue).scalar(),
+        "risk_distribution": {
+            "low": db.query(func.count(Credit.id)).filter(Credit.progress >= 70).scalar() or 0,
+            "medium": db.query(func.count(Credit.id)).filter(Credit.progress >= 30, Credit.progress < 70).scalar() or 0,
+            "high": db.query(func.count(Credit.id)).filter(Credit.progress < 30).scalar() or 0
+        },
+        "monthly_disbursement": db.query(func.sum(Credit.amount)).filter(Credit.created_at >= this_month_start).scalar() or 0
+    }
+
+
+def seed(n: int):
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(n):
+        amount = rng.randint(10, 500) * 1000.0
+        paid = round(amount * rng.random(), 2)
+        rows.append({
+            "farmer_id": 1 + i % 1000, "amount": amount, "remaining": amount - paid, "paid": paid,
+            # Bucket edges and missing progress included
+            "progress": rng.choice([None, 0.0, 29.99, 30.0, 69.99, 70.0, 100.0, round(rng.random() * 100, 2)]),
+            "rate": 18.0, "term_months": 12, "due_date": now + timedelta(days=365),
+            "status": rng.choice(list(CreditStatus)),
+            "created_at": now - timedelta(days=rng.randint(0, 120))
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(Credit), rows)
+
+
+def compare(db) -> bool:
+    legacy = legacy_dashboard_stats(db)
+    current = _compute_dashboard_stats(db).model_dump()
+    ok = True
+    for key, expected in legacy.items():
+        actual = current[key]
+        same = actual == expected if isinstance(expected, dict) else abs(actual - expected) < 1e-6
+        if not same:
+            print(f"  MISMATCH {key}: legacy={expected!r} current={actual!r}")
+            ok = False
+    return ok
+
+
+def median_ms(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--credits", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        ok = compare(db)
+        print(f"Empty table: {'match' if ok else 'MISMATCH'}")
+
+        seed(args.credits)
+        ok = compare(db) and ok
+        print(f"{args.credits:,} credits: {'match' if ok else 'MISMATCH'}")
+
+        legacy_ms = median_ms(lambda: legacy_dashboard_stats(db), args.repeat)
+        current_ms = median_ms(lambda: _compute_dashboard_stats(db), args.repeat)
+        print(f"Ten queries     {legacy_ms:>8.1f} ms")
+        print(f"Single scan     {current_ms:>8.1f} ms  ({legacy_ms / current_ms:.1f}x faster)")
+    finally:
+        db.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Query benchmark: /bank/farmers/credits, per-farmer queries vs one GROUP BY.
+
+Seeds a throwaway SQLite database with N farmers and a few credits each,
+then times the previous implementation (load all farmers, then one credits
+query per farmer, aggregated in Python) against the current route
+(app/api/routes_bank_extended.get_farmers_credits: one grouped aggregate,
+sorted by outstanding amount and paged), and checks that both produce the
+same page.
+
+Usage (from backend/):
+    python benchmarks/bench_farmer_credits.py
+    python benchmarks/bench_farmer_credits.py --farmers 50000 --credits 3
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+# Throwaway database; must be set before the app modules create the engine
+WORKDIR = tempfile.mkdtemp(prefix="bench-credits-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.models import Credit, CreditStatus, Farmer, User, UserRole  # noqa: E402
+from app.api.routes_bank_extended import get_farmers_credits  # noqa: E402
+
+
+def seed(farmers: int, credits_per_farmer: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "email": f"farmer{i}@example.com", "hashed_password": "x", "role": UserRole.farmer}
+            for i in range(1, farmers + 1)
+        ])
+        conn.execute(insert(Farmer), [
+            {"id": i, "user_id": i, "full_name": f"Farmer {i}", "location": rng.choice(["Ташкент", "Самарканд", None])}
+            for i in range(1, farmers + 1)
+        ])
+        rows = []
+        for farmer_id in range(1, farmers + 1):
+            # Some farmers have no credits at all
+            for _ in range(rng.randint(0, 2 * credits_per_farmer)):
+                amount = rng.randint(10, 500) * 1000.0
+                paid = round(amount * rng.random(), 2)
+                rows.append({
+                    "farmer_id": farmer_id, "amount": amount, "remaining": amount - paid, "paid": paid,
+                    "progress": round(paid / amount * 100, 2), "rate": 18.0, "term_months": 12,
+                    "due_date": now + timedelta(days=365), "status": CreditStatus.active, "created_at": now
+                })
+        conn.execute(insert(Credit), rows)
+    return len(rows)
+
+
+def legacy_farmers_credits(db):
+    """The previous implementation, sorted the way the new route pages"""
+    result = []
+    for farmer in db.query(Farmer).all():
+        credits = db.query(Credit).filter(Credit.farmer_id == farmer.id).all()
+        if not credits:
+            continue
+        avg_progress = sum(c.progress for c in credits) / len(credits)
+        result.append({
+            "farmer_id": farmer.id,
+            "total_credits": len(credits),
+            "total_amount": sum(c.amount for c in credits),
+            "total_outstanding": sum(c.remaining for c in credits),
+            "average_progress": avg_progress
+        })
+    result.sort(key=lambda r: (-r["total_outstanding"], r["farmer_id"]))
+    return result
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--farmers", type=int, default=50000)
+    parser.add_argument("--credits", type=int, default=3, help="Average credits per farmer")
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--skip-legacy", action="store_true", help="Don't run the per-farmer version")
+    args = parser.parse_args()
+
+    settings.FAST_JSON_RESPONSES = False
+    Base.metadata.create_all(bind=engine)
+    credits = seed(args.farmers, args.credits)
+    print(f"Farmers: {args.farmers:,}  credits: {credits:,}  page size: {args.page}")
+
+    db = SessionLocal()
+    try:
+        page = lambda offset: get_farmers_credits(limit=args.page, offset=offset, order="desc", db=db, current_user=None)
+        page(0)  # warm-up
+        first, first_s = timed(lambda: page(0))
+        _, deep_s = timed(lambda: page(args.farmers // 2))
+        print(f"GROUP BY, first page         {first_s * 1000:>9.1f} ms")
+        print(f"GROUP BY, page at offset {args.farmers // 2:<6}{deep_s * 1000:>8.1f} ms")
+
+        if not args.skip_legacy:
+            legacy, legacy_s = timed(lambda: legacy_farmers_credits(db))
+            print(f"Per-farmer queries (all rows) {legacy_s * 1000:>8.1f} ms  ({legacy_s / first_s:,.0f}x slower)")
+            same = all(
+                a["farmer_id"] == b["farmer_id"] and a["total_credits"] == b["total_credits"]
+                and abs(a["total_outstanding"] - b["total_outstanding"]) < 0.01
+                and abs(a["average_progress"] - b["average_progress"]) < 0.01
+                for a, b in zip(first, legacy[:args.page])
+            )
+            print(f"Same first page: {same}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
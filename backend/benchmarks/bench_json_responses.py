@@ -0,0 +1,138 @@
+"""
+Serialization benchmark: regular response_model path vs the orjson fast path.
+
+Serves N synthetic rows shaped like the real list endpoints (ApplicationSummary
+from /api/bank/applications, FarmOut from /farmer/farms) from an in-process
+FastAPI app, once through the regular path (per-row validation + stdlib json)
+and once through app/core/responses.json_rows with FAST_JSON_RESPONSES on.
+Reports time per response, peak Python memory (tracemalloc), response size,
+checks that both paths return the same JSON and that the OpenAPI schema of
+the routes is identical.
+
+Usage (from backend/):
+    python benchmarks/bench_json_responses.py
+    python benchmarks/bench_json_responses.py --rows 10000 --repeat 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import List
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.config import settings  # noqa: E402
+from app.core.responses import json_rows, orjson_available  # noqa: E402
+from app.api.routes_bank_loan import ApplicationSummary  # noqa: E402
+from app.api.routes_farmers import FarmOut  # noqa: E402
+
+
+def application_rows(n: int) -> List[dict]:
+    return [
+        {
+            "id": i,
+            "farmer_id": f"F{i:06d}",
+            "farmer_name": f"F{i:06d}",
+            "loan_amount": 50000.0 + i,
+            "loan_term_months": 12 + i % 48,
+            "purpose": "Покупка семян и удобрений",
+            "date_submitted": "2026-03-01 10:00:00",
+            "status": ("pending", "approved", "rejected")[i % 3],
+            "ai_score": 40 + i % 60 if i % 5 else None,
+            "risk_category": ("low", "medium", "high")[i % 3] if i % 5 else None,
+            "interest_rate": 18.5 if i % 5 else None,
+            "monthly_payment": 4583.33 if i % 5 else None
+        }
+        for i in range(n)
+    ]
+
+
+def farm_rows(n: int) -> List[dict]:
+    rows = []
+    for i in range(n):
+        lon, lat = 69.0 + (i % 100) * 0.01, 41.0 + (i // 100 % 100) * 0.01
+        rows.append({
+            "id": i,
+            "name": f"Field {i}",
+            "crop_type": ("wheat", "cotton", "rice")[i % 3],
+            "acreage": 5.0 + i % 97,
+            "geometry": {"type": "Polygon", "coordinates": [[[lon, lat], [lon + 0.01, lat], [lon + 0.01, lat + 0.01], [lon, lat]]]},
+            "score": {"numeric_score": 61.5, "risk_category": "medium", "factors": {"ndvi": 0.42, "soil": 0.7}} if i % 4 else None
+        })
+    return rows
+
+
+def make_endpoint(rows: List[dict]):
+    def endpoint():
+        return json_rows(rows)
+    return endpoint
+
+
+def build_app(datasets) -> FastAPI:
+    app = FastAPI()
+    for name, model, rows in datasets:
+        app.add_api_route(f"/{name}", make_endpoint(rows), methods=["GET"], response_model=List[model])
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, repeat: int):
+    """Median time per response, then peak traced memory in a separate pass (tracemalloc slows allocation)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(path)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    tracemalloc.start()
+    response = await client.get(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return np.median(timings) * 1000, peak / 2**20, response.content
+
+
+async def run(args):
+    datasets = [
+        ("applications", ApplicationSummary, application_rows(args.rows)),
+        ("farms", FarmOut, farm_rows(args.rows))
+    ]
+    app = build_app(datasets)
+    schema = json.dumps(app.openapi(), sort_keys=True)
+
+    print(f"Rows per response: {args.rows:,}; orjson installed: {orjson_available()}")
+    print(f"{'endpoint':<14}{'path':<10}{'ms':>9}{'peak MB':>10}{'KB':>9}{'speedup':>9}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, _, _ in datasets:
+            results = {}
+            for mode, enabled in (("regular", False), ("fast", True)):
+                settings.FAST_JSON_RESPONSES = enabled
+                await client.get(f"/{name}")  # warm-up
+                results[mode] = await measure(client, f"/{name}", args.repeat)
+            base_ms = results["regular"][0]
+            for mode, (ms, peak, body) in results.items():
+                print(f"{name:<14}{mode:<10}{ms:>9.1f}{peak:>10.1f}{len(body) / 1024:>9.0f}{base_ms / ms:>8.1f}x")
+            same = json.loads(results["regular"][2]) == json.loads(results["fast"][2])
+            print(f"{'':<14}same JSON: {same}")
+
+    settings.FAST_JSON_RESPONSES = False
+    app.openapi_schema = None
+    print(f"OpenAPI unchanged by the flag: {json.dumps(app.openapi(), sort_keys=True) == schema}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Latency benchmark: per-request httpx.AsyncClient vs the shared pooled client.
+
+Sends score requests to a local ML service stand-in at a fixed concurrency,
+once opening a new client per request (the old route code) and once through
+the application-scoped client from app/core/http.py, and reports p50 / p99
+latency, throughput and how many TCP connections the server accepted.
+
+Usage (from backend/):
+    python benchmarks/bench_ml_client.py
+    python benchmarks/bench_ml_client.py --requests 5000 --concurrency 50 --latency 0.002
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.http import create_http_client  # noqa: E402
+from ml_stub_server import StubConfig, start_stub_server  # noqa: E402
+
+
+PAYLOAD = {
+    "crop_type": "wheat",
+    "acreage": 12.5,
+    "geometry": {"type": "Polygon", "coordinates": [[[69.01, 41.49], [69.02, 41.49], [69.02, 41.48], [69.01, 41.49]]]}
+}
+
+
+async def per_request_client(url: str, _client):
+    async with httpx.AsyncClient() as client:
+        response = await client.post(url, json=PAYLOAD, timeout=20.0)
+        response.raise_for_status()
+        return response.json()
+
+
+async def shared_client(url: str, client: httpx.AsyncClient):
+    response = await client.post(url, json=PAYLOAD)
+    response.raise_for_status()
+    return response.json()
+
+
+async def run(call, url: str, total: int, concurrency: int):
+    client = create_http_client()
+    timings = np.empty(total)
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await call(url, client)
+            timings[i] = time.perf_counter() - start
+
+    # Warm-up outside the measurement
+    await call(url, client)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return timings, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.002, help="Stand-in service time, s")
+    args = parser.parse_args()
+
+    print(f"{'client':<14}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}{'connections':>13}")
+    for name, call in (("per-request", per_request_client), ("shared", shared_client)):
+        server, url = start_stub_server(config=StubConfig(latency=args.latency))
+        timings, elapsed = asyncio.run(run(call, url, args.requests, args.concurrency))
+        server.shutdown()
+        server.server_close()
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+        print(f"{name:<14}{p50:>10.2f}{p99:>10.2f}{args.requests / elapsed:>10,.0f}{server.config.connections:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Latency benchmark: remote (HTTP) vs embedded (in-process) ML scoring.
+
+Starts the real ML service with uvicorn in a subprocess, then scores the same
+fields through both scorers from app/core/ml_scoring.py at each concurrency
+level and reports p50 / p99 latency and throughput. Unique payloads are used
+so request coalescing does not hide the per-call cost.
+
+Usage (from backend/):
+    python benchmarks/bench_scoring_modes.py
+    python benchmarks/bench_scoring_modes.py --requests 2000 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.core.config import settings  # noqa: E402
+from app.core.http import close_http_client  # noqa: E402
+from app.core.ml_scoring import create_scorer  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_ml_service(env) -> (subprocess.Popen, str):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=settings.ML_SERVICE_DIR, env=env
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(url + "/", timeout=0.5)
+            return process, url + "/score"
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("ML service did not start")
+
+
+def payload(i: int) -> dict:
+    lon, lat = 69.0 + (i % 50) * 0.001, 41.45 + (i // 50 % 50) * 0.001
+    return {
+        "crop_type": ("wheat", "cotton", "rice")[i % 3],
+        "acreage": 5 + (i % 97) * 0.5,
+        "geometry": {"type": "Polygon", "coordinates": [[[lon, lat], [lon + 0.001, lat], [lon + 0.001, lat - 0.001], [lon, lat]]]}
+    }
+
+
+async def run(scorer, total: int, concurrency: int):
+    timings = np.empty(total)
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await scorer.score(payload(i))
+            timings[i] = time.perf_counter() - start
+
+    await scorer.score(payload(0))  # warm-up
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await close_http_client()
+    return timings, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    args = parser.parse_args()
+
+    # Both modes share one throwaway feature store so neither reads a warm cache
+    workdir = tempfile.mkdtemp(prefix="bench-scoring-")
+    os.environ["FEATURE_STORE_PATH"] = ""
+    os.environ["WEATHER_STORE_PATH"] = os.path.join(workdir, "weather.db")
+    env = dict(os.environ)
+
+    process, url = start_ml_service(env)
+    settings.ML_SERVICE_URL = url
+    try:
+        scorers = {"remote": create_scorer("remote"), "embedded": create_scorer("embedded")}
+        print(f"{'mode':<10}{'conc':>6}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+        for concurrency in args.concurrency:
+            for name, scorer in scorers.items():
+                timings, elapsed = asyncio.run(run(scorer, args.requests, concurrency))
+                p50, p99 = np.percentile(timings, [50, 99]) * 1000
+                print(f"{name:<10}{concurrency:>6}{p50:>10.2f}{p99:>10.2f}{args.requests / elapsed:>10,.0f}")
+        for scorer in scorers.values():
+            scorer.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Local stand-in for the ML scoring service.
+
+Serves POST /score, /score/batch and /weather/ingest with fixed-shape JSON
+after a configurable latency, and counts the connections it accepts so
+connection reuse can be checked offline.
+
+Run:
+    python benchmarks/ml_stub_server.py --port 8011 --latency 0.005
+
+Use:
+    ML_SERVICE_URL=http://127.0.0.1:8011/score
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+
+class StubConfig:
+    """Behaviour of the stand-in server"""
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate  # Share of requests answered with 503
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+
+def score_result(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic score from the acreage, shaped like the ML service response"""
+    acreage = float(payload.get("acreage") or 0)
+    score = round(40 + (acreage * 7.3) % 55, 2)
+    return {
+        "numeric_score": score,
+        "risk_category": "Low" if score >= 70 else ("Medium" if score >= 40 else "High"),
+        "factors": {"farm_size": {"value": acreage, "contribution": round(score - 50, 2)}},
+        "model_version": "stub"
+    }
+
+
+def make_handler(config: StubConfig):
+    """Request handler bound to a configuration"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            config.record_connection()
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"detail": "Invalid JSON"})
+                return
+
+            total = config.record_request()
+            time.sleep(config.latency)
+            if config.fail_rate and (total * 0.6180339887) % 1 < config.fail_rate:
+                self._send_json(503, {"detail": "Stub failure"})
+                return
+
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path == "/score":
+                self._send_json(200, score_result(payload))
+            elif path == "/score/batch":
+                self._send_json(200, {"results": [score_result(f) for f in payload.get("fields", [])]})
+            elif path == "/weather/ingest":
+                self._send_json(200, {"ingested": len(payload.get("observations", []))})
+            else:
+                self._send_json(404, {"detail": "Not Found"})
+
+    return StubHandler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0,
+                      config: Optional[StubConfig] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stand-in server on a background thread.
+
+    Returns:
+        Tuple of (server, URL for ML_SERVICE_URL). Stop with server.shutdown()
+    """
+    config = config or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/score"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ML scoring service stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay, s")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args()
+
+    stub_config = StubConfig(latency=args.latency, fail_rate=args.fail_rate)
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(stub_config))
+    httpd.daemon_threads = True
+    print(f"ML stub server listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -10,6 +10,14 @@ from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 from contextlib import contextmanager
 
+try:
+    from .geometry import compute_metrics, compute_metrics_batch, parse_ring
+    from . import instrumentation, migrations
+except ImportError:  # Запуск скриптов из каталога database (python example_usage.py)
+    from geometry import compute_metrics, compute_metrics_batch, parse_ring
+    import instrumentation
+    import migrations
+
 
 class DatabaseManager:
     """Менеджер базы данных SQLite для AgroCredit AI"""
@@ -27,7 +35,7 @@ class DatabaseManager:
     @contextmanager
     def get_connection(self):
         """Контекстный менеджер для работы с подключением к БД"""
-        conn = sqlite3.connect(self.db_path)
+        conn = instrumentation.connect(self.db_path)  # замер запросов для метрик
         conn.row_factory = sqlite3.Row  # Позволяет получать результаты как словари
         conn.execute("PRAGMA foreign_keys = ON")  # Включение внешних ключей
         try:
@@ -39,18 +47,23 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def initialize_database(self):
-        """Создание всех таблиц из schema.sql"""
-        if not os.path.exists(self.schema_path):
-            raise FileNotFoundError(f"Schema file not found: {self.schema_path}")
+    def initialize_database(self, force: bool = False) -> bool:
+        """
+        Создание всех таблиц из schema.sql и применение миграций
         
-        with open(self.schema_path, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
+        Каждая миграция выполняется один раз (таблица schema_version), schema.sql
+        применяется повторно, только если изменился (см. migrations.py)
         
-        with self.get_connection() as conn:
-            conn.executescript(schema_sql)
+        Args:
+            force: применить schema.sql в любом случае
+        
+        Returns:
+            True, если схема изменилась
+        """
+        if not os.path.exists(self.schema_path):
+            raise FileNotFoundError(f"Schema file not found: {self.schema_path}")
         
-        print(f"✓ Database initialized successfully: {self.db_path}")
+        return bool(migrations.migrate(self, force_schema=force))
     
     def clear_database(self):
         """Удаление всех данных из всех таблиц"""
@@ -285,36 +298,101 @@ class DatabaseManager:
     # GEOMETRY - Операции с геометрией участков
     # ========================================================================
     
-    def add_geometry(self, farm_id: int, vertices: int, polygon_quality: str,
+    def add_geometry(self, farm_id: int, vertices: int = None, polygon_quality: str = None,
                     coordinates: List[Tuple[float, float]] = None) -> int:
-        """Добавление геометрии участка"""
+        """
+        Добавление геометрии участка
+
+        Если переданы координаты, число вершин, площадь, периметр, компактность
+        и валидность контура вычисляются из них и сохраняются в таблице.
+        """
         coords_json = json.dumps(coordinates) if coordinates else None
+        metrics = compute_metrics(coordinates) if coordinates else None
+        if metrics:
+            vertices = metrics['vertices']
+        else:
+            metrics = {}
         
         with self.get_connection() as conn:
             cursor = conn.execute(
                 """
-                INSERT INTO geometry (farm_id, vertices, polygon_quality, coordinates)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO geometry (farm_id, vertices, polygon_quality, coordinates,
+                                      area_ha, perimeter_m, compactness, is_valid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (farm_id, vertices, polygon_quality, coords_json)
+                (farm_id, vertices, polygon_quality, coords_json,
+                 metrics.get('area_ha'), metrics.get('perimeter_m'),
+                 metrics.get('compactness'), metrics.get('is_valid'))
             )
             return cursor.lastrowid
     
-    def get_geometry_by_farm(self, farm_id: int) -> Optional[Dict[str, Any]]:
-        """Получение геометрии участка"""
-        with self.get_connection() as conn:
-            cursor = conn.execute(
-                "SELECT * FROM geometry WHERE farm_id = ?",
-                (farm_id,)
-            )
+    def get_geometry_by_farm(self, farm_id: int, parse_coordinates: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Получение геометрии участка
+
+        Args:
+            farm_id: ID фермы
+            parse_coordinates: декодировать JSON координат. При False координаты
+                не читаются, вместо них возвращается флаг has_coordinates
+        """
+        if parse_coordinates:
+            query = "SELECT * FROM geometry WHERE farm_id = ?"
+        else:
+            query = """
+                SELECT id, farm_id, vertices, polygon_quality, area_ha, perimeter_m,
+                       compactness, is_valid, coordinates IS NOT NULL AS has_coordinates,
+                       created_at, updated_at
+                FROM geometry WHERE farm_id = ?
+            """
+        with self.get_connection() as conn:
+            cursor = conn.execute(query, (farm_id,))
             row = cursor.fetchone()
             if row:
                 geometry = dict(row)
-                if geometry['coordinates']:
+                if parse_coordinates and geometry['coordinates']:
                     geometry['coordinates'] = json.loads(geometry['coordinates'])
                 return geometry
             return None
     
+    def recompute_geometry_metrics(self, only_missing: bool = True,
+                                   conn: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Пакетный пересчет метрик геометрии для всех участков с координатами
+
+        Args:
+            only_missing: пересчитывать только строки без сохраненных метрик
+            conn: открытое соединение (например, транзакция миграции); по умолчанию новое
+
+        Returns:
+            Количество обновленных строк
+        """
+        if conn is None:
+            with self.get_connection() as conn:
+                return self.recompute_geometry_metrics(only_missing, conn)
+        
+        query = "SELECT id, coordinates FROM geometry WHERE coordinates IS NOT NULL"
+        if only_missing:
+            query += " AND area_ha IS NULL"
+        
+        rows = conn.execute(query).fetchall()
+        if not rows:
+            return 0
+        
+        metrics = compute_metrics_batch([parse_ring(row['coordinates']) for row in rows])
+        updates = [
+            (m['vertices'], m['area_ha'], m['perimeter_m'], m['compactness'], m['is_valid'], row['id'])
+            for row, m in zip(rows, metrics) if m
+        ]
+        conn.executemany(
+            """
+            UPDATE geometry
+            SET vertices = ?, area_ha = ?, perimeter_m = ?, compactness = ?, is_valid = ?
+            WHERE id = ?
+            """,
+            updates
+        )
+        return len(updates)
+    
     # ========================================================================
     # MARKET_ACCESS - Операции с доступом к рынкам
     # ========================================================================
@@ -434,6 +512,7 @@ class DatabaseManager:
                 (farm_id, loan_purpose, requested_loan_amount, loan_term_months,
                  expected_cash_flow_after_loan, repayment_capacity_score)
             )
+            self._bump_data_version(conn, "loans")
             return cursor.lastrowid
     
     def get_loan_requests_by_farm(self, farm_id: int) -> List[Dict[str, Any]]:
@@ -452,16 +531,22 @@ class DatabaseManager:
                 "UPDATE loan_requests SET status = ? WHERE id = ?",
                 (status, loan_id)
             )
+            if cursor.rowcount > 0:
+                self._bump_data_version(conn, "loans")
             return cursor.rowcount > 0
     
     # ========================================================================
     # КОМПЛЕКСНЫЕ ЗАПРОСЫ
     # ========================================================================
     
-    def get_farmer_complete_profile(self, farmer_id: int) -> Dict[str, Any]:
+    def get_farmer_complete_profile(self, farmer_id: int, parse_coordinates: bool = True) -> Dict[str, Any]:
         """
         Получение полного профиля фермера со всеми связанными данными
         
+        Args:
+            farmer_id: ID фермера
+            parse_coordinates: декодировать координаты геометрии (скорингу они не нужны)
+        
         Returns:
             Словарь с полной информацией о фермере, его фермах и всех связанных данных
         """
@@ -477,7 +562,7 @@ class DatabaseManager:
             farm['crops'] = self.get_crops_by_farm(farm_id)
             farm['machinery'] = self.get_machinery_by_farm(farm_id)
             farm['objects'] = self.get_objects_by_farm(farm_id)
-            farm['geometry'] = self.get_geometry_by_farm(farm_id)
+            farm['geometry'] = self.get_geometry_by_farm(farm_id, parse_coordinates)
             farm['market_access'] = self.get_market_access_by_farm(farm_id)
             farm['technology_usage'] = self.get_technology_usage_by_farm(farm_id)
             farm['insurance'] = self.get_insurance_by_farm(farm_id)
@@ -538,6 +623,37 @@ class DatabaseManager:
             
             return stats
     
+    # ========================================================================
+    # DATA_VERSIONS - Версии данных для инвалидации кэшей
+    # ========================================================================
+    
+    @staticmethod
+    def _bump_data_version(conn: sqlite3.Connection, scope: str):
+        """Увеличение версии области данных внутри текущей транзакции"""
+        conn.execute(
+            """
+            INSERT INTO data_versions (scope, version) VALUES (?, 1)
+            ON CONFLICT(scope) DO UPDATE SET version = version + 1
+            """,
+            (scope,)
+        )
+    
+    def bump_data_version(self, scope: str):
+        """Увеличение версии после изменений, сделанных в обход DatabaseManager (SQLAlchemy)"""
+        with self.get_connection() as conn:
+            self._bump_data_version(conn, scope)
+    
+    def get_data_versions(self, scopes: Tuple[str, ...]) -> Dict[str, int]:
+        """Текущие версии областей данных (0 - изменений еще не было)"""
+        with self.get_connection() as conn:
+            placeholders = ", ".join("?" for _ in scopes)
+            cursor = conn.execute(
+                f"SELECT scope, version FROM data_versions WHERE scope IN ({placeholders})",
+                tuple(scopes)
+            )
+            versions = {row['scope']: row['version'] for row in cursor.fetchall()}
+        return {scope: versions.get(scope, 0) for scope in scopes}
+    
     # ========================================================================
     # SCORING - Операции со скорингом
     # ========================================================================
@@ -585,9 +701,23 @@ class DatabaseManager:
                 """,
                 (scoring_id, farmer_id, total_score, interest_rate, "Новый расчет скоринга")
             )
+            self._bump_data_version(conn, "scoring")
             
             return scoring_id
     
+    def update_scoring_gpt_analysis(self, scoring_id: int, gpt_analysis: str,
+                                    gpt_recommendations: str = None) -> bool:
+        """Сохранение GPT анализа для существующего результата скоринга"""
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE scoring_results SET gpt_analysis = ?, gpt_recommendations = ?
+                WHERE id = ?
+                """,
+                (gpt_analysis, gpt_recommendations, scoring_id)
+            )
+            return cursor.rowcount > 0
+    
     def get_scoring_result(self, scoring_id: int) -> Optional[Dict[str, Any]]:
         """Получение результата скоринга по ID"""
         with self.get_connection() as conn:
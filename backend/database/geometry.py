@@ -0,0 +1,131 @@
+"""
+AgroCredit AI - Geometry Metrics
+Расчет метрик полигонов участков по координатам с помощью NumPy
+
+Координаты - пары [долгота, широта] (WGS84), как в GeoJSON. Метрики
+считаются на сфере: площадь по формуле сферического избытка для кольца,
+периметр по формуле гаверсинусов. Пакетный расчет обрабатывает все полигоны
+одним проходом по объединенному массиву ребер.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+EARTH_RADIUS_M = 6371008.8  # Средний радиус Земли (WGS84)
+
+METRIC_COLUMNS = ("vertices", "area_ha", "perimeter_m", "compactness", "is_valid")
+
+
+def parse_ring(coordinates: Union[str, Dict[str, Any], Sequence, None]) -> Optional[np.ndarray]:
+    """
+    Внешнее кольцо полигона как массив (n, 2) без замыкающей вершины
+
+    Args:
+        coordinates: список пар [lon, lat], список колец, GeoJSON Polygon
+            или JSON-строка с любым из этих вариантов
+
+    Returns:
+        Массив вершин или None, если координаты отсутствуют
+    """
+    if coordinates is None or coordinates == "":
+        return None
+    if isinstance(coordinates, str):
+        coordinates = json.loads(coordinates)
+    if isinstance(coordinates, dict):
+        coordinates = (coordinates.get("coordinates") or [None])[0]
+    if not coordinates:
+        return None
+    # Список колец -> внешнее кольцо
+    if isinstance(coordinates[0][0], (list, tuple)):
+        coordinates = coordinates[0]
+
+    ring = np.asarray(coordinates, dtype=np.float64)[:, :2]
+    if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+        ring = ring[:-1]
+    return ring
+
+
+def _self_intersects(ring: np.ndarray) -> bool:
+    """Проверка пересечения несмежных ребер (векторно по всем парам ребер)"""
+    n = len(ring)
+    if n < 4:
+        return False
+
+    a = ring
+    b = np.roll(ring, -1, axis=0)
+    i, j = np.triu_indices(n, k=2)
+    # Первое и последнее ребро смежные
+    keep = ~((i == 0) & (j == n - 1))
+    i, j = i[keep], j[keep]
+
+    def orient(p, q, r):
+        return (q[:, 0] - p[:, 0]) * (r[:, 1] - p[:, 1]) - (q[:, 1] - p[:, 1]) * (r[:, 0] - p[:, 0])
+
+    o1 = orient(a[i], b[i], a[j])
+    o2 = orient(a[i], b[i], b[j])
+    o3 = orient(a[j], b[j], a[i])
+    o4 = orient(a[j], b[j], b[i])
+    return bool(np.any((o1 * o2 < 0) & (o3 * o4 < 0)))
+
+
+def compute_metrics_batch(rings: List[Optional[np.ndarray]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Метрики для списка полигонов
+
+    Площадь и периметр считаются по всем ребрам всех полигонов сразу
+    и суммируются по полигонам через np.add.reduceat.
+
+    Args:
+        rings: внешние кольца (результат parse_ring); None - нет координат
+
+    Returns:
+        Список словарей vertices, area_ha, perimeter_m, compactness, is_valid
+        (None для полигонов меньше чем из 3 вершин)
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rings)
+    usable = [k for k, ring in enumerate(rings) if ring is not None and len(ring) >= 3]
+    if not usable:
+        return results
+
+    sizes = np.array([len(rings[k]) for k in usable])
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    points = np.radians(np.concatenate([rings[k] for k in usable]))
+    lon, lat = points[:, 0], points[:, 1]
+
+    # Индекс следующей вершины внутри своего кольца
+    nxt = np.arange(len(points)) + 1
+    nxt[starts + sizes - 1] = starts
+
+    # Площадь: R^2 / 2 * |sum (lon2 - lon1) * (2 + sin(lat1) + sin(lat2))|
+    d_lon = lon[nxt] - lon
+    d_lon = (d_lon + np.pi) % (2 * np.pi) - np.pi  # Переход через антимеридиан
+    area_terms = d_lon * (2 + np.sin(lat) + np.sin(lat[nxt]))
+    area_m2 = np.abs(np.add.reduceat(area_terms, starts)) * EARTH_RADIUS_M ** 2 / 2
+
+    # Периметр: сумма гаверсинусных расстояний
+    h = (np.sin((lat[nxt] - lat) / 2) ** 2
+         + np.cos(lat) * np.cos(lat[nxt]) * np.sin(d_lon / 2) ** 2)
+    edge_m = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+    perimeter_m = np.add.reduceat(edge_m, starts)
+
+    # Polsby-Popper: 1 для круга, -> 0 для вытянутых и изрезанных контуров
+    with np.errstate(divide="ignore", invalid="ignore"):
+        compactness = np.where(perimeter_m > 0, 4 * np.pi * area_m2 / perimeter_m ** 2, 0.0)
+
+    for pos, k in enumerate(usable):
+        results[k] = {
+            "vertices": int(sizes[pos]),
+            "area_ha": round(float(area_m2[pos]) / 10000, 4),
+            "perimeter_m": round(float(perimeter_m[pos]), 2),
+            "compactness": round(float(compactness[pos]), 4),
+            "is_valid": bool(area_m2[pos] > 0 and not _self_intersects(rings[k]))
+        }
+    return results
+
+
+def compute_metrics(coordinates: Union[str, Dict[str, Any], Sequence, None]) -> Optional[Dict[str, Any]]:
+    """Метрики одного полигона (см. compute_metrics_batch)"""
+    return compute_metrics_batch([parse_ring(coordinates)])[0]
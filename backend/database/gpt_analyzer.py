@@ -5,27 +5,220 @@ AgroCredit AI - GPT Analyzer
 
 import os
 import json
-from typing import Dict, Any, Optional
-import openai
-from openai import OpenAI
+import time
+import threading
+from typing import Dict, Any, Optional, List, Iterator
+try:
+    from . import instrumentation
+except ImportError:  # Запуск скриптов из каталога database
+    import instrumentation
+
+
+SYSTEM_PROMPT = "Ты - эксперт по кредитному скорингу в сельском хозяйстве. Анализируй данные фермеров и предоставляй профессиональные рекомендации по выдаче кредитов."
+
+
+class IncrementalJSONFieldParser:
+    """
+    Инкрементальный разбор JSON-объекта верхнего уровня по мере поступления токенов
+    
+    Возвращает события по мере завершения значений:
+    - {"event": "item", "field": ..., "index": ..., "value": ...} - элемент массива
+    - {"event": "field", "field": ..., "value": ...} - поле верхнего уровня целиком
+    """
+    
+    WHITESPACE = " \t\r\n"
+    
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect_key = False
+        self.current_key = None
+        self.key_start = None
+        self.value_start = None
+        self.item_start = None
+        self.item_index = 0
+        self.value_is_array = False
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Добавить фрагмент ответа, вернуть завершившиеся поля и элементы"""
+        self.buffer += chunk
+        events = []
+        
+        while self.pos < len(self.buffer):
+            i = self.pos
+            ch = self.buffer[i]
+            self.pos += 1
+            
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    self._on_string_end(i, events)
+                continue
+            
+            if ch in self.WHITESPACE:
+                continue
+            
+            # Начало значения поля или элемента массива
+            if self.depth == 1 and not self.expect_key and self.value_start is None and ch not in ":,}":
+                self.value_start = i
+                self.value_is_array = ch == "["
+                self.item_index = 0
+            elif self.depth == 2 and self.value_is_array and self.item_start is None and ch not in ",]":
+                self.item_start = i
+            
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.key_start = i
+            elif ch in "{[":
+                self.depth += 1
+                if self.depth == 1:
+                    self.expect_key = True
+            elif ch in "}]":
+                if self.depth == 2 and self.value_is_array and self.item_start is not None:
+                    self._emit_item(i, events)
+                self.depth -= 1
+                if self.depth == 1 and self.value_start is not None:
+                    self._emit_field(i + 1, events)
+                elif self.depth == 0 and self.value_start is not None:
+                    self._emit_field(i, events)
+            elif ch == ",":
+                if self.depth == 1:
+                    if self.value_start is not None:
+                        self._emit_field(i, events)
+                    self.expect_key = True
+                elif self.depth == 2 and self.value_is_array and self.item_start is not None:
+                    self._emit_item(i, events)
+        
+        return events
+    
+    def _on_string_end(self, i: int, events: List[Dict[str, Any]]):
+        if self.depth == 1 and self.expect_key:
+            self.current_key = json.loads(self.buffer[self.key_start:i + 1])
+            self.expect_key = False
+        elif self.depth == 1 and self.value_start is not None:
+            self._emit_field(i + 1, events)
+        elif self.depth == 2 and self.value_is_array and self.item_start is not None:
+            self._emit_item(i + 1, events)
+    
+    def _emit_item(self, end: int, events: List[Dict[str, Any]]):
+        raw = self.buffer[self.item_start:end].strip()
+        self.item_start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        events.append({"event": "item", "field": self.current_key, "index": self.item_index, "value": value})
+        self.item_index += 1
+    
+    def _emit_field(self, end: int, events: List[Dict[str, Any]]):
+        raw = self.buffer[self.value_start:end].strip()
+        self.value_start = None
+        self.value_is_array = False
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        events.append({"event": "field", "field": self.current_key, "value": value})
 
 
 class GPTAnalyzer:
     """Анализатор данных скоринга с использованием GPT"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Каскад моделей: сначала быстрая, при сомнениях - сильная
+    FAST_TIER = "fast"
+    STRONG_TIER = "strong"
+    
+    # Параметры маршрутизации по умолчанию (переопределяются через env или routing=)
+    DEFAULT_ROUTING = {
+        "enabled": True,
+        "escalate_confidence": ["low"],
+        "escalate_decisions": ["review"],
+        # Границы ставок из ScoringEngine.calculate_interest_rate
+        "band_boundaries": [50, 65, 80],
+        "band_margin": 3
+    }
+    
+    # Стоимость в USD за 1M токенов (prompt, completion)
+    MODEL_PRICING = {
+        "gpt-4o-mini": (0.15, 0.60),
+        "gpt-4o": (2.50, 10.00),
+        "gpt-4-turbo": (10.00, 30.00),
+        "gpt-3.5-turbo": (0.50, 1.50)
+    }
+    
+    def __init__(self, api_key: Optional[str] = None,
+                 fast_model: Optional[str] = None,
+                 strong_model: Optional[str] = None,
+                 base_url: Optional[str] = None,
+                 routing: Optional[Dict[str, Any]] = None):
         """
         Инициализация GPT анализатора
         
         Args:
             api_key: API ключ OpenAI (если None, берется из переменной окружения)
+            fast_model: Быстрая модель первого уровня (GPT_FAST_MODEL)
+            strong_model: Сильная модель для эскалации (GPT_STRONG_MODEL)
+            base_url: Адрес API (OPENAI_BASE_URL), например локальный stand-in сервер
+            routing: Переопределение порогов маршрутизации (см. DEFAULT_ROUTING)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
-        self.model = "gpt-4o"  # Можно изменить на gpt-4-turbo или gpt-3.5-turbo
+        # openai импортируется при первом использовании: ~0.5 с на холодном старте
+        from openai import OpenAI
+        
+        base_url = base_url or os.getenv('OPENAI_BASE_URL') or None
+        self.client = OpenAI(api_key=self.api_key, base_url=base_url)
+        self.fast_model = fast_model or os.getenv('GPT_FAST_MODEL', 'gpt-4o-mini')
+        self.strong_model = strong_model or os.getenv('GPT_STRONG_MODEL', 'gpt-4o')
+        self.model = self.strong_model  # Модель без каскада (обратная совместимость)
+        
+        self.routing = self._load_routing(routing)
+        
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            tier: {
+                "calls": 0,
+                "errors": 0,
+                "escalations": 0,
+                "latency_total_s": 0.0,
+                "latency_max_s": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost_usd": 0.0
+            }
+            for tier in (self.FAST_TIER, self.STRONG_TIER)
+        }
+    
+    def _load_routing(self, overrides: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Сборка параметров маршрутизации: значения по умолчанию < env < аргументы"""
+        routing = dict(self.DEFAULT_ROUTING)
+        
+        if os.getenv('GPT_CASCADE_ENABLED') is not None:
+            routing["enabled"] = os.getenv('GPT_CASCADE_ENABLED', '1').lower() in ('1', 'true', 'yes')
+        if os.getenv('GPT_ESCALATE_CONFIDENCE'):
+            routing["escalate_confidence"] = [
+                v.strip().lower() for v in os.getenv('GPT_ESCALATE_CONFIDENCE').split(',') if v.strip()
+            ]
+        if os.getenv('GPT_ESCALATE_DECISIONS'):
+            routing["escalate_decisions"] = [
+                v.strip().lower() for v in os.getenv('GPT_ESCALATE_DECISIONS').split(',') if v.strip()
+            ]
+        if os.getenv('GPT_BAND_MARGIN'):
+            routing["band_margin"] = float(os.getenv('GPT_BAND_MARGIN'))
+        
+        if overrides:
+            routing.update(overrides)
+        return routing
     
     def format_scoring_for_gpt(self, scoring_data: Dict[str, Any], 
                                scoring_result: Dict[str, Any]) -> str:
@@ -96,6 +289,10 @@ class GPTAnalyzer:
         """
         Отправка данных в GPT для анализа
         
+        Сначала анализ выполняет быстрая модель. Запрос эскалируется на
+        сильную модель, если уверенность низкая, решение "review" или
+        итоговый балл близок к границе диапазона ставок.
+        
         Args:
             scoring_data: Исходные данные фермера
             scoring_result: Результаты расчета скоринга
@@ -105,13 +302,197 @@ class GPTAnalyzer:
         """
         try:
             prompt = self.format_scoring_for_gpt(scoring_data, scoring_result)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"GPT API error: {str(e)}",
+                "analysis": None
+            }
+        
+        if not self.routing.get("enabled", True):
+            result = self._run_tier(self.STRONG_TIER, self.strong_model, prompt)
+            result["escalation_reasons"] = []
+            return result
+        
+        fast_result = self._run_tier(self.FAST_TIER, self.fast_model, prompt)
+        
+        if fast_result["success"]:
+            reasons = self.get_escalation_reasons(fast_result["analysis"], scoring_result)
+        else:
+            reasons = ["fast_model_failed"]
+        
+        if not reasons:
+            fast_result["escalation_reasons"] = []
+            return fast_result
+        
+        with self._metrics_lock:
+            self._metrics[self.FAST_TIER]["escalations"] += 1
+        
+        strong_result = self._run_tier(self.STRONG_TIER, self.strong_model, prompt)
+        strong_result["escalation_reasons"] = reasons
+        
+        # Если сильная модель недоступна, лучше вернуть ответ быстрой модели
+        if not strong_result["success"] and fast_result["success"]:
+            fast_result["escalation_reasons"] = reasons
+            return fast_result
+        
+        return strong_result
+    
+    def get_escalation_reasons(self, analysis: Dict[str, Any],
+                               scoring_result: Dict[str, Any]) -> List[str]:
+        """
+        Причины эскалации ответа быстрой модели на сильную
+        
+        Returns:
+            Список причин (пустой - ответ быстрой модели принимается)
+        """
+        reasons = []
+        
+        confidence = str(analysis.get('confidence_level', '')).strip().lower()
+        if not confidence or confidence in self.routing["escalate_confidence"]:
+            reasons.append(f"confidence:{confidence or 'missing'}")
+        
+        decision = str(analysis.get('loan_decision', '')).strip().lower()
+        if not decision or decision in self.routing["escalate_decisions"]:
+            reasons.append(f"decision:{decision or 'missing'}")
+        
+        total_score = scoring_result.get('TotalScore')
+        if total_score is not None:
+            margin = self.routing["band_margin"]
+            for boundary in self.routing["band_boundaries"]:
+                if abs(total_score - boundary) <= margin:
+                    reasons.append(f"near_band_boundary:{boundary}")
+                    break
+        
+        return reasons
+    
+    def stream_analysis(self, scoring_data: Dict[str, Any],
+                        scoring_result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковый анализ: поля JSON-ответа отдаются по мере генерации
+        
+        Каскад сохраняется: если ответ быстрой модели требует эскалации,
+        отдается событие "escalate" и анализ стримится заново сильной моделью.
+        
+        Yields:
+            События парсера ("field", "item"), "escalate", затем
+            {"event": "done", ...} с полным результатом как у analyze_scoring()
+            либо {"event": "error", "error": ...}
+        """
+        try:
+            prompt = self.format_scoring_for_gpt(scoring_data, scoring_result)
+        except Exception as e:
+            yield {"event": "error", "error": f"GPT API error: {str(e)}"}
+            return
+        
+        if self.routing.get("enabled", True):
+            tiers = [(self.FAST_TIER, self.fast_model), (self.STRONG_TIER, self.strong_model)]
+        else:
+            tiers = [(self.STRONG_TIER, self.strong_model)]
+        
+        reasons = []
+        for position, (tier, model) in enumerate(tiers):
+            result = None
+            for event in self._stream_tier(tier, model, prompt):
+                if event["event"] == "result":
+                    result = event["result"]
+                else:
+                    yield event
+            
+            is_last = position == len(tiers) - 1
+            if not result["success"]:
+                if is_last:
+                    yield {"event": "error", "error": result["error"], "model": model, "tier": tier}
+                    return
+                reasons = ["fast_model_failed"]
+            else:
+                if tier == self.FAST_TIER:
+                    reasons = self.get_escalation_reasons(result["analysis"], scoring_result)
+                if is_last or not reasons:
+                    result["escalation_reasons"] = reasons
+                    yield {"event": "done", **result}
+                    return
+            
+            with self._metrics_lock:
+                self._metrics[self.FAST_TIER]["escalations"] += 1
+            yield {"event": "escalate", "reasons": reasons, "model": self.strong_model}
+    
+    def _stream_tier(self, tier: str, model: str, prompt: str) -> Iterator[Dict[str, Any]]:
+        """Потоковый вызов одной модели; последнее событие - {"event": "result"}"""
+        started = time.perf_counter()
+        parser = IncrementalJSONFieldParser()
+        usage = None
+        first_token_at = None
+        
+        try:
+            stream = self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=2000,
+                response_format={"type": "json_object"},
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            
+            for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter() - started
+                for event in parser.feed(delta):
+                    event["tier"] = tier
+                    yield event
             
+            self._record_call(tier, model, time.perf_counter() - started, usage)
+            analysis = json.loads(parser.buffer)
+            yield {"event": "result", "result": {
+                "success": True,
+                "analysis": analysis,
+                "raw_response": parser.buffer,
+                "model": model,
+                "tier": tier,
+                "time_to_first_token_s": round(first_token_at or 0.0, 4)
+            }}
+            
+        except json.JSONDecodeError as e:
+            self._record_error(tier)
+            yield {"event": "result", "result": {
+                "success": False,
+                "error": f"Failed to parse GPT response: {str(e)}",
+                "analysis": None,
+                "model": model,
+                "tier": tier
+            }}
+        except Exception as e:
+            self._record_call(tier, model, time.perf_counter() - started, usage)
+            self._record_error(tier)
+            yield {"event": "result", "result": {
+                "success": False,
+                "error": f"GPT API error: {str(e)}",
+                "analysis": None,
+                "model": model,
+                "tier": tier
+            }}
+    
+    def _run_tier(self, tier: str, model: str, prompt: str) -> Dict[str, Any]:
+        """Вызов одной модели каскада с учетом метрик"""
+        started = time.perf_counter()
+        try:
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "Ты - эксперт по кредитному скорингу в сельском хозяйстве. Анализируй данные фермеров и предоставляй профессиональные рекомендации по выдаче кредитов."
+                        "content": SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -125,27 +506,81 @@ class GPTAnalyzer:
             
             # Извлекаем ответ
             gpt_response = response.choices[0].message.content
+            self._record_call(tier, model, time.perf_counter() - started, getattr(response, 'usage', None))
             analysis = json.loads(gpt_response)
             
             return {
                 "success": True,
                 "analysis": analysis,
-                "raw_response": gpt_response
+                "raw_response": gpt_response,
+                "model": model,
+                "tier": tier
             }
             
         except json.JSONDecodeError as e:
+            self._record_error(tier)
             return {
                 "success": False,
                 "error": f"Failed to parse GPT response: {str(e)}",
-                "analysis": None
+                "analysis": None,
+                "model": model,
+                "tier": tier
             }
         except Exception as e:
+            self._record_call(tier, model, time.perf_counter() - started, None)
+            self._record_error(tier)
             return {
                 "success": False,
                 "error": f"GPT API error: {str(e)}",
-                "analysis": None
+                "analysis": None,
+                "model": model,
+                "tier": tier
             }
     
+    def _record_call(self, tier: str, model: str, latency: float, usage: Any):
+        """Учет задержки, токенов и стоимости вызова"""
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        prompt_price, completion_price = self.MODEL_PRICING.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+        
+        instrumentation.notify_call("gpt", latency)
+        
+        with self._metrics_lock:
+            stats = self._metrics[tier]
+            stats["calls"] += 1
+            stats["latency_total_s"] += latency
+            stats["latency_max_s"] = max(stats["latency_max_s"], latency)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["cost_usd"] += cost
+    
+    def _record_error(self, tier: str):
+        with self._metrics_lock:
+            self._metrics[tier]["errors"] += 1
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Метрики каскада по уровням
+        
+        Returns:
+            {tier: {model, calls, errors, escalations, avg_latency_s, ...}}
+        """
+        with self._metrics_lock:
+            snapshot = {tier: dict(stats) for tier, stats in self._metrics.items()}
+        
+        models = {self.FAST_TIER: self.fast_model, self.STRONG_TIER: self.strong_model}
+        for tier, stats in snapshot.items():
+            stats["model"] = models[tier]
+            stats["avg_latency_s"] = round(stats["latency_total_s"] / stats["calls"], 4) if stats["calls"] else 0.0
+            stats["cost_usd"] = round(stats["cost_usd"], 6)
+        
+        fast_calls = snapshot[self.FAST_TIER]["calls"]
+        snapshot["escalation_rate"] = round(
+            snapshot[self.FAST_TIER]["escalations"] / fast_calls, 4
+        ) if fast_calls else 0.0
+        return snapshot
+    
     def generate_report(self, farmer_profile: Dict[str, Any],
                        scoring_result: Dict[str, Any],
                        gpt_analysis: Dict[str, Any]) -> str:
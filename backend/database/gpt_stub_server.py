@@ -0,0 +1,207 @@
+"""
+AgroCredit AI - GPT Stub Server
+Локальный stand-in сервер OpenAI Chat Completions API для тестов и разработки
+
+Отвечает детерминированным JSON-анализом в формате GPTAnalyzer. Быстрая
+модель "сомневается" (confidence_level=low, loan_decision=review), если
+итоговый балл находится в пограничной зоне, сильная модель отвечает уверенно.
+
+Запуск:
+    python -m database.gpt_stub_server --port 8009 --fast-latency 0.2 --strong-latency 1.5
+
+Использование:
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8009/v1
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+
+SCORE_PATTERN = re.compile(r"ИТОГОВЫЙ БАЛЛ:\s*(\d+(?:\.\d+)?)")
+
+
+class StubConfig:
+    """Настройки поведения stand-in сервера"""
+
+    def __init__(self, fast_latency: float = 0.0, strong_latency: float = 0.0,
+                 fast_model_marker: str = "mini", uncertain_range: Tuple[float, float] = (45, 70)):
+        self.fast_latency = fast_latency
+        self.strong_latency = strong_latency
+        self.fast_model_marker = fast_model_marker
+        self.uncertain_range = uncertain_range
+        self.requests = []  # Журнал моделей, к которым обращались
+
+    def is_fast_model(self, model: str) -> bool:
+        return self.fast_model_marker in (model or "")
+
+
+def build_analysis(total_score: Optional[float], fast: bool, config: StubConfig) -> Dict[str, Any]:
+    """Детерминированный анализ по итоговому баллу"""
+    score = total_score if total_score is not None else 50
+    low, high = config.uncertain_range
+    uncertain = fast and low <= score < high
+
+    if uncertain:
+        decision, confidence = "review", "low"
+    elif score >= 65:
+        decision, confidence = "approve", "high"
+    elif score >= 50:
+        decision, confidence = "review" if fast else "approve", "medium"
+    else:
+        decision, confidence = "reject", "high"
+
+    return {
+        "overall_assessment": f"Итоговый балл {score:g}/100",
+        "strengths": ["Стабильная урожайность", "Собственная земля"],
+        "weaknesses": ["Ограниченная диверсификация"],
+        "risk_factors": ["Погодные риски"],
+        "recommendations": ["Оформить страхование урожая", "Диверсифицировать культуры"],
+        "loan_decision": decision,
+        "confidence_level": confidence,
+        "detailed_analysis": "Ответ stand-in сервера для тестирования."
+    }
+
+
+def make_handler(config: StubConfig):
+    """Создание обработчика запросов, привязанного к конфигурации"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [
+                    {"id": "gpt-4o-mini", "object": "model"},
+                    {"id": "gpt-4o", "object": "model"}
+                ]})
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found"}})
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            model = request.get("model", "")
+            fast = config.is_fast_model(model)
+            config.requests.append(model)
+
+            prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+            match = SCORE_PATTERN.search(prompt)
+            total_score = float(match.group(1)) if match else None
+
+            latency = config.fast_latency if fast else config.strong_latency
+            content = json.dumps(build_analysis(total_score, fast, config), ensure_ascii=False)
+            prompt_tokens = len(prompt) // 4
+            completion_tokens = len(content) // 4
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+
+            if request.get("stream"):
+                self._send_stream(model, content, usage, latency)
+                return
+
+            time.sleep(latency)
+            self._send_json(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+
+        def _send_stream(self, model: str, content: str, usage: Dict[str, Any], latency: float):
+            """Отправка ответа чанками SSE; задержка распределяется по токенам"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+            delay = latency / max(len(pieces), 1)
+
+            def write_chunk(delta: Dict[str, Any], finish_reason=None, chunk_usage=None):
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [] if chunk_usage else [
+                        {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                    ]
+                }
+                if chunk_usage:
+                    chunk["usage"] = chunk_usage
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            write_chunk({"role": "assistant", "content": ""})
+            for piece in pieces:
+                time.sleep(delay)
+                write_chunk({"content": piece})
+            write_chunk({}, finish_reason="stop")
+            write_chunk({}, chunk_usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return StubHandler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0,
+                      config: Optional[StubConfig] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Запуск stand-in сервера в фоновом потоке
+
+    Returns:
+        Кортеж (сервер, base_url для OPENAI_BASE_URL). Остановка: server.shutdown()
+    """
+    config = config or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.config = config
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI Chat Completions stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8009)
+    parser.add_argument("--fast-latency", type=float, default=0.0, help="Задержка быстрой модели, с")
+    parser.add_argument("--strong-latency", type=float, default=0.0, help="Задержка сильной модели, с")
+    args = parser.parse_args()
+
+    stub_config = StubConfig(fast_latency=args.fast_latency, strong_latency=args.strong_latency)
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(stub_config))
+    print(f"GPT stub server listening on http://{args.host}:{args.port}/v1")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
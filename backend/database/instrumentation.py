@@ -0,0 +1,116 @@
+"""
+AgroCredit AI - Instrumentation hooks
+Точки подключения для метрик и журнала медленных запросов
+
+Модуль database не зависит от приложения: приложение (app/core/metrics.py)
+регистрирует обработчики, а DatabaseManager и GPTAnalyzer сообщают о каждом
+SQL-запросе и внешнем вызове. Пока обработчиков нет, соединения создаются
+обычным классом sqlite3.Connection и накладных расходов нет.
+"""
+
+import sqlite3
+import time
+from typing import Any, Callable, List, Optional
+
+# hook(statement, parameters, seconds, db_path)
+StatementHook = Callable[[str, Any, float, Optional[str]], None]
+# hook(service, seconds)
+CallHook = Callable[[str, float], None]
+
+_statement_hooks: List[StatementHook] = []
+_call_hooks: List[CallHook] = []
+
+
+def add_statement_hook(hook: StatementHook):
+    """Подписаться на выполненные SQL-запросы"""
+    if hook not in _statement_hooks:
+        _statement_hooks.append(hook)
+
+
+def remove_statement_hook(hook: StatementHook):
+    if hook in _statement_hooks:
+        _statement_hooks.remove(hook)
+
+
+def add_call_hook(hook: CallHook):
+    """Подписаться на внешние вызовы (GPT, ML сервис)"""
+    if hook not in _call_hooks:
+        _call_hooks.append(hook)
+
+
+def remove_call_hook(hook: CallHook):
+    if hook in _call_hooks:
+        _call_hooks.remove(hook)
+
+
+def statement_hooks_active() -> bool:
+    return bool(_statement_hooks)
+
+
+def notify_statement(statement: str, parameters: Any, seconds: float, db_path: Optional[str] = None):
+    for hook in _statement_hooks:
+        try:
+            hook(statement, parameters, seconds, db_path)
+        except Exception as e:
+            # Сбой наблюдения не должен ломать запрос
+            print(f"⚠ Statement hook failed: {e}")
+
+
+def notify_call(service: str, seconds: float):
+    for hook in _call_hooks:
+        try:
+            hook(service, seconds)
+        except Exception as e:
+            print(f"⚠ Call hook failed: {e}")
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Курсор, замеряющий время каждого запроса"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            notify_statement(sql, parameters, time.perf_counter() - started, self.connection.db_path)
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            notify_statement(sql, seq_of_parameters, time.perf_counter() - started, self.connection.db_path)
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            notify_statement(sql_script, None, time.perf_counter() - started, self.connection.db_path)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Соединение, все запросы которого идут через TimedCursor"""
+
+    db_path: Optional[str] = None
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def connect(db_path: str, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect с замером запросов, если кто-то подписан"""
+    if not _statement_hooks:
+        return sqlite3.connect(db_path, **kwargs)
+    conn = sqlite3.connect(db_path, factory=TimedConnection, **kwargs)
+    conn.db_path = db_path
+    return conn
@@ -0,0 +1,243 @@
+"""
+AgroCredit AI - Schema migrations
+Версионированные миграции схемы scoring DB
+
+Каждая миграция применяется ровно один раз: номера примененных версий
+хранятся в таблице schema_version. Ожидающие миграции выполняются в одной
+транзакции BEGIN IMMEDIATE, поэтому воркеры, стартующие одновременно, не
+гоняются: второй ждет блокировку, перечитывает версию и ничего не повторяет.
+schema.sql (только CREATE ... IF NOT EXISTS) применяется повторно, если его
+контрольная сумма отличается от сохраненной в schema_meta.
+
+Когда все применено, запуск стоит одного чтения по первичным ключам.
+Новая миграция добавляется в конец MIGRATIONS со следующим номером;
+уже выпущенные миграции не меняются.
+"""
+
+import hashlib
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+try:
+    from . import instrumentation
+except ImportError:  # Запуск скриптов из каталога database (python example_usage.py)
+    import instrumentation
+
+LOCK_TIMEOUT = 30.0  # секунд ожидания блокировки, пока другой воркер применяет миграции
+
+_STATE_SQL = """
+    SELECT (SELECT MAX(version) FROM schema_version),
+           (SELECT value FROM schema_meta WHERE key = 'schema_sql_sha1')
+"""
+
+
+# ============================================================================
+# schema.sql
+# ============================================================================
+
+def read_schema(schema_path: str) -> Tuple[str, str]:
+    """Текст schema.sql и его контрольная сумма"""
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        schema_sql = f.read()
+    return schema_sql, hashlib.sha1(schema_sql.encode('utf-8')).hexdigest()
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Разбить SQL-скрипт на отдельные операторы
+
+    executescript() сам делает COMMIT, поэтому внутри транзакции миграции
+    операторы выполняются по одному (триггеры BEGIN ... END остаются целыми)
+    """
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            buffer = ""
+            if statement.rstrip(";").strip():
+                statements.append(statement)
+    leftover = [line for line in buffer.splitlines() if line.strip() and not line.strip().startswith("--")]
+    if leftover:
+        raise ValueError(f"Incomplete SQL statement at the end of schema: {buffer.strip()[:100]}")
+    return statements
+
+
+def apply_schema(conn: sqlite3.Connection, schema_path: str):
+    """Применить schema.sql в текущей транзакции и сохранить его контрольную сумму"""
+    schema_sql, checksum = read_schema(schema_path)
+    for statement in split_statements(schema_sql):
+        conn.execute(statement)
+    conn.execute("""
+        INSERT INTO schema_meta (key, value) VALUES ('schema_sql_sha1', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (checksum,))
+
+
+# ============================================================================
+# Миграции
+# ============================================================================
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def _add_farmer_id_columns(conn: sqlite3.Connection, db):
+    """
+    Пересоздать farmers и farms без колонки farmer_id
+
+    Старые базы (или таблицы, созданные SQLAlchemy) не имеют farmer_id, и
+    schema.sql на них падает на индексе. SQLite не поддерживает ALTER COLUMN,
+    поэтому таблицы пересоздаются. Отсутствующие таблицы создаст schema.sql.
+    """
+    columns = _table_columns(conn, "farmers")
+    if columns and 'farmer_id' not in columns:
+        print("⚠️  MIGRATION: farmer_id column missing in farmers table, adding it...")
+        existing = conn.execute("SELECT COUNT(*) FROM farmers").fetchone()[0]
+        # Новая таблица, копия данных, затем замена: переименование старой
+        # таблицы переписало бы внешние ключи других таблиц на нее
+        conn.execute("""
+            CREATE TABLE farmers_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                farmer_id TEXT UNIQUE NOT NULL,
+                age INTEGER NOT NULL CHECK(age >= 18 AND age <= 100),
+                education_level TEXT NOT NULL,
+                farming_experience_years INTEGER NOT NULL CHECK(farming_experience_years >= 0),
+                number_of_loans INTEGER DEFAULT 0,
+                past_defaults INTEGER DEFAULT 0,
+                repayment_score INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        if existing:
+            # Копируем данные, используя id как farmer_id
+            conn.execute("""
+                INSERT INTO farmers_new (id, farmer_id, age, education_level,
+                                       farming_experience_years, number_of_loans,
+                                       past_defaults, repayment_score)
+                SELECT id, 'farmer_' || id, age, education_level,
+                       farming_experience_years, number_of_loans,
+                       past_defaults, repayment_score
+                FROM farmers
+            """)
+        conn.execute("DROP TABLE farmers")
+        conn.execute("ALTER TABLE farmers_new RENAME TO farmers")
+        print(f"   ✓ farmers table recreated with farmer_id column ({existing} farmers migrated)")
+
+    farm_columns = _table_columns(conn, "farms")
+    if farm_columns and 'farmer_id' not in farm_columns:
+        print("⚠️  MIGRATION: farmer_id column missing in farms table, recreating...")
+        # farms без farmer_id не связаны с фермерами; таблица создается заново schema.sql
+        conn.execute("DROP TABLE farms")
+        print("   ✓ Dropped old farms table")
+
+
+def _create_base_schema(conn: sqlite3.Connection, db):
+    """Все таблицы, индексы и триггеры из schema.sql"""
+    apply_schema(conn, db.schema_path)
+
+
+def _add_geometry_metrics_columns(conn: sqlite3.Connection, db):
+    """Добавить колонки метрик в таблицу geometry и заполнить их из координат"""
+    columns = _table_columns(conn, "geometry")
+    missing = [
+        (name, sql_type) for name, sql_type in
+        [('area_ha', 'REAL'), ('perimeter_m', 'REAL'), ('compactness', 'REAL'), ('is_valid', 'INTEGER')]
+        if name not in columns
+    ]
+    for name, sql_type in missing:
+        conn.execute(f"ALTER TABLE geometry ADD COLUMN {name} {sql_type}")
+    if missing:
+        print(f"⚠️  MIGRATION: added geometry columns {', '.join(name for name, _ in missing)}")
+
+    updated = db.recompute_geometry_metrics(conn=conn)
+    if updated:
+        print(f"   ✓ Geometry metrics computed for {updated} farms")
+
+
+# (версия, имя, функция(conn, db_manager)) — строго по возрастанию версии
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "add_farmer_id_columns", _add_farmer_id_columns),
+    (2, "create_base_schema", _create_base_schema),
+    (3, "add_geometry_metrics_columns", _add_geometry_metrics_columns),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ============================================================================
+# Запуск
+# ============================================================================
+
+def _read_state(conn: sqlite3.Connection) -> Tuple[int, Optional[str]]:
+    """Последняя примененная версия и контрольная сумма schema.sql"""
+    try:
+        version, checksum = conn.execute(_STATE_SQL).fetchone()
+    except sqlite3.OperationalError:  # служебных таблиц еще нет
+        return 0, None
+    return version or 0, checksum
+
+
+def _create_bookkeeping_tables(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    """)
+
+
+def migrate(db, force_schema: bool = False) -> List[str]:
+    """
+    Применить ожидающие миграции к базе DatabaseManager
+
+    Args:
+        db: DatabaseManager (нужны db_path, schema_path и recompute_geometry_metrics)
+        force_schema: применить schema.sql даже при совпадающей контрольной сумме
+
+    Returns:
+        Имена выполненных шагов (пустой список, если база актуальна)
+    """
+    _, checksum = read_schema(db.schema_path)
+    # Транзакциями управляем сами (isolation_level=None), чтобы взять BEGIN IMMEDIATE
+    conn = instrumentation.connect(db.db_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        if not force_schema and _read_state(conn) == (LATEST_VERSION, checksum):
+            return []
+
+        # Блокировка записи: остальные воркеры ждут здесь
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _create_bookkeeping_tables(conn)
+            version, _ = _read_state(conn)
+            applied = []
+            for number, name, apply in MIGRATIONS:
+                if number <= version:
+                    continue
+                print(f"🔄 Applying migration {number}: {name}")
+                apply(conn, db)
+                conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (number, name))
+                applied.append(name)
+
+            if force_schema or _read_state(conn)[1] != checksum:
+                apply_schema(conn, db.schema_path)
+                applied.append("schema.sql")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    if applied:
+        print(f"✓ Database schema up to date (version {LATEST_VERSION}): {db.db_path}")
+    return applied
@@ -118,6 +118,10 @@ CREATE TABLE IF NOT EXISTS geometry (
     vertices INTEGER CHECK(vertices >= 3),
     polygon_quality TEXT CHECK(polygon_quality IN ('высокое', 'среднее', 'низкое')),
     coordinates TEXT, -- JSON массив координат полигона
+    area_ha REAL, -- Геодезическая площадь (вычисляется из coordinates)
+    perimeter_m REAL, -- Периметр по гаверсинусам
+    compactness REAL, -- Коэффициент Полсби-Поппера (0..1)
+    is_valid INTEGER, -- 1 если контур без самопересечений
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (farm_id) REFERENCES farms(id) ON DELETE CASCADE
@@ -258,6 +262,17 @@ CREATE TABLE IF NOT EXISTS scoring_history (
 CREATE INDEX IF NOT EXISTS idx_history_farmer_id ON scoring_history(farmer_id);
 CREATE INDEX IF NOT EXISTS idx_history_calculated ON scoring_history(calculated_at);
 
+-- ============================================================================
+-- Таблица 13: DATA_VERSIONS (Версии данных)
+-- Счетчик на каждую область данных; увеличивается в той же транзакции,
+-- что и изменение. Кэши ответов API во всех процессах сравнивают версии
+-- и сбрасываются сразу после коммита
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS data_versions (
+    scope TEXT PRIMARY KEY, -- loans, scoring, credits
+    version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
 -- ============================================================================
 -- Триггеры для автоматического обновления updated_at
 -- ============================================================================
@@ -115,10 +115,15 @@ class ScoringEngine:
         
         # Добавляем геометрию
         if farm.get('geometry'):
+            geometry = farm['geometry']
             scoring_data["geometry"] = {
-                "vertices": farm['geometry'].get('vertices'),
-                "polygon_quality": farm['geometry'].get('polygon_quality'),
-                "has_coordinates": bool(farm['geometry'].get('coordinates'))
+                "vertices": geometry.get('vertices'),
+                "polygon_quality": geometry.get('polygon_quality'),
+                "has_coordinates": bool(geometry.get('has_coordinates', geometry.get('coordinates'))),
+                "area_ha": geometry.get('area_ha'),
+                "perimeter_m": geometry.get('perimeter_m'),
+                "compactness": geometry.get('compactness'),
+                "is_valid": None if geometry.get('is_valid') is None else bool(geometry['is_valid'])
             }
         
         # Добавляем доступ к рынкам
@@ -331,11 +336,17 @@ class ScoringEngine:
         - vertices ≥ 12 → 10 баллов
         - 6 ≤ vertices < 12 → 6 баллов
         - < 6 → 3 балла
+        - контур с самопересечениями (is_valid = False) → 3 балла
+        
+        Метрики берутся из таблицы geometry, координаты не разбираются.
         """
         if not geometry:
             return 3
         
-        vertices = geometry.get('vertices', 0)
+        if geometry.get('is_valid') is False:
+            return 3
+        
+        vertices = geometry.get('vertices') or 0
         
         if vertices >= 12:
             return 10
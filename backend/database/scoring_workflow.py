@@ -4,7 +4,7 @@ AgroCredit AI - Scoring Workflow
 """
 
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator
 from datetime import datetime
 
 from .db_manager import DatabaseManager
@@ -36,6 +36,12 @@ class ScoringWorkflow:
                 print(f"⚠ GPT Analyzer not available: {e}")
                 self.gpt_analyzer = None
     
+    def _get_gpt_analyzer(self) -> GPTAnalyzer:
+        """GPT анализатор; создается по OPENAI_API_KEY при первом обращении"""
+        if self.gpt_analyzer is None:
+            self.gpt_analyzer = GPTAnalyzer()
+        return self.gpt_analyzer
+    
     def calculate_farmer_scoring(self, farmer_id: int, 
                                  use_gpt: bool = False,
                                  verbose: bool = True) -> Dict[str, Any]:
@@ -60,7 +66,7 @@ class ScoringWorkflow:
             if verbose:
                 print("1. Получение данных фермера...")
             
-            profile = self.db.get_farmer_complete_profile(farmer_id)
+            profile = self.db.get_farmer_complete_profile(farmer_id, parse_coordinates=False)
             if not profile:
                 raise ValueError(f"Farmer with ID {farmer_id} not found")
             
@@ -112,7 +118,7 @@ class ScoringWorkflow:
                         gpt_recommendations_text = '\n'.join(analysis.get('recommendations', []))
                         
                         if verbose:
-                            print(f"   ✓ GPT анализ получен")
+                            print(f"   ✓ GPT анализ получен (модель: {gpt_response.get('model')})")
                             print(f"   ✓ Решение: {analysis.get('loan_decision', 'N/A')}")
                     else:
                         if verbose:
@@ -171,6 +177,78 @@ class ScoringWorkflow:
                 'error': str(e)
             }
     
+    def stream_farmer_analysis(self, farmer_id: int) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковый GPT анализ скоринга фермера
+        
+        Первым событием сразу отдается рассчитанный скоринг, затем поля
+        GPT анализа по мере генерации. Итоговый анализ сохраняется в
+        последний результат скоринга фермера (или в новый, если его нет).
+        
+        Args:
+            farmer_id: ID фермера
+        
+        Yields:
+            События {"event": "scoring" | "field" | "item" | "escalate" | "done" | "error", ...}
+        """
+        profile = self.db.get_farmer_complete_profile(farmer_id, parse_coordinates=False)
+        if not profile:
+            raise ValueError(f"Farmer with ID {farmer_id} not found")
+        if not profile.get('farms'):
+            raise ValueError(f"Farmer {farmer_id} has no farms")
+        
+        scoring_data = self.scoring_engine.extract_farmer_json(profile)
+        scoring_result = self.scoring_engine.calculate_scoring(scoring_data)
+        yield {"event": "scoring", "scoring_result": scoring_result}
+        
+        try:
+            analyzer = self._get_gpt_analyzer()
+        except Exception as e:
+            yield {"event": "error", "error": str(e)}
+            return
+        
+        for event in analyzer.stream_analysis(scoring_data, scoring_result):
+            if event["event"] != "done":
+                yield event
+                continue
+            
+            analysis = event["analysis"]
+            gpt_analysis_text = json.dumps(analysis, ensure_ascii=False)
+            gpt_recommendations_text = '\n'.join(analysis.get('recommendations', []))
+            
+            latest = self.db.get_latest_scoring_by_farmer(farmer_id)
+            if latest and latest['total_score'] == scoring_result['TotalScore']:
+                scoring_id = latest['id']
+                self.db.update_scoring_gpt_analysis(scoring_id, gpt_analysis_text, gpt_recommendations_text)
+            else:
+                scoring_id = self.db.add_scoring_result(
+                    farmer_id=farmer_id,
+                    farm_id=profile['farms'][0]['id'],
+                    land_score=scoring_result['LandScore'],
+                    tech_score=scoring_result['TechScore'],
+                    crop_score=scoring_result['CropScore'],
+                    ban_score=scoring_result['BanScore'],
+                    infra_score=scoring_result['InfraScore'],
+                    geo_score=scoring_result['GeoScore'],
+                    diversification_score=scoring_result['DiversificationScore'],
+                    total_score=scoring_result['TotalScore'],
+                    interest_rate=scoring_result['InterestRate'],
+                    monthly_payment=scoring_result.get('MonthlyPayment', 0),
+                    debt_to_income_ratio=scoring_result.get('DebtToIncomeRatio', 0),
+                    gpt_analysis=gpt_analysis_text,
+                    gpt_recommendations=gpt_recommendations_text,
+                    scoring_data_json=json.dumps(scoring_data, ensure_ascii=False)
+                )
+            
+            yield {
+                "event": "done",
+                "scoring_id": scoring_id,
+                "analysis": analysis,
+                "model": event.get("model"),
+                "tier": event.get("tier"),
+                "escalation_reasons": event.get("escalation_reasons", [])
+            }
+    
     def recalculate_all_farmers(self, use_gpt: bool = False) -> Dict[str, Any]:
         """
         Массовый пересчет скоринга для всех фермеров
@@ -46,6 +46,14 @@ export interface ApplicationDetail {
     scoring: ScoringDetail | null;
 }
 
+export type AnalysisStreamEvent =
+    | { event: 'scoring'; scoring_result: Record<string, number> }
+    | { event: 'item'; field: string; index: number; value: unknown; tier: string }
+    | { event: 'field'; field: string; value: unknown; tier: string }
+    | { event: 'escalate'; reasons: string[]; model: string }
+    | { event: 'done'; scoring_id: number; analysis: Record<string, unknown>; model: string; tier: string }
+    | { event: 'error'; error: string };
+
 export const bankService = {
     /**
      * Получить все заявки
@@ -90,6 +98,59 @@ export const bankService = {
         return response.json();
     },
 
+    /**
+     * Потоковый GPT анализ заявки (SSE). Возвращает функцию отмены.
+     */
+    streamAnalysis(id: number, onEvent: (event: AnalysisStreamEvent) => void): () => void {
+        const controller = new AbortController();
+        const role = typeof window !== 'undefined' ? localStorage.getItem('userRole') : null;
+
+        (async () => {
+            const response = await fetch(`${API_BASE_URL}/api/bank/applications/${id}/analysis/stream`, {
+                headers: role ? { 'X-Role': role } : {},
+                signal: controller.signal,
+            });
+
+            if (!response.ok || !response.body) {
+                onEvent({ event: 'error', error: 'Failed to start analysis stream' });
+                return;
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary = buffer.indexOf('\n\n');
+                while (boundary !== -1) {
+                    const block = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    boundary = buffer.indexOf('\n\n');
+
+                    let eventName = '';
+                    let data = '';
+                    for (const line of block.split('\n')) {
+                        if (line.startsWith('event: ')) eventName = line.slice(7);
+                        else if (line.startsWith('data: ')) data += line.slice(6);
+                    }
+                    if (eventName && data) {
+                        onEvent({ event: eventName, ...JSON.parse(data) } as AnalysisStreamEvent);
+                    }
+                }
+            }
+        })().catch((error) => {
+            if (error.name !== 'AbortError') {
+                onEvent({ event: 'error', error: String(error) });
+            }
+        });
+
+        return () => controller.abort();
+    },
+
     /**
      * Обновить статус заявки
      */
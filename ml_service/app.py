@@ -1,7 +1,23 @@
-from fastapi import FastAPI
+import json
+import os
+import threading
+import time
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict
-from model_dummy import compute_features, score_from_features
+from typing import Dict, List, Optional
+from model_dummy import score_batch
+from feature_store import get_feature_store
+from model_registry import get_active_model, get_registry, load_active_model
+from ndvi_timeseries import field_timeseries, get_observation_store
+from weather_client import get_weather_client
+from weather_store import get_weather_store
+
+
+# Batches larger than this are streamed back as NDJSON
+BATCH_STREAM_THRESHOLD = int(os.getenv("BATCH_STREAM_THRESHOLD", "1000"))
+# Rows scored per vectorized chunk when streaming
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
 
 
 app = FastAPI(
@@ -11,50 +27,254 @@ app = FastAPI(
 )
 
 
+# Set once the model is loaded and the scoring path has run end to end
+_ready = threading.Event()
+_warmup = {"started_at": None, "seconds": None, "error": None}
+
+# Synthetic fields scored during warm-up (one vectorized batch)
+WARMUP_ROWS = int(os.getenv("WARMUP_ROWS", "64"))
+
+
+def warm_up():
+    """Score a synthetic batch so the first real request doesn't pay for imports, connections and first-touch costs"""
+    _warmup["started_at"] = time.time()
+    start = time.perf_counter()
+    payloads = [
+        {
+            "crop_type": ("wheat", "cotton", "rice")[i % 3],
+            "acreage": 1.0 + i,
+            "geometry": {"type": "Polygon", "coordinates": [[[69.0, 41.5], [69.001, 41.5], [69.001, 41.499], [69.0, 41.5]]]},
+            "observation_date": None
+        }
+        for i in range(WARMUP_ROWS)
+    ]
+    try:
+        score_batch(payloads, observe=False)
+    except Exception as e:
+        # Scoring still works (e.g. with mock features); report it and serve
+        _warmup["error"] = f"{type(e).__name__}: {e}"
+        print(f"Warm-up failed: {_warmup['error']}")
+    _warmup["seconds"] = round(time.perf_counter() - start, 3)
+    _ready.set()
+
+
+@app.on_event("startup")
+def load_scoring_model():
+    """
+    Load the active model version (or the artifact pinned by MODEL_PATH) once per
+    process - a no-op in gunicorn workers, whose master loaded it before forking -
+    then warm up in the background; /ready reports 503 until that finishes.
+    The registry watcher follows model changes made by other workers.
+    """
+    load_active_model()
+    get_registry().watch()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+
 class ScoreRequest(BaseModel):
     crop_type: str
     acreage: float
     geometry: Dict
+    observation_date: Optional[str] = None  # ISO date; defaults to today
 
 
 class ScoreResponse(BaseModel):
     numeric_score: float
     risk_category: str
     factors: Dict
+    model_version: str
+
+
+class BatchScoreRequest(BaseModel):
+    fields: List[ScoreRequest]
+
+
+class BatchScoreResponse(BaseModel):
+    results: List[ScoreResponse]
+
+
+class WeatherObservation(BaseModel):
+    date: str  # ISO date
+    location: Optional[str] = None  # Region name or grid cell key
+    lat: Optional[float] = None  # Used to derive the grid cell when location is omitted
+    lon: Optional[float] = None
+    precipitation: Optional[float] = None  # mm
+    temperature: Optional[float] = None  # celsius
+
+
+class WeatherIngestRequest(BaseModel):
+    observations: List[WeatherObservation]
+
+
+class TimeSeriesField(BaseModel):
+    field_id: Optional[str] = None
+    geometry: Dict
+
+
+class TimeSeriesRequest(BaseModel):
+    fields: List[TimeSeriesField]
+    include_series: bool = False
 
 
 @app.post("/score", response_model=ScoreResponse)
 def generate_score(request: ScoreRequest):
     """
     Generate credit score for a field based on agronomic features.
-    
-    For MVP, uses mock NDVI and weather data.
-    In production, would integrate with Sentinel Hub and weather APIs.
-    """
-    # Extract features from field data
-    features = compute_features(request.dict())
-    
-    # Generate score from features
-    numeric_score, risk_category, factors = score_from_features(features)
-    
-    return ScoreResponse(
-        numeric_score=numeric_score,
-        risk_category=risk_category,
-        factors=factors
+
+    Features come from local NDVI scenes and the weather store (mock values
+    where no data exists); the score comes from the active model version,
+    reported in `model_version`.
+    """
+    return score_batch([request.dict()])[0]
+
+
+def _ndjson_results(payloads: List[Dict]):
+    """Score payloads chunk by chunk and yield one JSON line per field"""
+    for start in range(0, len(payloads), BATCH_CHUNK_SIZE):
+        chunk = score_batch(payloads[start:start + BATCH_CHUNK_SIZE])
+        yield "".join(json.dumps(result) + "\n" for result in chunk)
+
+
+@app.post("/score/batch", response_model=BatchScoreResponse)
+def generate_scores_batch(request: BatchScoreRequest, http_request: Request, stream: bool = False):
+    """
+    Score many fields in one request.
+
+    Features and scores are computed over NumPy arrays for the whole batch.
+    Results keep the input order. Large batches (over BATCH_STREAM_THRESHOLD),
+    `?stream=true` or `Accept: application/x-ndjson` return NDJSON, one
+    ScoreResponse object per line, produced chunk by chunk.
+    """
+    payloads = [field.dict() for field in request.fields]
+
+    wants_ndjson = "application/x-ndjson" in http_request.headers.get("accept", "")
+    if stream or wants_ndjson or len(payloads) > BATCH_STREAM_THRESHOLD:
+        return StreamingResponse(_ndjson_results(payloads), media_type="application/x-ndjson")
+
+    # Rows come straight from the scoring pipeline, so skip per-row model validation
+    return JSONResponse({"results": score_batch(payloads)})
+
+
+@app.post("/ndvi/timeseries")
+def ndvi_timeseries(request: TimeSeriesRequest):
+    """
+    Season NDVI aggregates per field from all scenes in NDVI_SCENE_DIR.
+
+    Scenes not yet seen for a field are processed in a process pool and
+    persisted; the response has peak NDVI, peak and green-up dates and the
+    trend slope (NDVI change per 30 days) for each field, in input order.
+    """
+    processed, results = field_timeseries(
+        [field.geometry for field in request.fields],
+        get_observation_store(),
+        include_series=request.include_series
     )
+    for field, result in zip(request.fields, results):
+        result["field_id"] = field.field_id
+    return {"scenes_processed": processed, "results": results}
+
+
+@app.post("/weather/ingest")
+def ingest_weather(request: WeatherIngestRequest):
+    """
+    Bulk-ingest daily weather observations.
+
+    Rolling 7/30/90-day aggregates of each location are updated from the
+    earliest ingested day onward; later days of the same location are
+    re-derived, earlier ones are untouched.
+    """
+    return get_weather_store().ingest(obs.dict() for obs in request.observations)
+
+
+@app.get("/weather/window")
+def weather_window(location: str, days: int = 30, end: Optional[str] = None):
+    """Precipitation sum and mean temperature over `days` days ending at `end`"""
+    aggregates = get_weather_store().window(location, days, end)
+    if aggregates is None:
+        raise HTTPException(status_code=404, detail=f"No weather data for {location}")
+    return aggregates
+
+
+@app.get("/weather/client/stats")
+def weather_client_stats():
+    """Weather API requests, disk cache hits and coalesced (single-flight) calls"""
+    client = get_weather_client()
+    if client is None:
+        return {"enabled": False}
+    return {"enabled": True, **client.stats()}
+
+
+@app.get("/models")
+def list_models():
+    """Registered model versions, the active and shadow versions, loads in progress and shadow agreement"""
+    registry = get_registry()
+    return {**registry.status(), "versions": registry.versions()}
+
+
+@app.post("/models/{version}/activate", status_code=202)
+def activate_model(version: str, wait: bool = False):
+    """
+    Load and warm up a version in the background, then swap it in.
+    Requests already running finish on the model they started with.
+    Other worker processes follow within MODEL_REGISTRY_POLL_SECONDS.
+    """
+    registry = get_registry()
+    if version not in {m["version"] for m in registry.versions()}:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    if wait:
+        registry.activate(version, wait=True)
+        return {"active": version, "state": "active"}
+    registry.activate(version)
+    return {"version": version, "state": "loading"}
+
+
+@app.post("/models/{version}/shadow", status_code=202)
+def shadow_model(version: str):
+    """Score every request with this version too, off the request path, and track agreement"""
+    registry = get_registry()
+    if version not in {m["version"] for m in registry.versions()}:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    registry.set_shadow(version)
+    return {"version": version, "state": "loading"}
+
+
+@app.delete("/models/shadow")
+def clear_shadow_model():
+    """Stop shadow scoring"""
+    get_registry().clear_shadow()
+    return {"shadow": None}
 
 
 @app.get("/")
 def root():
     """Root endpoint"""
+    model = get_active_model()
     return {
         "service": "AgroCredit ML Service",
         "version": "1.0.0",
-        "status": "operational"
+        "status": "operational",
+        "model": model.version if model else "formula"
     }
 
 
 @app.get("/health")
 def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """Liveness; `ready` turns true after warm-up"""
+    return {"status": "healthy", "ready": _ready.is_set(), "pid": os.getpid()}
+
+
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 503 until the model is loaded and warm-up has finished"""
+    model = get_active_model()
+    body = {"ready": _ready.is_set(), "model": model.version if model else "formula", "warmup": _warmup, "pid": os.getpid()}
+    return JSONResponse(status_code=200 if _ready.is_set() else 503, content=body)
+
+
+@app.get("/features/stats")
+def feature_store_stats():
+    """Feature store hit rate, overall and per feature family"""
+    store = get_feature_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **store.stats()}
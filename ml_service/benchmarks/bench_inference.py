@@ -0,0 +1,60 @@
+"""
+Latency benchmark: weighted formula vs exported model artifacts.
+
+Times score + contribution computation (the part that differs between the
+formula and the models) for several batch sizes and reports p50 / p99 per
+call and throughput.
+
+Usage (from ml_service/):
+    python benchmarks/bench_inference.py
+    python benchmarks/bench_inference.py --batch-sizes 1 1000 --repeats 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model_dummy import score_from_features_batch  # noqa: E402
+from model_runtime import load_model, resolve_model_path  # noqa: E402
+from train_model import FEATURES, synthetic_dataset  # noqa: E402
+
+
+def time_calls(fn, features, repeats: int) -> np.ndarray:
+    fn(features)  # warm-up
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(features)
+        timings[i] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--models", nargs="+", default=["models/logistic-v1", "models/gbt-v1"])
+    args = parser.parse_args()
+
+    scorers = {"formula": score_from_features_batch}
+    for path in args.models:
+        model = load_model(resolve_model_path(path))
+        scorers[model.version] = model.predict
+
+    x, _ = synthetic_dataset(max(args.batch_sizes), seed=1)
+    print(f"{'scorer':<14}{'batch':>8}{'p50 ms':>10}{'p99 ms':>10}{'rows/s':>14}")
+    for batch_size in args.batch_sizes:
+        features = {f["name"]: x[:batch_size, j] for j, f in enumerate(FEATURES)}
+        repeats = max(10, args.repeats if batch_size <= 1000 else args.repeats // 10)
+        for name, fn in scorers.items():
+            timings = time_calls(fn, features, repeats)
+            p50, p99 = np.percentile(timings, [50, 99]) * 1000
+            print(f"{name:<14}{batch_size:>8}{p50:>10.3f}{p99:>10.3f}{batch_size / np.median(timings):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Throughput benchmark: ML service under gunicorn with 1..N pre-fork workers.
+
+For each worker count, starts `gunicorn -c gunicorn.conf.py app:app`, waits
+until /ready answers 200, then drives POST /score from several client
+processes for a fixed duration and reports throughput, p50 / p99 latency
+and per-worker memory (RSS vs PSS - the gap is what workers share with the
+master, e.g. the preloaded model).
+
+Usage (from ml_service/):
+    python benchmarks/bench_workers.py
+    python benchmarks/bench_workers.py --workers 1 2 4 8 --clients 16 --duration 10
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def payload(i: int) -> dict:
+    lon, lat = 69.0 + (i % 40) * 0.002, 41.45 + (i // 40 % 40) * 0.002
+    return {
+        "crop_type": ("wheat", "cotton", "rice")[i % 3],
+        "acreage": 5 + (i % 97) * 0.5,
+        "geometry": {"type": "Polygon", "coordinates": [[[lon, lat], [lon + 0.001, lat], [lon + 0.001, lat - 0.001], [lon, lat]]]}
+    }
+
+
+def client_loop(url: str, seed: int, duration: float, queue):
+    """One load-generating process: sequential requests until the deadline"""
+    timings = []
+    i = seed * 100000
+    with httpx.Client(timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            client.post(url, json=payload(i)).raise_for_status()
+            timings.append(time.perf_counter() - start)
+            i += 1
+    queue.put(timings)
+
+
+def memory_kb(pid: int) -> dict:
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def worker_pids(master_pid: int):
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def start_service(workers: int, env) -> (subprocess.Popen, str):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app",
+         "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning"],
+        cwd=SERVICE_DIR, env=env
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    ready_pids = set()
+    while time.time() < deadline:
+        try:
+            response = httpx.get(base + "/ready", timeout=1)
+            if response.status_code == 200:
+                ready_pids.add(response.json()["pid"])
+                if len(ready_pids) >= workers:
+                    return process, base
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError(f"ML service with {workers} workers did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="Load-generating processes")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-workers-")
+    env = dict(os.environ, FEATURE_STORE_PATH=os.path.join(workdir, "features.db"))
+    print(f"CPUs: {multiprocessing.cpu_count()}")
+    print(f"{'workers':>8}{'req/s':>10}{'speedup':>9}{'p50 ms':>9}{'p99 ms':>9}{'RSS MB/w':>10}{'PSS MB/w':>10}")
+
+    baseline = None
+    for workers in args.workers:
+        process, base = start_service(workers, env)
+        try:
+            queue = multiprocessing.Queue()
+            clients = [
+                multiprocessing.Process(target=client_loop, args=(base + "/score", seed, args.duration, queue))
+                for seed in range(args.clients)
+            ]
+            for client in clients:
+                client.start()
+            timings = np.concatenate([queue.get() for _ in clients])
+            for client in clients:
+                client.join()
+
+            memory = [memory_kb(pid) for pid in worker_pids(process.pid)]
+            rss = np.mean([m.get("Rss", 0) for m in memory]) / 1024 if memory else float("nan")
+            pss = np.mean([m.get("Pss", 0) for m in memory]) / 1024 if memory else float("nan")
+        finally:
+            process.terminate()
+            process.wait()
+
+        throughput = len(timings) / args.duration
+        baseline = baseline or throughput
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+        print(f"{workers:>8}{throughput:>10,.0f}{throughput / baseline:>8.2f}x{p50:>9.2f}{p99:>9.2f}{rss:>10.1f}{pss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Consistency check: weather features for unusual geometries, and mock fallbacks.
+
+Fields whose geometry is not a Polygon / MultiPolygon (Point, LineString) or
+has malformed coordinates get no weather location and are scored with mock
+weather instead of failing the request or the whole batch.
+
+Mock weather and NDVI are never written to the feature store: observations
+ingested (or a scene added) after a field was scored with mock values are
+used on the next request.
+
+Exits non-zero on any failure.
+
+Usage (from ml_service/):
+    python benchmarks/check_weather_features.py
+"""
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+_tmp = tempfile.mkdtemp(prefix="check_weather_")
+os.environ["FEATURE_STORE_PATH"] = os.path.join(_tmp, "features.db")
+os.environ["WEATHER_STORE_PATH"] = os.path.join(_tmp, "weather.db")
+os.environ["NDVI_SCENE_DIR"] = os.path.join(_tmp, "scenes")
+os.environ.pop("WEATHER_API_URL", None)
+
+from model_dummy import compute_features_batch, score_batch  # noqa: E402
+from ndvi import field_ndvi, write_synthetic_scene  # noqa: E402
+from weather_store import field_location, get_weather_store  # noqa: E402
+
+POLYGON = {"type": "Polygon", "coordinates": [[[69.0, 41.0], [69.01, 41.0], [69.01, 41.01], [69.0, 41.0]]]}
+
+# Inside the synthetic scene written by ndvi.write_synthetic_scene (defaults)
+SCENE_FIELD = {"type": "Polygon", "coordinates": [[[69.01, 41.49], [69.03, 41.49], [69.03, 41.47], [69.01, 41.47], [69.01, 41.49]]]}
+
+UNLOCATABLE = {
+    "point": {"type": "Point", "coordinates": [69.0, 41.0]},
+    "linestring": {"type": "LineString", "coordinates": [[69.0, 41.0], [69.1, 41.0]]},
+    "flat polygon": {"type": "Polygon", "coordinates": [69.0, 41.0]},
+    "empty ring": {"type": "Polygon", "coordinates": [[]]},
+    "short vertex": {"type": "Polygon", "coordinates": [[[69.0, 41.0], [69.1]]]},
+    "text vertex": {"type": "Polygon", "coordinates": [[[69.0, "x"], [69.1, 41.0]]]},
+    "no type": {"coordinates": POLYGON["coordinates"]},
+    "null": None,
+}
+
+
+def check(name: str, ok: bool, failures: list):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+def main():
+    failures = []
+
+    check("polygon has a location", field_location(POLYGON) is not None, failures)
+    for name, geometry in UNLOCATABLE.items():
+        try:
+            location = field_location(geometry)
+        except Exception as e:
+            location = e
+        check(f"{name}: no location", location is None, failures)
+
+    payloads = [{"crop_type": "wheat", "acreage": 5.0, "geometry": g} for g in [POLYGON, *UNLOCATABLE.values()]]
+    try:
+        results = score_batch(payloads)
+        check("batch with unusual geometries is scored", len(results) == len(payloads), failures)
+    except Exception as e:
+        check(f"batch with unusual geometries is scored ({type(e).__name__}: {e})", False, failures)
+
+    # Mock weather first, then 30 dry days ingested for the field's cell
+    field = {"crop_type": "wheat", "acreage": 5.0, "geometry": POLYGON}
+    before = compute_features_batch([field])["rainfall_30d"][0]
+    today = date.today()
+    get_weather_store().ingest(
+        {"location": field_location(POLYGON), "date": (today - timedelta(days=d)).isoformat(),
+         "precipitation": 0.0, "temperature": 30.0}
+        for d in range(30)
+    )
+    after = compute_features_batch([field])["rainfall_30d"][0]
+    check(f"ingested weather replaces mock values (rainfall {before} -> {after})", after == 0.0, failures)
+
+    # Mock NDVI first, then a scene covering the field is added
+    field = {"crop_type": "wheat", "acreage": 5.0, "geometry": SCENE_FIELD}
+    before = compute_features_batch([field])["mean_ndvi"][0]
+    write_synthetic_scene(os.path.join(os.environ["NDVI_SCENE_DIR"], "2024-06-01"))
+    after = compute_features_batch([field])["mean_ndvi"][0]
+    expected = round(field_ndvi(SCENE_FIELD)["mean_ndvi"], 3)
+    check(f"added scene replaces mock NDVI ({before} -> {after}, scene {expected})", after == expected, failures)
+
+    print(f"\n{len(failures)} failure(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
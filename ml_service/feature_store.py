@@ -0,0 +1,203 @@
+"""
+Local feature store for computed agronomic features.
+
+Features are stored in SQLite keyed by (geometry hash, crop, observation
+date), grouped into feature families (NDVI, weather) that each have their
+own TTL. Every family is stored under the current feature-set version, so
+bumping FEATURE_SET_VERSION invalidates previously computed features
+without deleting them. Reads and writes are bulk operations so a scoring
+batch costs one query per family.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+
+FeatureKey = Tuple[str, str, str]  # (geometry_hash, crop, observation_date)
+
+# Bump when feature definitions change; older rows are ignored
+FEATURE_SET_VERSION = os.getenv("FEATURE_SET_VERSION", "v2")
+
+# Feature families: features computed together and sharing a TTL
+FEATURE_FAMILIES = {
+    "ndvi": ["mean_ndvi", "ndvi_variance", "ndvi_p10", "ndvi_p50", "ndvi_p90"],
+    "weather": ["avg_temperature", "rainfall_30d", "drought_index"]
+}
+
+DEFAULT_TTLS = {
+    "ndvi": int(os.getenv("FEATURE_TTL_NDVI", str(5 * 24 * 3600))),  # Sentinel-2 revisit
+    "weather": int(os.getenv("FEATURE_TTL_WEATHER", str(6 * 3600)))
+}
+
+# SQLite limits bound parameters per statement; keys have 3 parameters each
+_QUERY_CHUNK = 300
+
+# Bytes of the database file SQLite reads through mmap. Mapped pages live in
+# the OS page cache, so worker processes read one shared copy instead of each
+# filling a private page cache (0 disables)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def geometry_hash(geometry: Dict) -> str:
+    """Stable hash of a GeoJSON geometry (coordinates rounded to ~10 cm)"""
+    def normalize(value):
+        if isinstance(value, float):
+            return round(value, 6)
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        return value
+
+    canonical = json.dumps(normalize(geometry or {}), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def feature_key(payload: Dict) -> FeatureKey:
+    """Feature store key for a scoring payload"""
+    observation_date = payload.get("observation_date") or date.today().isoformat()
+    crop = (payload.get("crop_type") or "unknown").lower()
+    return geometry_hash(payload.get("geometry")), crop, str(observation_date)
+
+
+class FeatureStore:
+    """SQLite-backed feature store with per-family TTL and hit-rate counters"""
+
+    def __init__(self, path: str, version: str = FEATURE_SET_VERSION,
+                 ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.version = version
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._stats = {family: {"hits": 0, "misses": 0} for family in FEATURE_FAMILIES}
+
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS features (
+                    geometry_hash TEXT NOT NULL,
+                    crop TEXT NOT NULL,
+                    obs_date TEXT NOT NULL,
+                    family TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    computed_at REAL NOT NULL,
+                    PRIMARY KEY (geometry_hash, crop, obs_date, family, version)
+                ) WITHOUT ROWID
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside a writer"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: Iterable[FeatureKey], family: str) -> Dict[FeatureKey, Dict]:
+        """
+        Bulk read of one feature family.
+
+        Returns:
+            Dict of key -> features for keys that are present and not expired
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        min_computed_at = time.time() - self.ttls[family]
+        found = {}
+
+        conn = self._connection()
+        for start in range(0, len(unique_keys), _QUERY_CHUNK):
+            chunk = unique_keys[start:start + _QUERY_CHUNK]
+            values = ",".join(["(?, ?, ?)"] * len(chunk))
+            params = [part for key in chunk for part in key]
+            rows = conn.execute(
+                f"""
+                SELECT geometry_hash, crop, obs_date, payload FROM features
+                WHERE family = ? AND version = ? AND computed_at >= ?
+                  AND (geometry_hash, crop, obs_date) IN (VALUES {values})
+                """,
+                [family, self.version, min_computed_at] + params
+            ).fetchall()
+            for geometry, crop, obs_date, payload in rows:
+                found[(geometry, crop, obs_date)] = json.loads(payload)
+
+        with self._stats_lock:
+            self._stats[family]["hits"] += len(found)
+            self._stats[family]["misses"] += len(unique_keys) - len(found)
+        return found
+
+    def put_many(self, rows: Dict[FeatureKey, Dict], family: str):
+        """Bulk write (upsert) of one feature family"""
+        if not rows:
+            return
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO features
+                    (geometry_hash, crop, obs_date, family, version, payload, computed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (key[0], key[1], key[2], family, self.version, json.dumps(features), now)
+                    for key, features in rows.items()
+                ]
+            )
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and rows from older feature-set versions"""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            deleted = conn.execute("DELETE FROM features WHERE version != ?", (self.version,)).rowcount
+            for family, ttl in self.ttls.items():
+                deleted += conn.execute(
+                    "DELETE FROM features WHERE family = ? AND computed_at < ?",
+                    (family, now - ttl)
+                ).rowcount
+        return deleted
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and hit rate, overall and per family"""
+        with self._stats_lock:
+            families = {family: dict(counts) for family, counts in self._stats.items()}
+
+        for counts in families.values():
+            total = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / total, 4) if total else 0.0
+
+        hits = sum(c["hits"] for c in families.values())
+        misses = sum(c["misses"] for c in families.values())
+        return {
+            "version": self.version,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "families": families
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store() -> Optional[FeatureStore]:
+    """Process-wide feature store; disabled when FEATURE_STORE_PATH is empty"""
+    global _store
+    path = os.getenv("FEATURE_STORE_PATH", "feature_store.db")
+    if not path:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FeatureStore(path)
+    return _store
@@ -0,0 +1,42 @@
+"""
+Production serving: pre-fork uvicorn workers behind gunicorn.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported and the scoring model loaded in the master before
+workers fork, so model arrays are shared copy-on-write instead of loaded
+once per worker. Feature and weather stores are opened per worker (SQLite
+connections must not cross a fork) and read the shared database file
+through mmap (SQLITE_MMAP_SIZE). Each worker warms up on start; /ready
+answers 503 until it has.
+
+Model activation and shadow changes (/models/...) are handled by one worker
+and recorded in the registry state file; the other workers pick them up
+within MODEL_REGISTRY_POLL_SECONDS (see model_registry.ModelRegistry.watch).
+
+Environment:
+    ML_BIND     address to listen on (default 0.0.0.0:8001)
+    ML_WORKERS  worker processes (default: one per CPU)
+"""
+import gc
+import multiprocessing
+import os
+
+
+bind = os.getenv("ML_BIND", "0.0.0.0:8001")
+workers = int(os.getenv("ML_WORKERS", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("ML_WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 30
+
+
+def when_ready(server):
+    """Master, after the app is imported and before workers fork"""
+    from model_registry import load_active_model
+
+    model = load_active_model()
+    server.log.info("Preloaded model %s", model.version if model else "formula")
+    # Keep the collector from touching (and so un-sharing) pre-fork objects
+    gc.freeze()
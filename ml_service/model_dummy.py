@@ -1,127 +1,348 @@
 """
-Mock NDVI and weather feature extraction for MVP.
+NDVI and weather feature extraction.
+NDVI is read from local red/NIR scenes (see ndvi.py) when NDVI_SCENE_DIR is
+set; weather comes from ingested daily observations (see weather_store.py).
+Fields without a covering scene or weather data use mock values.
 In production, this would integrate with Sentinel Hub API and weather services.
+
+Features and scores are computed column-wise over NumPy arrays so a whole
+batch of fields is processed in one pass; the single-field functions are
+thin wrappers around the batch versions.
 """
-import random
-from typing import Dict
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model_registry import get_active_model, get_registry
+from model_runtime import ScoringModel
+from ndvi import PERCENTILES, field_ndvi
+from weather_client import get_weather_client
+from weather_store import field_location, get_weather_store
+from feature_store import FEATURE_FAMILIES, FeatureStore, feature_key, get_feature_store
+
+
+_rng = np.random.default_rng()
+
+# NDVI bonus per crop type
+CROP_FACTORS = {
+    "wheat": 0.05,
+    "corn": 0.08,
+    "rice": 0.07,
+    "soybean": 0.06,
+    "cotton": 0.04
+}
+
+FACTOR_DESCRIPTIONS = {
+    "vegetation_health": "NDVI-based crop health indicator",
+    "field_stability": "Consistency of vegetation across field",
+    "farm_size": "Field acreage assessment",
+    "rainfall_adequacy": "30-day rainfall in mm",
+    "drought_resilience": "Resistance to drought conditions"
+}
+
+
+def _compute_ndvi(payloads: List[Dict], crop_type: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """NDVI features from local scenes, mock values for fields no scene covers; also the observed-row mask"""
+    n = len(crop_type)
+    # NDVI ranges from -1 to 1, with healthy vegetation typically 0.3-0.8
+    base_ndvi = 0.6
+    # Add some variation based on crop type
+    crop_bonus = np.array([CROP_FACTORS.get(c.lower(), 0.0) for c in crop_type], dtype=np.float64)
+    mean_ndvi = np.minimum(0.85, base_ndvi + crop_bonus + _rng.uniform(-0.1, 0.1, n))
+    ndvi_variance = _rng.uniform(0.02, 0.08, n)
+
+    columns = {
+        "mean_ndvi": mean_ndvi,
+        "ndvi_variance": ndvi_variance
+    }
+    # Mock percentiles assume a normal distribution around the mean
+    std = np.sqrt(ndvi_variance)
+    for p, z in zip(PERCENTILES, (-1.2816, 0.0, 1.2816)):
+        columns[f"ndvi_p{p}"] = np.clip(mean_ndvi + z * std, -1, 1)
+
+    observed = np.zeros(n, dtype=bool)
+    if os.getenv("NDVI_SCENE_DIR"):
+        for i, payload in enumerate(payloads):
+            stats = field_ndvi(payload.get("geometry") or {}, payload.get("observation_date"))
+            if stats is not None:
+                observed[i] = True
+                for name, column in columns.items():
+                    column[i] = stats[name]
+
+    return {name: np.round(column, 3) for name, column in columns.items()}, observed
+
+
+def _compute_weather(payloads: List[Dict], crop_type: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Weather features from the weather store, mock values for locations without data; also the observed-row mask"""
+    n = len(crop_type)
+    columns = {
+        "avg_temperature": 25.0 + _rng.uniform(-5, 5, n),
+        "rainfall_30d": 40.0 + _rng.uniform(-20, 30, n),
+        "drought_index": np.clip(0.3 + _rng.uniform(-0.2, 0.2, n), 0, 1)
+    }
+
+    store = get_weather_store()
+    keys = [(field_location(p.get("geometry")), p.get("observation_date")) for p in payloads]
+    looked_up = {key: store.features(*key) for key in dict.fromkeys(keys) if key[0] is not None}
+
+    # Cells without stored data are fetched once per cell from the weather API
+    client = get_weather_client()
+    missing = [key for key, found in looked_up.items() if found is None]
+    if client and missing:
+        fetched = client.fetch_many(missing)
+        if fetched:
+            store.ingest(obs for observations in fetched.values() for obs in observations)
+            for key in fetched:
+                looked_up[key] = store.features(*key)
+
+    observed = np.zeros(n, dtype=bool)
+    for i, key in enumerate(keys):
+        found = looked_up.get(key)
+        if found is not None:
+            observed[i] = True
+            for name, column in columns.items():
+                column[i] = found[name]
+
+    return {
+        "avg_temperature": np.round(columns["avg_temperature"], 1),
+        "rainfall_30d": np.round(columns["rainfall_30d"], 1),
+        "drought_index": np.round(columns["drought_index"], 2)
+    }, observed
+
+
+# family -> compute(payloads, crop_type) -> (feature columns, mask of rows computed from real data)
+FAMILY_COMPUTERS = {
+    "ndvi": _compute_ndvi,
+    "weather": _compute_weather
+}
+
+
+def compute_features_batch(payloads: List[Dict], store: Optional[FeatureStore] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute agronomic features for a batch of fields.
+    NDVI comes from local scenes and weather from the weather store; fields
+    without a covering scene or weather data get mock values.
+
+    Each feature family is first looked up in the feature store; only fields
+    missing from the store are computed, once per distinct key, and written back.
+    Mock values (no covering scene or weather data yet) are used for the response but never stored,
+    so data ingested later takes effect on the next request instead of after the TTL.
+
+    Args:
+        payloads: List of dicts containing crop_type, acreage, geometry and
+            optionally observation_date
+        store: Feature store to use (defaults to the process-wide store)
+
+    Returns:
+        Dict of feature name -> array with one entry per payload
+    """
+    if store is None:
+        store = get_feature_store()
+
+    n = len(payloads)
+    acreage = np.array([p.get("acreage", 1.0) for p in payloads], dtype=np.float64)
+    crop_type = np.array([p.get("crop_type", "unknown") for p in payloads], dtype=object)
+    features = {"acreage": acreage, "crop_type": crop_type}
+
+    keys = [feature_key(p) for p in payloads] if store else None
+
+    for family, names in FEATURE_FAMILIES.items():
+        compute = FAMILY_COMPUTERS[family]
+        if store is None:
+            features.update(compute(payloads, crop_type)[0])
+            continue
+
+        cached = store.get_many(keys, family)
+
+        # Compute each missing key once, even if it repeats within the batch
+        missing = {}
+        for i, key in enumerate(keys):
+            if key not in cached and key not in missing:
+                missing[key] = i
+        if missing:
+            rows = np.fromiter(missing.values(), dtype=np.int64, count=len(missing))
+            computed, observed = compute([payloads[i] for i in rows], crop_type[rows])
+            fresh = {
+                key: {name: computed[name][j].item() for name in names}
+                for j, key in enumerate(missing)
+            }
+            store.put_many({key: fresh[key] for j, key in enumerate(missing) if observed[j]}, family)
+            cached.update(fresh)
+
+        for name in names:
+            features[name] = np.fromiter((cached[key][name] for key in keys), dtype=np.float64, count=n)
+
+    return features
+
+
+def score_from_features_batch(features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Generate credit scores for a batch of feature columns.
+    Simple weighted formula; used when no model artifact is loaded (see model_runtime.py).
+
+    Args:
+        features: Dict of feature name -> array, as returned by compute_features_batch
+
+    Returns:
+        Tuple of (numeric_scores, risk_categories, contributions per factor)
+    """
+    ndvi = np.asarray(features["mean_ndvi"], dtype=np.float64)
+    ndvi_variance = np.asarray(features["ndvi_variance"], dtype=np.float64)
+    acreage = np.asarray(features["acreage"], dtype=np.float64)
+    rainfall = np.asarray(features["rainfall_30d"], dtype=np.float64)
+    drought_index = np.asarray(features["drought_index"], dtype=np.float64)
+
+    # Scoring formula (0-100 scale)
+    contributions = {
+        # NDVI contributes 50% (healthy vegetation = higher score)
+        "vegetation_health": ndvi * 50,
+        # Stability contributes 15% (lower variance = higher score)
+        "field_stability": np.maximum(0, (0.1 - ndvi_variance) / 0.1) * 15,
+        # Farm size contributes 10% (moderate size preferred)
+        "farm_size": np.minimum(acreage / 20, 1.0) * 10,
+        # Rainfall contributes 15% (adequate rainfall = higher score)
+        "rainfall_adequacy": np.minimum(rainfall / 50, 1.0) * 15,
+        # Drought risk contributes 10% (lower drought risk = higher score)
+        "drought_resilience": (1 - drought_index) * 10
+    }
+
+    # Calculate total score
+    numeric_scores = sum(contributions.values())
+    numeric_scores = np.clip(np.round(numeric_scores, 2), 0, 100)
+
+    # Determine risk category
+    risk_categories = np.where(
+        numeric_scores >= 70, "Low",
+        np.where(numeric_scores >= 40, "Medium", "High")
+    )
+
+    return numeric_scores, risk_categories, contributions
+
+
+def factor_values(features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Displayed value of each factor, column-wise"""
+    return {
+        "vegetation_health": np.round(np.asarray(features["mean_ndvi"], dtype=np.float64), 3),
+        "field_stability": np.round(np.asarray(features["ndvi_variance"], dtype=np.float64), 3),
+        "farm_size": np.round(np.asarray(features["acreage"], dtype=np.float64), 1),
+        "rainfall_adequacy": np.round(np.asarray(features["rainfall_30d"], dtype=np.float64), 1),
+        "drought_resilience": np.round(1 - np.asarray(features["drought_index"], dtype=np.float64), 2)
+    }
+
+
+def build_factors_batch(features: Dict[str, np.ndarray], contributions: Dict[str, np.ndarray],
+                        impacts: Optional[Dict[str, np.ndarray]] = None) -> List[Dict]:
+    """
+    Build factor explanations for every row of a batch.
+
+    "contribution" is in score points and the contributions add up to the
+    score. Model artifacts also report "impact": the signed change from the
+    model's baseline score (see model_runtime.py); the formula has none.
+
+    Rounding happens column-wise; only the final dict assembly is per row.
+    """
+    known = factor_values(features)
+    values = {
+        name: (known[name] if name in known else np.asarray(features[name], dtype=np.float64)).tolist()
+        for name in contributions
+    }
+    rounded = {name: np.round(column, 1).tolist() for name, column in contributions.items()}
+    n = len(next(iter(values.values())))
+
+    factors = [
+        {
+            name: {
+                "value": values[name][i],
+                "contribution": rounded[name][i],
+                "description": FACTOR_DESCRIPTIONS.get(name, name)
+            }
+            for name in contributions
+        }
+        for i in range(n)
+    ]
+    if impacts is not None:
+        rounded_impacts = {name: np.round(column, 1).tolist() for name, column in impacts.items()}
+        for i, row in enumerate(factors):
+            for name, factor in row.items():
+                factor["impact"] = rounded_impacts[name][i]
+    return factors
+
+
+def predict_batch(features: Dict[str, np.ndarray], model: Optional[ScoringModel] = None):
+    """
+    Score feature columns with the given or active model, or the weighted formula if none is loaded.
+
+    Returns:
+        Tuple of (numeric_scores, risk_categories, contributions, impacts or None)
+    """
+    model = model or get_active_model()
+    if model is None:
+        return (*score_from_features_batch(features), None)
+    return model.explain(features)
+
+
+def score_batch(payloads: List[Dict], model: Optional[ScoringModel] = None, observe: bool = True) -> List[Dict]:
+    """
+    Full pipeline for a batch: features -> scores -> factor explanations.
+
+    observe=False keeps the batch out of shadow comparison (synthetic rows, e.g. warm-up).
+
+    Returns:
+        List of {"numeric_score", "risk_category", "factors", "model_version"}
+        dicts in input order
+    """
+    if not payloads:
+        return []
+
+    # Take the active model once so a concurrent swap can't split the batch
+    model = model or get_active_model()
+    model_version = model.version if model else "formula"
+
+    features = compute_features_batch(payloads)
+    numeric_scores, risk_categories, contributions, impacts = predict_batch(features, model)
+    factors = build_factors_batch(features, contributions, impacts)
+    if observe:
+        get_registry().observe(features, numeric_scores, risk_categories)
+
+    return [
+        {"numeric_score": score, "risk_category": category, "factors": row_factors, "model_version": model_version}
+        for score, category, row_factors in zip(numeric_scores.tolist(), risk_categories.tolist(), factors)
+    ]
 
 
 def compute_features(payload: Dict) -> Dict:
     """
     Compute agronomic features from field data.
-    For MVP, uses mock data. In production, would fetch real NDVI and weather data.
-    
+    Single-field wrapper around compute_features_batch (scenes, weather store, mock fallback).
+
     Args:
         payload: Dict containing crop_type, acreage, and geometry
-        
+
     Returns:
         Dict of computed features
     """
-    acreage = payload.get("acreage", 1.0)
-    crop_type = payload.get("crop_type", "unknown")
-    
-    # Mock NDVI data (in production, fetch from Sentinel Hub)
-    # NDVI ranges from -1 to 1, with healthy vegetation typically 0.3-0.8
-    base_ndvi = 0.6
-    # Add some variation based on crop type
-    crop_factors = {
-        "wheat": 0.05,
-        "corn": 0.08,
-        "rice": 0.07,
-        "soybean": 0.06,
-        "cotton": 0.04
-    }
-    crop_bonus = crop_factors.get(crop_type.lower(), 0.0)
-    mean_ndvi = min(0.85, base_ndvi + crop_bonus + random.uniform(-0.1, 0.1))
-    
-    # Mock weather data
-    avg_temperature = 25.0 + random.uniform(-5, 5)
-    rainfall_30d = 40.0 + random.uniform(-20, 30)
-    drought_index = max(0, min(1, 0.3 + random.uniform(-0.2, 0.2)))
-    
+    batch = compute_features_batch([payload])
     return {
-        "acreage": acreage,
-        "crop_type": crop_type,
-        "mean_ndvi": round(mean_ndvi, 3),
-        "ndvi_variance": round(random.uniform(0.02, 0.08), 3),
-        "avg_temperature": round(avg_temperature, 1),
-        "rainfall_30d": round(rainfall_30d, 1),
-        "drought_index": round(drought_index, 2)
+        name: (column[0] if name == "crop_type" else column[0].item())
+        for name, column in batch.items()
     }
 
 
-def score_from_features(features: Dict) -> tuple[float, str, Dict]:
+def score_from_features(features: Dict, model: Optional[ScoringModel] = None) -> tuple[float, str, Dict]:
     """
     Generate credit score from agronomic features.
-    Uses a simple weighted formula for MVP. In production, would use trained ML model.
-    
+    Uses the loaded model artifact (see model_runtime.py), or the weighted
+    formula when no model is loaded.
+
     Args:
         features: Dict of computed features
-        
+
     Returns:
         Tuple of (numeric_score, risk_category, factors)
     """
-    ndvi = features["mean_ndvi"]
-    ndvi_variance = features["ndvi_variance"]
-    acreage = features["acreage"]
-    rainfall = features["rainfall_30d"]
-    drought_index = features["drought_index"]
-    
-    # Scoring formula (0-100 scale)
-    # NDVI contributes 50% (healthy vegetation = higher score)
-    ndvi_score = ndvi * 50
-    
-    # Stability contributes 15% (lower variance = higher score)
-    stability_score = max(0, (0.1 - ndvi_variance) / 0.1) * 15
-    
-    # Farm size contributes 10% (moderate size preferred)
-    size_score = min(acreage / 20, 1.0) * 10
-    
-    # Rainfall contributes 15% (adequate rainfall = higher score)
-    rainfall_score = min(rainfall / 50, 1.0) * 15
-    
-    # Drought risk contributes 10% (lower drought risk = higher score)
-    drought_score = (1 - drought_index) * 10
-    
-    # Calculate total score
-    numeric_score = ndvi_score + stability_score + size_score + rainfall_score + drought_score
-    numeric_score = max(0, min(100, round(numeric_score, 2)))
-    
-    # Determine risk category
-    if numeric_score >= 70:
-        risk_category = "Low"
-    elif numeric_score >= 40:
-        risk_category = "Medium"
-    else:
-        risk_category = "High"
-    
-    # Build factor explanations
-    factors = {
-        "vegetation_health": {
-            "value": round(ndvi, 3),
-            "contribution": round(ndvi_score, 1),
-            "description": "NDVI-based crop health indicator"
-        },
-        "field_stability": {
-            "value": round(ndvi_variance, 3),
-            "contribution": round(stability_score, 1),
-            "description": "Consistency of vegetation across field"
-        },
-        "farm_size": {
-            "value": round(acreage, 1),
-            "contribution": round(size_score, 1),
-            "description": "Field acreage assessment"
-        },
-        "rainfall_adequacy": {
-            "value": round(rainfall, 1),
-            "contribution": round(rainfall_score, 1),
-            "description": "30-day rainfall in mm"
-        },
-        "drought_resilience": {
-            "value": round(1 - drought_index, 2),
-            "contribution": round(drought_score, 1),
-            "description": "Resistance to drought conditions"
-        }
-    }
-    
-    return numeric_score, risk_category, factors
+    columns = {name: np.array([value]) for name, value in features.items()}
+    numeric_scores, risk_categories, contributions, impacts = predict_batch(columns, model)
+    factors = build_factors_batch(columns, contributions, impacts)[0]
+
+    return numeric_scores[0].item(), str(risk_categories[0]), factors
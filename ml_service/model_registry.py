@@ -0,0 +1,357 @@
+"""
+Local registry of versioned scoring model artifacts.
+
+The registry is a directory with one artifact directory per version
+(models/<version>/model.json + model.npz, see model_runtime.py). The
+committed registry.json names the default active and shadow versions
+(none: the built-in weighted formula scores until a version is activated).
+Activations are recorded in a separate runtime state file
+(MODEL_REGISTRY_STATE, default models/registry.state.json, not tracked), so
+a restart keeps the last activated model without modifying the checkout or
+the image.
+
+Activating a version loads and warms it up on a background thread, then
+swaps a single reference under a lock. Requests take the active model once
+and keep it for the whole request, so a swap never affects a request in
+flight. A shadow version, when set, scores the same features off the request
+path and its agreement with the active model is tracked.
+
+With several worker processes (gunicorn.conf.py) an activation is handled
+by one worker only. Every worker therefore runs a watcher thread that
+checks the runtime state file's mtime every MODEL_REGISTRY_POLL_SECONDS and
+loads the recorded active / shadow versions when another worker changed
+them, so all workers converge within the poll interval plus load time.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process serving only, no cross-worker lock needed
+    fcntl = None
+
+from model_runtime import ScoringModel, load_model, resolve_model_path
+
+
+# Rows used to warm up a newly loaded model before it takes traffic
+WARMUP_BATCH_SIZES = (1, 256)
+
+# How often a worker checks the runtime state file for changes made by other workers
+STATE_POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "2"))
+
+
+class ShadowStats:
+    """Running comparison of shadow vs active scores"""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.rows = 0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.category_matches = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def add(self, active_scores: np.ndarray, active_categories: np.ndarray,
+            shadow_scores: np.ndarray, shadow_categories: np.ndarray):
+        diff = np.abs(np.asarray(shadow_scores) - np.asarray(active_scores))
+        with self.lock:
+            self.rows += len(diff)
+            self.abs_diff_sum += float(diff.sum())
+            self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+            self.category_matches += int((np.asarray(shadow_categories) == np.asarray(active_categories)).sum())
+
+    def as_dict(self) -> Dict:
+        with self.lock:
+            return {
+                "version": self.version,
+                "rows": self.rows,
+                "mean_abs_diff": round(self.abs_diff_sum / self.rows, 3) if self.rows else None,
+                "max_abs_diff": round(self.max_abs_diff, 3),
+                "category_agreement": round(self.category_matches / self.rows, 4) if self.rows else None,
+                "errors": self.errors
+            }
+
+
+class ModelRegistry:
+    """Versioned artifacts with background loading, atomic swap and shadow scoring"""
+
+    def __init__(self, root: str, state_path: Optional[str] = None):
+        self.root = resolve_model_path(root)
+        self.state_path = state_path or os.path.join(self.root, "registry.state.json")
+        self._lock = threading.Lock()
+        self._active: Optional[ScoringModel] = None
+        self._shadow: Optional[ScoringModel] = None
+        self._shadow_stats: Optional[ShadowStats] = None
+        self._loading: Dict[str, Dict] = {}
+        self._pinned = False
+        self._state_mtime: Optional[int] = None  # state file version this process has applied
+        self._watcher: Optional[threading.Thread] = None
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        self._shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-shadow")
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+
+    def _path(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[Dict]:
+        """Metadata of every artifact in the registry, newest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            meta_path = os.path.join(self.root, name, "model.json")
+            if not os.path.isfile(meta_path):
+                continue
+            with open(meta_path, encoding="utf-8") as f:
+                metadata = json.load(f)
+            metadata["version"] = metadata.get("version", name)
+            metadata["registered_at"] = os.path.getmtime(meta_path)
+            found.append(metadata)
+        return sorted(found, key=lambda m: m["registered_at"], reverse=True)
+
+    def _read_state(self) -> Dict:
+        """Runtime state if any activation was recorded, else the committed defaults"""
+        for path in (self.state_path, os.path.join(self.root, "registry.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                continue
+        return {}
+
+    def _write_state(self, role: str, version: Optional[str]):
+        """
+        Record the version of one role. The other role is taken from the file,
+        not from this process, whose view may lag behind another worker's change;
+        the read-modify-write runs under an exclusive lock shared by all workers.
+        """
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.state_path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # released when the file is closed
+            recorded = self._read_state()
+            state = {"active": recorded.get("active"), "shadow": recorded.get("shadow")}
+            state[role] = version
+            state["updated_at"] = time.time()
+
+            # Unique temp file in the same directory: concurrent writers never share it,
+            # and os.replace is atomic, so readers see the old or the new state
+            f = tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory,
+                                            prefix=".registry-", suffix=".tmp", delete=False)
+            try:
+                with f:
+                    json.dump(state, f, indent=2)
+                os.replace(f.name, self.state_path)
+            except BaseException:
+                if os.path.exists(f.name):
+                    os.unlink(f.name)
+                raise
+
+    def _current_state_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.state_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def sync(self):
+        """
+        Follow activations recorded by other worker processes: changed
+        versions are loaded on the loader thread and swapped in as usual;
+        nothing is written back.
+        """
+        if self._pinned:
+            return
+        mtime = self._current_state_mtime()
+        if mtime is None or mtime == self._state_mtime:
+            return
+        self._state_mtime = mtime
+
+        state = self._read_state()
+        versions = {m["version"] for m in self.versions()}
+        with self._lock:
+            active = self._active.version if self._active else None
+            shadow = self._shadow.version if self._shadow else None
+            loading = {v for v, info in self._loading.items() if info["state"] == "loading"}
+
+        wanted = state.get("active")
+        if wanted in versions and wanted != active and wanted not in loading:
+            self._loader.submit(self._load, wanted, "active", False)
+        wanted = state.get("shadow")
+        if wanted is None and shadow is not None:
+            with self._lock:
+                self._shadow = None
+                self._shadow_stats = None
+        elif wanted in versions and wanted != shadow and wanted not in loading:
+            self._loader.submit(self._load, wanted, "shadow", False)
+
+    def watch(self, interval: float = STATE_POLL_SECONDS):
+        """Start the per-process watcher thread (call after fork: threads don't survive it)"""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"Registry sync failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="registry-watch", daemon=True)
+        self._watcher.start()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load_and_warm(self, version: str) -> ScoringModel:
+        path = self._path(version)
+        if os.path.basename(version) != version or not os.path.isfile(os.path.join(path, "model.json")):
+            raise FileNotFoundError(f"Model version {version} not found in {self.root}")
+        model = load_model(path)
+
+        # Run a few batches so the first real request doesn't pay for first-touch costs
+        rng = np.random.default_rng(0)
+        for size in WARMUP_BATCH_SIZES:
+            model.predict({name: rng.uniform(0, 1, size) for name in model.feature_names})
+        return model
+
+    def _load(self, version: str, role: str, persist: bool = True) -> ScoringModel:
+        with self._lock:
+            self._loading[version] = {"role": role, "state": "loading", "started_at": time.time()}
+        try:
+            model = self._load_and_warm(version)
+        except Exception as e:
+            with self._lock:
+                self._loading[version] = {"role": role, "state": "failed", "error": str(e)}
+            raise
+
+        with self._lock:
+            if role == "active":
+                self._active = model
+            else:
+                self._shadow = model
+                self._shadow_stats = ShadowStats(version)
+            self._loading.pop(version, None)
+            if persist:
+                self._write_state(role, version)
+        print(f"Model {version} ({model.metadata['type']}) is now {role}")
+        return model
+
+    def activate(self, version: str, wait: bool = False):
+        """Load, warm up and swap in a version; returns immediately unless wait=True"""
+        future = self._loader.submit(self._load, version, "active")
+        return future.result() if wait else future
+
+    def set_shadow(self, version: str, wait: bool = False):
+        future = self._loader.submit(self._load, version, "shadow")
+        return future.result() if wait else future
+
+    def clear_shadow(self):
+        """Stop shadow scoring (other workers follow through their watcher)"""
+        with self._lock:
+            self._shadow = None
+            self._shadow_stats = None
+            self._write_state("shadow", None)
+
+    def load_pinned(self, path: str) -> ScoringModel:
+        """Activate an artifact outside the registry (MODEL_PATH)"""
+        model = load_model(resolve_model_path(path))
+        with self._lock:
+            self._active = model
+            self._pinned = True
+        return model
+
+    def startup(self):
+        """
+        Activate the recorded version and restore the shadow. Nothing is
+        activated implicitly: without a recorded version the formula scores.
+        """
+        self._state_mtime = self._current_state_mtime()
+        state = self._read_state()
+        versions = [m["version"] for m in self.versions()]
+        if state.get("active") in versions:
+            self._load(state["active"], "active", persist=False)
+        else:
+            if state.get("active"):
+                print(f"Recorded model {state['active']} not found in {self.root}")
+            print("No model activated; using the built-in formula")
+        if state.get("shadow") in versions:
+            self._load(state["shadow"], "shadow", persist=False)
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    @property
+    def active(self) -> Optional[ScoringModel]:
+        return self._active
+
+    def observe(self, features: Dict[str, np.ndarray], scores: np.ndarray, categories: np.ndarray):
+        """Score the same features with the shadow model off the request path"""
+        shadow, stats = self._shadow, self._shadow_stats
+        if shadow is None or stats is None:
+            return
+
+        def compare():
+            try:
+                shadow_scores, shadow_categories, _ = shadow.predict(features)
+                stats.add(scores, categories, shadow_scores, shadow_categories)
+            except Exception:
+                with stats.lock:
+                    stats.errors += 1
+
+        self._shadow_pool.submit(compare)
+
+    def status(self) -> Dict:
+        with self._lock:
+            loading = {version: dict(info) for version, info in self._loading.items()}
+        return {
+            "active": self._active.version if self._active else None,
+            "shadow": self._shadow.version if self._shadow else None,
+            "loading": loading,
+            "shadow_stats": self._shadow_stats.as_dict() if self._shadow_stats else None
+        }
+
+
+_registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", "models"), os.getenv("MODEL_REGISTRY_STATE") or None)
+
+
+def get_registry() -> ModelRegistry:
+    return _registry
+
+
+def get_active_model() -> Optional[ScoringModel]:
+    return _registry.active
+
+
+def load_active_model() -> Optional[ScoringModel]:
+    """
+    Startup: MODEL_PATH pins a specific artifact; otherwise the registry's
+    recorded version is activated. Without one the built-in weighted
+    formula is used.
+
+    A no-op when a model is already active, e.g. in workers forked from a
+    gunicorn master that loaded it (see gunicorn.conf.py).
+    """
+    if _registry.active is not None:
+        return _registry.active
+    path = os.getenv("MODEL_PATH", "")
+    if path:
+        model = _registry.load_pinned(path)
+        print(f"Loaded pinned scoring model {model.version} from {path}")
+        return model
+    _registry.startup()
+    return _registry.active
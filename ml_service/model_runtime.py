@@ -0,0 +1,178 @@
+"""
+NumPy-only inference for exported scoring models.
+
+An artifact is a directory with two files:
+
+    model.json  metadata: type ("logistic" or "gbt"), version, features
+                (name, factor), risk thresholds
+    model.npz   parameter arrays
+
+Logistic regression arrays: mean, scale, coef (one per feature), intercept.
+Gradient-boosted trees are flattened into node arrays shared by all trees:
+feature, threshold, left, right (-1 for leaves), value (raw output the node
+would give as a leaf, internal nodes included), plus roots (root node of each
+tree), base_score and learning_rate.
+
+Both predict P(good repayment) for a batch of rows; the score is 100 * P.
+Per-feature attributions are computed in raw (logit) space - coefficient
+times standardized value for logistic regression, path-based attribution
+for trees - and scaled to score points. Two views are returned:
+
+    contribution  points that add up to the score, as for the weighted
+                  formula: an equal share of the model's baseline score
+                  plus the feature's impact
+    impact        signed change in score points from the baseline score
+                  (the impacts sum to score - baseline)
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+DEFAULT_THRESHOLDS = {"low": 70.0, "medium": 40.0}
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class ScoringModel(ABC):
+    """Base class: metadata handling and the logit -> score/contribution mapping"""
+
+    def __init__(self, metadata: Dict, arrays: Dict[str, np.ndarray]):
+        self.metadata = metadata
+        self.version = metadata.get("version", "unknown")
+        self.feature_names: List[str] = [f["name"] for f in metadata["features"]]
+        self.factor_names: List[str] = [f.get("factor", f["name"]) for f in metadata["features"]]
+        thresholds = metadata.get("risk_thresholds", DEFAULT_THRESHOLDS)
+        self.low_threshold = float(thresholds["low"])
+        self.medium_threshold = float(thresholds["medium"])
+        self.arrays = arrays
+
+    def matrix(self, features: Dict[str, np.ndarray]) -> np.ndarray:
+        """(rows x features) float matrix in model feature order"""
+        return np.column_stack([np.asarray(features[name], dtype=np.float64) for name in self.feature_names])
+
+    @abstractmethod
+    def raw(self, x: np.ndarray) -> Tuple[np.ndarray, float, np.ndarray]:
+        """Returns (raw logit per row, baseline logit, logit contribution per row and feature)"""
+
+    def predict(self, features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Score a batch of feature columns.
+
+        Returns:
+            Tuple of (numeric_scores, risk_categories, contributions per factor),
+            the same shape as model_dummy.score_from_features_batch
+        """
+        return self.explain(features)[:3]
+
+    def explain(self, features: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Score a batch and attribute it to factors.
+
+        Returns:
+            Tuple of (numeric_scores, risk_categories, contributions per factor,
+            impacts per factor); see the module docstring for the two views
+        """
+        x = self.matrix(features)
+        z, z_base, logit_contrib = self.raw(x)
+
+        scores = np.clip(np.round(100 * _sigmoid(z), 2), 0, 100)
+        base_score = 100 * _sigmoid(z_base)
+
+        # Split (score - baseline) across features in proportion to their logit share
+        delta = z - z_base
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(np.abs(delta) > 1e-12, (scores - base_score) / delta, 0.0)
+        points = logit_contrib * ratio[:, np.newaxis]
+        base_share = base_score / len(self.factor_names)
+
+        categories = np.where(
+            scores >= self.low_threshold, "Low",
+            np.where(scores >= self.medium_threshold, "Medium", "High")
+        )
+        contributions = {factor: base_share + points[:, j] for j, factor in enumerate(self.factor_names)}
+        impacts = {factor: points[:, j] for j, factor in enumerate(self.factor_names)}
+        return scores, categories, contributions, impacts
+
+
+class LogisticModel(ScoringModel):
+    def raw(self, x):
+        a = self.arrays
+        standardized = (x - a["mean"]) / a["scale"]
+        logit_contrib = standardized * a["coef"]
+        z_base = float(a["intercept"])
+        return z_base + logit_contrib.sum(axis=1), z_base, logit_contrib
+
+
+class GBTModel(ScoringModel):
+    def raw(self, x):
+        a = self.arrays
+        feature, threshold = a["feature"], a["threshold"]
+        left, right, value = a["left"], a["right"], a["value"]
+        roots = a["roots"]
+        learning_rate = float(a["learning_rate"])
+        n_rows, n_features = x.shape
+
+        # Walk all trees for all rows at once, one depth level per step
+        node = np.broadcast_to(roots, (n_rows, len(roots))).copy()
+        node_value = value[node]
+        flat_x = np.ascontiguousarray(x).ravel()
+        row_offset = (np.arange(n_rows) * n_features)[:, np.newaxis]
+        logit_contrib = np.zeros(n_rows * n_features)
+        for _ in range(int(self.metadata.get("max_depth", 32))):
+            left_child = left[node]
+            internal = left_child >= 0
+            if not internal.any():
+                break
+            cell = row_offset + np.maximum(feature[node], 0)
+            go_left = flat_x.take(cell) <= threshold[node]
+            child = np.where(internal, np.where(go_left, left_child, right[node]), node)
+            child_value = value[child]
+            # Path attribution: the change in node value is credited to the split feature
+            gain = (child_value - node_value) * learning_rate
+            logit_contrib += np.bincount(cell.ravel(), weights=gain.ravel(), minlength=n_rows * n_features)
+            node, node_value = child, child_value
+        logit_contrib = logit_contrib.reshape(n_rows, n_features)
+
+        z_base = float(a["base_score"]) + learning_rate * float(value[roots].sum())
+        z = float(a["base_score"]) + learning_rate * node_value.sum(axis=1)
+        return z, z_base, logit_contrib
+
+
+MODEL_TYPES = {
+    "logistic": LogisticModel,
+    "gbt": GBTModel
+}
+
+
+def load_model(path: str) -> ScoringModel:
+    """Load an artifact directory (model.json + model.npz)"""
+    with open(os.path.join(path, "model.json"), encoding="utf-8") as f:
+        metadata = json.load(f)
+    with np.load(os.path.join(path, "model.npz")) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+
+    model_type = metadata.get("type")
+    if model_type not in MODEL_TYPES:
+        raise ValueError(f"Unknown model type {model_type!r} in {path}")
+    return MODEL_TYPES[model_type](metadata, arrays)
+
+
+def save_model(path: str, metadata: Dict, arrays: Dict[str, np.ndarray]):
+    """Write an artifact directory"""
+    os.makedirs(path, exist_ok=True)
+    np.savez(os.path.join(path, "model.npz"), **arrays)
+    with open(os.path.join(path, "model.json"), "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def resolve_model_path(path: str) -> str:
+    """Relative paths are resolved against the ml_service directory"""
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
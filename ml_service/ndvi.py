@@ -0,0 +1,251 @@
+"""
+NDVI extraction from local red / near-infrared band rasters.
+
+A scene is a directory holding two 2-D band arrays stored as .npy files
+(red.npy, nir.npy) and a scene.json sidecar with the georeference:
+
+    {
+        "date": "2024-06-01",
+        "transform": [origin_lon, pixel_width, origin_lat, pixel_height],
+        "scale": 0.0001,      # reflectance = DN * scale
+        "nodata": 0
+    }
+
+Coordinates are WGS84 lon/lat like the GeoJSON sent to /score; pixel_height
+is negative (rows go south). Bands are opened memory-mapped and only the
+bounding-box window of the field is read, so memory use depends on the field
+size, not the scene size. The polygon is rasterized to a mask over the window
+pixel centers with a vectorized even-odd test.
+"""
+import json
+import os
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+PERCENTILES = (10, 50, 90)
+
+# Rows rasterized per block; bounds the temporary arrays for large fields
+MASK_BLOCK_ROWS = 256
+
+
+class Scene:
+    """Memory-mapped red/NIR scene"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "scene.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.date = meta.get("date")
+        self.origin_x, self.pixel_width, self.origin_y, self.pixel_height = meta["transform"]
+        self.scale = meta.get("scale", 1.0)
+        self.nodata = meta.get("nodata")
+
+        self.red = np.load(os.path.join(path, "red.npy"), mmap_mode="r")
+        self.nir = np.load(os.path.join(path, "nir.npy"), mmap_mode="r")
+        if self.red.shape != self.nir.shape:
+            raise ValueError(f"Band shapes differ in {path}: {self.red.shape} vs {self.nir.shape}")
+        self.height, self.width = self.red.shape
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """(min_x, min_y, max_x, max_y)"""
+        x2 = self.origin_x + self.width * self.pixel_width
+        y2 = self.origin_y + self.height * self.pixel_height
+        return min(self.origin_x, x2), min(self.origin_y, y2), max(self.origin_x, x2), max(self.origin_y, y2)
+
+    def window(self, bbox: Tuple[float, float, float, float]) -> Optional[Tuple[slice, slice]]:
+        """Row/column slices covering bbox, clipped to the scene; None if disjoint"""
+        min_x, min_y, max_x, max_y = bbox
+        cols = sorted(((min_x - self.origin_x) / self.pixel_width, (max_x - self.origin_x) / self.pixel_width))
+        rows = sorted(((min_y - self.origin_y) / self.pixel_height, (max_y - self.origin_y) / self.pixel_height))
+
+        col_start, col_stop = max(int(np.floor(cols[0])), 0), min(int(np.ceil(cols[1])), self.width)
+        row_start, row_stop = max(int(np.floor(rows[0])), 0), min(int(np.ceil(rows[1])), self.height)
+        if col_start >= col_stop or row_start >= row_stop:
+            return None
+        return slice(row_start, row_stop), slice(col_start, col_stop)
+
+    def pixel_centers(self, rows: slice, cols: slice) -> Tuple[np.ndarray, np.ndarray]:
+        """Center coordinates (x of each column, y of each row) for a window"""
+        xs = self.origin_x + (np.arange(cols.start, cols.stop) + 0.5) * self.pixel_width
+        ys = self.origin_y + (np.arange(rows.start, rows.stop) + 0.5) * self.pixel_height
+        return xs, ys
+
+
+def polygon_rings(geometry: Dict) -> List[np.ndarray]:
+    """All rings (outer and holes) of a GeoJSON Polygon / MultiPolygon as (n, 2) arrays"""
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+
+    if geometry_type == "Polygon":
+        polygons = [coordinates]
+    elif geometry_type == "MultiPolygon":
+        polygons = coordinates
+    else:
+        return []
+
+    return [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon if len(ring) >= 3]
+
+
+def rasterize(rings: Sequence[np.ndarray], xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of pixel centers inside the polygon (even-odd rule).
+
+    Holes and multi-part polygons fall out of the even-odd rule, so all rings
+    are treated the same. Work is vectorized over pixels and looped over edges.
+    """
+    mask = np.zeros((len(ys), len(xs)), dtype=bool)
+    px = xs[np.newaxis, :]
+
+    for block_start in range(0, len(ys), MASK_BLOCK_ROWS):
+        py = ys[block_start:block_start + MASK_BLOCK_ROWS, np.newaxis]
+        block = mask[block_start:block_start + MASK_BLOCK_ROWS]
+
+        for ring in rings:
+            x1, y1 = ring[:, 0], ring[:, 1]
+            x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+            for ax, ay, bx, by in zip(x1, y1, x2, y2):
+                if ay == by:
+                    continue
+                crosses = (ay > py) != (by > py)
+                x_cross = ax + (py - ay) * (bx - ax) / (by - ay)
+                block ^= crosses & (px < x_cross)
+
+    return mask
+
+
+def bounding_box(rings: Sequence[np.ndarray]) -> Tuple[float, float, float, float]:
+    points = np.concatenate(rings)
+    return points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()
+
+
+def ndvi_stats(scene: Scene, geometry: Dict,
+               percentiles: Sequence[int] = PERCENTILES) -> Optional[Dict[str, float]]:
+    """
+    NDVI statistics for the part of the field covered by the scene.
+
+    Returns:
+        Dict with mean_ndvi, ndvi_variance, ndvi_p<N> and pixel_count,
+        or None if no valid pixel of the field falls inside the scene
+    """
+    rings = polygon_rings(geometry)
+    if not rings:
+        return None
+
+    window = scene.window(bounding_box(rings))
+    if window is None:
+        return None
+    rows, cols = window
+
+    xs, ys = scene.pixel_centers(rows, cols)
+    mask = rasterize(rings, xs, ys)
+
+    # Only the window is paged in from the memory-mapped bands
+    red = np.asarray(scene.red[rows, cols], dtype=np.float32)
+    nir = np.asarray(scene.nir[rows, cols], dtype=np.float32)
+    if scene.nodata is not None:
+        mask &= (red != scene.nodata) & (nir != scene.nodata)
+
+    red = red[mask] * scene.scale
+    nir = nir[mask] * scene.scale
+    total = red + nir
+    valid = total > 0
+    if not valid.any():
+        return None
+
+    ndvi = (nir[valid] - red[valid]) / total[valid]
+    stats = {
+        "mean_ndvi": round(float(ndvi.mean()), 3),
+        "ndvi_variance": round(float(ndvi.var()), 3),
+        "pixel_count": int(ndvi.size)
+    }
+    for p, value in zip(percentiles, np.percentile(ndvi, percentiles)):
+        stats[f"ndvi_p{p}"] = round(float(value), 3)
+    return stats
+
+
+def list_scenes(scene_dir: str) -> List[str]:
+    """Scene directories under scene_dir, oldest first (directory names sort by date)"""
+    if not scene_dir or not os.path.isdir(scene_dir):
+        return []
+    return [
+        os.path.join(scene_dir, name)
+        for name in sorted(os.listdir(scene_dir))
+        if os.path.isfile(os.path.join(scene_dir, name, "scene.json"))
+    ]
+
+
+_scene_cache: Dict[str, Scene] = {}
+
+
+def open_scene(path: str) -> Scene:
+    """Open a scene once per process; memory maps are shared by all requests"""
+    scene = _scene_cache.get(path)
+    if scene is None:
+        scene = _scene_cache[path] = Scene(path)
+    return scene
+
+
+def field_ndvi(geometry: Dict, observation_date: Optional[str] = None,
+               scene_dir: Optional[str] = None) -> Optional[Dict[str, float]]:
+    """
+    NDVI statistics from the most recent scene on or before observation_date
+    that covers the field.
+
+    Returns:
+        Stats as in ndvi_stats(), or None if NDVI_SCENE_DIR has no covering scene
+    """
+    scene_dir = scene_dir if scene_dir is not None else os.getenv("NDVI_SCENE_DIR", "")
+    cutoff = observation_date or date.today().isoformat()
+
+    for path in reversed(list_scenes(scene_dir)):
+        scene = open_scene(path)
+        if scene.date and scene.date > cutoff:
+            continue
+        stats = ndvi_stats(scene, geometry)
+        if stats is not None:
+            return stats
+    return None
+
+
+def write_synthetic_scene(path: str, scene_date: str = "2024-06-01",
+                          origin: Tuple[float, float] = (69.0, 41.5), shape: Tuple[int, int] = (64, 64),
+                          pixel_size: float = 0.001, seed: int = 0,
+                          ndvi_range: Tuple[float, float] = (0.2, 0.8)) -> str:
+    """
+    Write a small synthetic scene with a known NDVI pattern.
+
+    NDVI rises linearly from ndvi_range[0] at the west edge to ndvi_range[1]
+    at the east edge, so the expected statistics of any field follow from its
+    longitude.
+    """
+    height, width = shape
+    ndvi = np.tile(np.linspace(ndvi_range[0], ndvi_range[1], width, dtype=np.float64), (height, 1))
+    rng = np.random.default_rng(seed)
+    red_reflectance = rng.uniform(0.05, 0.1, shape)
+    # nir chosen so that (nir - red) / (nir + red) == ndvi
+    nir_reflectance = red_reflectance * (1 + ndvi) / (1 - ndvi)
+
+    scale = 0.0001
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "red.npy"), np.round(red_reflectance / scale).astype(np.uint16))
+    np.save(os.path.join(path, "nir.npy"), np.round(nir_reflectance / scale).astype(np.uint16))
+    with open(os.path.join(path, "scene.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "date": scene_date,
+            "transform": [origin[0], pixel_size, origin[1], -pixel_size],
+            "scale": scale,
+            "nodata": 0
+        }, f, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join("fixtures", "scenes", "2024-06-01")
+    print(f"Synthetic scene written to {write_synthetic_scene(target)}")
@@ -0,0 +1,371 @@
+"""
+Per-field NDVI time series over dated scenes.
+
+Every (field, scene) pair is processed once: mean NDVI per pair is persisted
+in SQLite, so adding a scene to NDVI_SCENE_DIR only processes that scene.
+New scenes are processed in parallel, one scene per worker process; workers
+write into a shared-memory result array instead of pickling results back.
+The worker pool is created on first use and kept for the life of the
+process. Scenes without a valid "date" in scene.json are skipped.
+Season aggregates (peak NDVI, green-up date, trend slope) are then computed
+for all fields at once over the (fields x dates) stack.
+"""
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from multiprocessing import get_context, shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from feature_store import geometry_hash
+from ndvi import list_scenes, ndvi_stats, open_scene
+
+
+NDVI_WORKERS = int(os.getenv("NDVI_WORKERS", str(os.cpu_count() or 1)))
+
+# Green-up: first date NDVI reaches this share of the rise from base to peak
+GREENUP_FRACTION = 0.5
+
+# SQLite limits bound parameters per statement
+_QUERY_CHUNK = 900
+
+
+class ObservationStore:
+    """Persisted mean NDVI per (field, scene); NULL marks a scene that misses the field"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ndvi_observations (
+                    geometry_hash TEXT NOT NULL,
+                    scene TEXT NOT NULL,
+                    obs_date TEXT NOT NULL,
+                    mean_ndvi REAL,
+                    pixel_count INTEGER NOT NULL,
+                    PRIMARY KEY (geometry_hash, scene)
+                ) WITHOUT ROWID
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, hashes: Sequence[str]) -> List[Tuple[str, str, str, Optional[float], int]]:
+        """All observations of the given fields"""
+        unique = list(dict.fromkeys(hashes))
+        rows = []
+        conn = self._connection()
+        for start in range(0, len(unique), _QUERY_CHUNK):
+            chunk = unique[start:start + _QUERY_CHUNK]
+            rows.extend(conn.execute(
+                f"""
+                SELECT geometry_hash, scene, obs_date, mean_ndvi, pixel_count FROM ndvi_observations
+                WHERE geometry_hash IN ({",".join("?" * len(chunk))})
+                """,
+                chunk
+            ).fetchall())
+        return rows
+
+    def put_many(self, rows: List[Tuple[str, str, str, Optional[float], int]]):
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO ndvi_observations
+                    (geometry_hash, scene, obs_date, mean_ndvi, pixel_count)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+
+
+def _process_scene(scene_path: str, scene_row: int, field_indices: List[int],
+                   geometries: List[Dict], shm_name: str, shape: Tuple[int, int, int]):
+    """
+    Worker: compute mean NDVI and pixel count of each field for one scene.
+
+    Results go to row scene_row of the shared (scenes, fields, 2) array.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    results = None
+    try:
+        results = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        scene = open_scene(scene_path)
+        for field_index, geometry in zip(field_indices, geometries):
+            stats = ndvi_stats(scene, geometry, percentiles=())
+            if stats is not None:
+                results[scene_row, field_index] = (stats["mean_ndvi"], stats["pixel_count"])
+            else:
+                results[scene_row, field_index] = (np.nan, 0)
+    finally:
+        results = None
+        shm.close()
+
+
+_undated_scenes = set()
+
+
+def _scene_date(path: str) -> Optional[str]:
+    """ISO date from scene.json; None (with a one-time warning) if missing or malformed"""
+    scene_date = open_scene(path).date
+    try:
+        return date.fromisoformat(scene_date).isoformat()
+    except (TypeError, ValueError):
+        if path not in _undated_scenes:
+            _undated_scenes.add(path)
+            print(f"Skipping NDVI scene {path}: no valid date in scene.json ({scene_date!r})")
+        return None
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Scene worker pool of this process, created on first use and shared by all requests"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A forked server worker must not reuse its parent's pool
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn: forking a threaded server process is unsafe
+            _pool = ProcessPoolExecutor(max_workers=NDVI_WORKERS, mp_context=get_context("spawn"))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next request starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def update_observations(geometries: List[Dict], store: ObservationStore,
+                        scene_dir: Optional[str] = None, workers: int = NDVI_WORKERS) -> int:
+    """
+    Process every (field, scene) pair not yet in the store. With workers > 1
+    scenes go to the process-wide pool (NDVI_WORKERS processes).
+
+    Returns:
+        Number of scenes that had to be processed
+    """
+    scene_dir = scene_dir if scene_dir is not None else os.getenv("NDVI_SCENE_DIR", "")
+    scenes = [path for path in list_scenes(scene_dir) if _scene_date(path) is not None]
+    if not scenes or not geometries:
+        return 0
+
+    hashes = [geometry_hash(g) for g in geometries]
+    fields = list(dict.fromkeys(hashes))
+    field_geometry = {h: g for h, g in zip(hashes, geometries)}
+    done = {(h, scene) for h, scene, _, _, _ in store.get_many(fields)}
+
+    # scene path -> indices (into fields) still to process
+    pending = {}
+    for path in scenes:
+        name = os.path.basename(path)
+        missing = [i for i, h in enumerate(fields) if (h, name) not in done]
+        if missing:
+            pending[path] = missing
+    if not pending:
+        return 0
+
+    shape = (len(pending), len(fields), 2)
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    results = None
+    try:
+        results = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        results.fill(np.nan)
+
+        tasks = [
+            (path, row, indices, [field_geometry[fields[i]] for i in indices], shm.name, shape)
+            for row, (path, indices) in enumerate(pending.items())
+        ]
+        if workers > 1 and len(tasks) > 1:
+            pool = _get_pool()
+            try:
+                for future in [pool.submit(_process_scene, *task) for task in tasks]:
+                    future.result()
+            except BrokenProcessPool:
+                _discard_pool(pool)
+                raise
+        else:
+            for task in tasks:
+                _process_scene(*task)
+
+        rows = []
+        for row, (path, indices) in enumerate(pending.items()):
+            name, obs_date = os.path.basename(path), _scene_date(path)
+            for i in indices:
+                mean_ndvi, pixel_count = results[row, i]
+                rows.append((
+                    fields[i], name, obs_date,
+                    None if np.isnan(mean_ndvi) else float(mean_ndvi),
+                    0 if np.isnan(pixel_count) else int(pixel_count)
+                ))
+    finally:
+        # The view must be released before the segment can be closed
+        results = None
+        shm.close()
+        shm.unlink()
+
+    store.put_many(rows)
+    return len(pending)
+
+
+def build_stack(hashes: Sequence[str], store: ObservationStore) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    NDVI time stack for the given fields.
+
+    Returns:
+        Tuple of (dates as datetime64[D], (fields x dates) mean NDVI with NaN gaps)
+    """
+    observations = [row for row in store.get_many(hashes) if row[3] is not None]
+    dates = np.array(sorted({row[2] for row in observations}), dtype="datetime64[D]")
+    stack = np.full((len(hashes), len(dates)), np.nan)
+
+    row_of = {}
+    for i, h in enumerate(hashes):
+        row_of.setdefault(h, []).append(i)
+    date_index = {str(d): j for j, d in enumerate(dates)}
+    for h, _, obs_date, mean_ndvi, _ in observations:
+        stack[row_of[h], date_index[obs_date]] = mean_ndvi
+    return dates, stack
+
+
+def season_aggregates(dates: np.ndarray, stack: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Growth-curve aggregates for every field, vectorized over the stack.
+
+    Returns:
+        Dict of column -> array (one entry per field): observations, peak_ndvi,
+        peak_date, greenup_date and trend_slope (NDVI per 30 days). Dates are
+        NaT and values NaN where a field has too few observations.
+    """
+    n_fields, n_dates = stack.shape
+    nat = np.datetime64("NaT", "D")
+    if n_dates == 0:
+        return {
+            "observations": np.zeros(n_fields, dtype=np.int64),
+            "peak_ndvi": np.full(n_fields, np.nan),
+            "peak_date": np.full(n_fields, nat),
+            "greenup_date": np.full(n_fields, nat),
+            "trend_slope": np.full(n_fields, np.nan)
+        }
+
+    valid = ~np.isnan(stack)
+    counts = valid.sum(axis=1)
+    has_data = counts > 0
+    position = np.arange(n_dates)
+
+    # Peak
+    peak_index = np.argmax(np.where(valid, stack, -np.inf), axis=1)
+    peak = np.where(has_data, stack[np.arange(n_fields), peak_index], np.nan)
+
+    # Green-up: first date up to the peak crossing base + fraction * (peak - base)
+    before_peak = valid & (position[np.newaxis, :] <= peak_index[:, np.newaxis])
+    base = np.where(before_peak, stack, np.inf).min(axis=1)
+    threshold = base + GREENUP_FRACTION * (peak - base)
+    reached = before_peak & (stack >= threshold[:, np.newaxis])
+    greenup_index = np.argmax(reached, axis=1)
+
+    # Least-squares trend over all valid observations
+    days = (dates - dates[0]).astype(np.float64)
+    t = np.where(valid, days[np.newaxis, :], 0.0)
+    y = np.where(valid, stack, 0.0)
+    sum_t, sum_y = t.sum(axis=1), y.sum(axis=1)
+    denominator = counts * (t * t).sum(axis=1) - sum_t ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (counts * (t * y).sum(axis=1) - sum_t * sum_y) / denominator
+    slope = np.where((counts >= 2) & (denominator > 0), slope * 30, np.nan)
+
+    return {
+        "observations": counts,
+        "peak_ndvi": np.round(peak, 3),
+        "peak_date": np.where(has_data, dates[peak_index], nat),
+        "greenup_date": np.where(has_data, dates[greenup_index], nat),
+        "trend_slope": np.round(slope, 4)
+    }
+
+
+def field_timeseries(geometries: List[Dict], store: ObservationStore,
+                     include_series: bool = False, scene_dir: Optional[str] = None) -> Tuple[int, List[Dict]]:
+    """
+    Update observations and compute season aggregates for a list of fields.
+
+    Returns:
+        Tuple of (scenes processed, one result dict per field in input order)
+    """
+    processed = update_observations(geometries, store, scene_dir=scene_dir)
+    hashes = [geometry_hash(g) for g in geometries]
+    dates, stack = build_stack(hashes, store)
+    aggregates = season_aggregates(dates, stack)
+
+    def as_date(value) -> Optional[str]:
+        return None if np.isnat(value) else str(value)
+
+    def as_float(value) -> Optional[float]:
+        return None if np.isnan(value) else float(value)
+
+    results = []
+    for i in range(len(geometries)):
+        result = {
+            "observations": int(aggregates["observations"][i]),
+            "peak_ndvi": as_float(aggregates["peak_ndvi"][i]),
+            "peak_date": as_date(aggregates["peak_date"][i]),
+            "greenup_date": as_date(aggregates["greenup_date"][i]),
+            "trend_slope": as_float(aggregates["trend_slope"][i])
+        }
+        if include_series:
+            result["series"] = [
+                {"date": str(d), "mean_ndvi": round(float(v), 3)}
+                for d, v in zip(dates, stack[i]) if not np.isnan(v)
+            ]
+        results.append(result)
+    return processed, results
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_observation_store() -> ObservationStore:
+    """Process-wide observation store; shares the feature store database file"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.getenv("NDVI_TIMESERIES_PATH") or os.getenv("FEATURE_STORE_PATH") or "feature_store.db"
+                _store = ObservationStore(path)
+    return _store
+
+
+if __name__ == "__main__":
+    import sys
+    from datetime import timedelta
+
+    from ndvi import write_synthetic_scene
+
+    # Write a synthetic season: NDVI rises to a peak in early summer, then senesces
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join("fixtures", "season")
+    start = date(2024, 3, 1)
+    for step, level in enumerate([0.15, 0.25, 0.45, 0.65, 0.75, 0.7, 0.5, 0.3]):
+        scene_date = (start + timedelta(days=20 * step)).isoformat()
+        write_synthetic_scene(os.path.join(target, scene_date), scene_date=scene_date, seed=step,
+                              ndvi_range=(level - 0.1, level + 0.1))
+    print(f"Synthetic season written to {target}")
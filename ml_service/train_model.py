@@ -0,0 +1,189 @@
+"""
+Train and export scoring model artifacts with NumPy.
+
+Until labelled repayment outcomes are available, models are fitted on
+synthetic fields whose repayment label is drawn from the current weighted
+formula, so an exported model reproduces the formula's behaviour and the
+serving path can be exercised end to end. Replace `synthetic_dataset` with
+real outcomes to train a production model; the artifact format stays the same.
+
+Usage:
+    python train_model.py                   # writes models/logistic-v1 and models/gbt-v1
+    python train_model.py --type gbt --version gbt-v2 --out models/gbt-v2
+"""
+import argparse
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from model_runtime import save_model
+
+
+FEATURES = [
+    {"name": "mean_ndvi", "factor": "vegetation_health"},
+    {"name": "ndvi_variance", "factor": "field_stability"},
+    {"name": "acreage", "factor": "farm_size"},
+    {"name": "rainfall_30d", "factor": "rainfall_adequacy"},
+    {"name": "drought_index", "factor": "drought_resilience"}
+]
+
+
+def synthetic_dataset(n: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature matrix and repayment labels (1 = repaid) drawn from the weighted formula"""
+    from model_dummy import score_from_features_batch
+
+    rng = np.random.default_rng(seed)
+    features = {
+        "mean_ndvi": rng.uniform(0.2, 0.9, n),
+        "ndvi_variance": rng.uniform(0.0, 0.12, n),
+        "acreage": rng.gamma(2.0, 8.0, n),
+        "rainfall_30d": rng.uniform(0, 100, n),
+        "drought_index": rng.uniform(0, 1, n)
+    }
+    scores, _, _ = score_from_features_batch(features)
+    p_repay = 1 / (1 + np.exp(-(scores - 55) / 6))
+    labels = (rng.uniform(size=n) < p_repay).astype(np.float64)
+    x = np.column_stack([features[f["name"]] for f in FEATURES])
+    return x, labels
+
+
+def fit_logistic(x: np.ndarray, y: np.ndarray, l2: float = 1e-3, iterations: int = 25) -> Dict[str, np.ndarray]:
+    """Logistic regression on standardized features (Newton / IRLS)"""
+    mean, scale = x.mean(axis=0), x.std(axis=0)
+    scale[scale == 0] = 1.0
+    xs = np.column_stack([np.ones(len(x)), (x - mean) / scale])
+    w = np.zeros(xs.shape[1])
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-xs @ w))
+        gradient = xs.T @ (p - y) + l2 * np.r_[0, w[1:]]
+        hessian = (xs * (p * (1 - p))[:, np.newaxis]).T @ xs + l2 * np.diag(np.r_[0, np.ones(len(w) - 1)])
+        w -= np.linalg.solve(hessian, gradient)
+    return {"mean": mean, "scale": scale, "coef": w[1:], "intercept": np.array(w[0])}
+
+
+class _TreeBuilder:
+    """Greedy depth-limited regression trees on logloss gradients, stored as flat node arrays"""
+
+    def __init__(self, max_depth: int, min_samples: int, l2: float, n_thresholds: int = 16):
+        self.max_depth = max_depth
+        self.min_samples = min_samples
+        self.l2 = l2
+        self.n_thresholds = n_thresholds
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.value: List[float] = []
+
+    def build(self, x, g, h, idx, depth=0) -> int:
+        node = len(self.value)
+        self.feature.append(-1)
+        self.threshold.append(0.0)
+        self.left.append(-1)
+        self.right.append(-1)
+        # Newton step for the node; internal values serve path attribution
+        self.value.append(float(-g[idx].sum() / (h[idx].sum() + self.l2)))
+
+        if depth >= self.max_depth or len(idx) < 2 * self.min_samples:
+            return node
+
+        g_node, h_node = g[idx], h[idx]
+        parent = g_node.sum() ** 2 / (h_node.sum() + self.l2)
+        best = (0.0, None, None)
+        for j in range(x.shape[1]):
+            column = x[idx, j]
+            candidates = np.unique(np.quantile(column, np.linspace(0.05, 0.95, self.n_thresholds)))
+            goes_left = column[:, np.newaxis] <= candidates[np.newaxis, :]
+            g_left, h_left = g_node @ goes_left, h_node @ goes_left
+            n_left = goes_left.sum(axis=0)
+            g_right, h_right = g_node.sum() - g_left, h_node.sum() - h_left
+            gain = g_left ** 2 / (h_left + self.l2) + g_right ** 2 / (h_right + self.l2) - parent
+            gain[(n_left < self.min_samples) | (len(idx) - n_left < self.min_samples)] = -np.inf
+            k = int(np.argmax(gain))
+            if gain[k] > best[0]:
+                best = (float(gain[k]), j, float(candidates[k]))
+
+        _, j, threshold = best
+        if j is None:
+            return node
+
+        mask = x[idx, j] <= threshold
+        self.feature[node], self.threshold[node] = j, threshold
+        self.left[node] = self.build(x, g, h, idx[mask], depth + 1)
+        self.right[node] = self.build(x, g, h, idx[~mask], depth + 1)
+        return node
+
+
+def fit_gbt(x: np.ndarray, y: np.ndarray, n_trees: int = 60, max_depth: int = 3,
+            learning_rate: float = 0.2, min_samples: int = 50, l2: float = 1.0) -> Dict[str, np.ndarray]:
+    """Gradient-boosted trees for logloss, exported as flat node arrays"""
+    p0 = np.clip(y.mean(), 1e-6, 1 - 1e-6)
+    base_score = np.log(p0 / (1 - p0))
+    raw = np.full(len(y), base_score)
+    builder = _TreeBuilder(max_depth, min_samples, l2)
+    roots = []
+    all_rows = np.arange(len(y))
+
+    for _ in range(n_trees):
+        p = 1 / (1 + np.exp(-raw))
+        g, h = p - y, p * (1 - p)
+        root = builder.build(x, g, h, all_rows)
+        roots.append(root)
+
+        # Update predictions with the new tree
+        node = np.full(len(y), root)
+        for _ in range(max_depth):
+            left = np.asarray(builder.left)[node]
+            internal = left >= 0
+            go_left = x[all_rows, np.asarray(builder.feature)[node].clip(0)] <= np.asarray(builder.threshold)[node]
+            node = np.where(internal, np.where(go_left, left, np.asarray(builder.right)[node]), node)
+        raw += learning_rate * np.asarray(builder.value)[node]
+
+    return {
+        "feature": np.asarray(builder.feature, dtype=np.int32),
+        "threshold": np.asarray(builder.threshold, dtype=np.float64),
+        "left": np.asarray(builder.left, dtype=np.int32),
+        "right": np.asarray(builder.right, dtype=np.int32),
+        "value": np.asarray(builder.value, dtype=np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "base_score": np.array(base_score),
+        "learning_rate": np.array(learning_rate)
+    }
+
+
+def train(model_type: str, version: str, out: str, samples: int = 20000, seed: int = 0):
+    x, y = synthetic_dataset(samples, seed)
+    if model_type == "logistic":
+        arrays = fit_logistic(x, y)
+        extra = {}
+    else:
+        arrays = fit_gbt(x, y)
+        extra = {"max_depth": 3, "n_trees": int(len(arrays["roots"]))}
+
+    metadata = {
+        "type": model_type,
+        "version": version,
+        "features": FEATURES,
+        "risk_thresholds": {"low": 70, "medium": 40},
+        "training": {"samples": samples, "seed": seed, "source": "synthetic, labels from weighted formula"},
+        **extra
+    }
+    save_model(out, metadata, arrays)
+    print(f"Wrote {model_type} model {version} to {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and export a scoring model artifact")
+    parser.add_argument("--type", choices=["logistic", "gbt"])
+    parser.add_argument("--version")
+    parser.add_argument("--out")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.type:
+        version = args.version or f"{args.type}-v1"
+        train(args.type, version, args.out or f"models/{version}", args.samples, args.seed)
+    else:
+        train("logistic", "logistic-v1", "models/logistic-v1", args.samples, args.seed)
+        train("gbt", "gbt-v1", "models/gbt-v1", args.samples, args.seed)
@@ -0,0 +1,230 @@
+"""
+Client for a daily-weather HTTP API (Open-Meteo archive format).
+
+Requests are made per grid cell rather than per field: coordinates are
+snapped to the cell grid of weather_store, so neighbouring farms share one
+request. Concurrent requests for the same cell and date range are coalesced
+(single-flight) and responses are cached on disk with a TTL. All requests go
+through one pooled httpx.Client.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from weather_store import WEATHER_GRID_DEG, grid_cell
+
+
+CellRange = Tuple[str, str, str]  # (cell key, start date, end date)
+
+# Days of history fetched per request; covers the longest aggregate window
+HISTORY_DAYS = 90
+
+
+class _Flight:
+    """One in-progress request that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WeatherClient:
+    """Weather API client with grid snapping, single-flight and a TTL disk cache"""
+
+    def __init__(self, base_url: str, cache_dir: Optional[str] = "weather_cache",
+                 ttl: float = 6 * 3600, grid: float = WEATHER_GRID_DEG,
+                 timeout: float = 10.0, max_connections: int = 20):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.grid = grid
+        self._http = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self._lock = threading.Lock()
+        self._inflight: Dict[CellRange, _Flight] = {}
+        self._stats = {"requests": 0, "cache_hits": 0, "coalesced": 0, "errors": 0}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def close(self):
+        self._http.close()
+
+    # ------------------------------------------------------------------
+    # Grid
+    # ------------------------------------------------------------------
+
+    def snap(self, lon: float, lat: float) -> str:
+        """Cell key (south-west corner "lat,lon") containing the point"""
+        return grid_cell(lon, lat, self.grid)
+
+    def cell_center(self, cell: str) -> Tuple[float, float]:
+        """(lon, lat) of the cell center, sent to the API for the whole cell"""
+        lat, lon = (float(part) for part in cell.split(","))
+        return lon + self.grid / 2, lat + self.grid / 2
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    def fetch(self, lon: float, lat: float, end: Optional[str] = None,
+              days: int = HISTORY_DAYS) -> List[Dict]:
+        """
+        Daily observations for the cell containing (lon, lat).
+
+        Returns:
+            List of {"date", "location", "precipitation", "temperature"} dicts,
+            ready for WeatherStore.ingest
+        """
+        return self.fetch_cell(self.snap(lon, lat), end, days)
+
+    def fetch_cell(self, cell: str, end: Optional[str] = None, days: int = HISTORY_DAYS) -> List[Dict]:
+        end_date = date.fromisoformat(end[:10]) if end else date.today()
+        key = (cell, (end_date - timedelta(days=days - 1)).isoformat(), end_date.isoformat())
+
+        cached = self._read_cache(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            # Another leader may have finished between the cache check and the lock
+            result = self._read_cache(key, count_hit=False)
+            if result is None:
+                result = self._request(key)
+                self._write_cache(key, result)
+            flight.result = result
+            return result
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def fetch_many(self, cells: Iterable[Tuple[str, Optional[str]]], workers: int = 8) -> Dict[Tuple[str, Optional[str]], List[Dict]]:
+        """
+        Fetch several (cell, end) pairs concurrently.
+
+        Failed cells are left out of the result so callers can fall back.
+        """
+        unique = list(dict.fromkeys(cells))
+        results = {}
+        if not unique:
+            return results
+
+        def fetch_one(item):
+            try:
+                return item, self.fetch_cell(*item)
+            except httpx.HTTPError:
+                return item, None
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(unique))) as pool:
+            for item, observations in pool.map(fetch_one, unique):
+                if observations is not None:
+                    results[item] = observations
+        return results
+
+    def _request(self, key: CellRange) -> List[Dict]:
+        cell, start, end = key
+        lon, lat = self.cell_center(cell)
+        with self._lock:
+            self._stats["requests"] += 1
+        response = self._http.get(f"{self.base_url}/v1/archive", params={
+            "latitude": round(lat, 4),
+            "longitude": round(lon, 4),
+            "start_date": start,
+            "end_date": end,
+            "daily": "precipitation_sum,temperature_2m_mean"
+        })
+        response.raise_for_status()
+        daily = response.json()["daily"]
+        return [
+            {"date": day, "location": cell, "precipitation": precipitation, "temperature": temperature}
+            for day, precipitation, temperature in zip(
+                daily["time"], daily["precipitation_sum"], daily["temperature_2m_mean"]
+            )
+        ]
+
+    # ------------------------------------------------------------------
+    # Disk cache
+    # ------------------------------------------------------------------
+
+    def _cache_path(self, key: CellRange) -> str:
+        digest = hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _read_cache(self, key: CellRange, count_hit: bool = True) -> Optional[List[Dict]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        if count_hit:
+            with self._lock:
+                self._stats["cache_hits"] += 1
+        return entry["observations"]
+
+    def _write_cache(self, key: CellRange, observations: List[Dict]):
+        if not self.cache_dir:
+            return
+        path = self._cache_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": list(key), "fetched_at": time.time(), "observations": observations}, f)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_weather_client() -> Optional[WeatherClient]:
+    """Process-wide client; None unless WEATHER_API_URL is set"""
+    global _client
+    base_url = os.getenv("WEATHER_API_URL", "")
+    if not base_url:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WeatherClient(
+                    base_url,
+                    cache_dir=os.getenv("WEATHER_CACHE_DIR", "weather_cache") or None,
+                    ttl=float(os.getenv("WEATHER_CACHE_TTL", str(6 * 3600))),
+                    timeout=float(os.getenv("WEATHER_API_TIMEOUT", "10"))
+                )
+    return _client
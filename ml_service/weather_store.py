@@ -0,0 +1,299 @@
+"""
+Daily weather observations with rolling-window aggregates.
+
+Each location has one row per day from its first observation on. Every row
+carries running totals (prefix sums) of precipitation and temperature, so the
+sum or mean over any window is the difference of two rows, and the common
+7/30/90-day windows are stored precomputed on the row itself. Ingest is
+incremental: new days only rewrite rows from the earliest new day onward.
+
+Locations are either free-form region names (as in the backend Meteorology
+table) or grid cells derived from a field's centroid (see grid_cell).
+"""
+import math
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from feature_store import SQLITE_MMAP_SIZE
+
+PRECOMPUTED_WINDOWS = (7, 30, 90)
+
+# Grid cell size in degrees (~11 km at 0.1)
+WEATHER_GRID_DEG = float(os.getenv("WEATHER_GRID_DEG", "0.1"))
+
+# 30-day rainfall considered adequate when deriving the drought index
+DROUGHT_REFERENCE_MM = 60.0
+
+
+def geometry_centroid(geometry: Dict) -> Optional[Tuple[float, float]]:
+    """
+    Vertex centroid (lon, lat) of the outer ring of a GeoJSON Polygon / MultiPolygon.
+    None for other geometry types and malformed coordinates (the field gets mock weather).
+    """
+    if not isinstance(geometry, dict) or geometry.get("type") not in ("Polygon", "MultiPolygon"):
+        return None
+    coordinates = geometry.get("coordinates")
+    try:
+        if geometry["type"] == "MultiPolygon":
+            coordinates = coordinates[0]
+        ring = np.asarray(coordinates[0], dtype=np.float64)
+    except (TypeError, ValueError, IndexError, KeyError):
+        return None
+    if ring.ndim != 2 or ring.shape[0] == 0 or ring.shape[1] < 2:
+        return None
+    ring = ring[:, :2]
+    if not np.isfinite(ring).all():
+        return None
+    if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+        ring = ring[:-1]
+    lon, lat = ring.mean(axis=0)
+    return float(lon), float(lat)
+
+
+def grid_cell(lon: float, lat: float, size: float = WEATHER_GRID_DEG) -> str:
+    """Location key of the grid cell containing a point (south-west corner)"""
+    return f"{math.floor(lat / size) * size:.4f},{math.floor(lon / size) * size:.4f}"
+
+
+def field_location(geometry: Dict) -> Optional[str]:
+    centroid = geometry_centroid(geometry)
+    return grid_cell(*centroid) if centroid else None
+
+
+def drought_index(rainfall_30d: float, avg_temperature_30d: Optional[float]) -> float:
+    """0 (wet, mild) .. 1 (dry, hot) from 30-day rainfall and mean temperature"""
+    dryness = min(max(1 - rainfall_30d / DROUGHT_REFERENCE_MM, 0.0), 1.0)
+    heat = 0.0 if avg_temperature_30d is None else min(max((avg_temperature_30d - 20) / 15, 0.0), 1.0)
+    return round(0.7 * dryness + 0.3 * heat, 2)
+
+
+def _window_columns() -> List[str]:
+    return [f"{kind}_{w}d" for w in PRECOMPUTED_WINDOWS for kind in ("precip", "temp")]
+
+
+class WeatherStore:
+    """SQLite store of daily observations with prefix sums per location"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        window_columns = ",\n".join(f"{name} REAL" for name in _window_columns())
+        with self._connection() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS weather_daily (
+                    location TEXT NOT NULL,
+                    day INTEGER NOT NULL,            -- date.toordinal()
+                    precipitation REAL,              -- mm, NULL if not observed
+                    temperature REAL,                -- celsius, NULL if not observed
+                    cum_precip REAL NOT NULL,
+                    cum_precip_n INTEGER NOT NULL,
+                    cum_temp REAL NOT NULL,
+                    cum_temp_n INTEGER NOT NULL,
+                    {window_columns},
+                    PRIMARY KEY (location, day)
+                ) WITHOUT ROWID
+            """)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+            self._local.conn = conn
+        return conn
+
+    def ingest(self, observations: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Bulk upsert of daily observations.
+
+        Args:
+            observations: dicts with date (ISO), location or lat/lon,
+                and optional precipitation / temperature
+
+        Returns:
+            Counts of locations and observations ingested
+        """
+        by_location: Dict[str, Dict[int, Tuple[Optional[float], Optional[float]]]] = defaultdict(dict)
+        count = 0
+        for obs in observations:
+            location = obs.get("location")
+            if not location and obs.get("lat") is not None and obs.get("lon") is not None:
+                location = grid_cell(obs["lon"], obs["lat"])
+            if not location:
+                continue
+            day = date.fromisoformat(str(obs["date"])[:10]).toordinal()
+            by_location[location][day] = (obs.get("precipitation"), obs.get("temperature"))
+            count += 1
+
+        conn = self._connection()
+        with conn:
+            for location, new_days in by_location.items():
+                self._merge_location(conn, location, new_days)
+        return {"locations": len(by_location), "observations": count}
+
+    def _merge_location(self, conn: sqlite3.Connection, location: str,
+                        new_days: Dict[int, Tuple[Optional[float], Optional[float]]]):
+        """Rewrite rows of one location from its earliest new day onward"""
+        first_new = min(new_days)
+        first_existing = conn.execute(
+            "SELECT MIN(day) FROM weather_daily WHERE location = ?", (location,)
+        ).fetchone()[0]
+        first = first_new if first_existing is None else min(first_new, first_existing)
+        # Enough history before the first new day to recompute the longest window
+        start = max(first, first_new - max(PRECOMPUTED_WINDOWS))
+
+        base = conn.execute(
+            """
+            SELECT cum_precip, cum_precip_n, cum_temp, cum_temp_n FROM weather_daily
+            WHERE location = ? AND day < ? ORDER BY day DESC LIMIT 1
+            """,
+            (location, start)
+        ).fetchone() or (0.0, 0, 0.0, 0)
+        existing = conn.execute(
+            "SELECT day, precipitation, temperature FROM weather_daily WHERE location = ? AND day >= ?",
+            (location, start)
+        ).fetchall()
+
+        last = max(max(new_days), max((row[0] for row in existing), default=first_new))
+        n = last - start + 1
+        precip = np.full(n, np.nan)
+        temp = np.full(n, np.nan)
+        for day, p, t in existing:
+            precip[day - start] = np.nan if p is None else p
+            temp[day - start] = np.nan if t is None else t
+        for day, (p, t) in new_days.items():
+            precip[day - start] = np.nan if p is None else p
+            temp[day - start] = np.nan if t is None else t
+
+        # Prefix sums with the running totals before `start` prepended
+        precip_seen, temp_seen = ~np.isnan(precip), ~np.isnan(temp)
+        cum_precip = np.concatenate(([base[0]], base[0] + np.cumsum(np.where(precip_seen, precip, 0.0))))
+        cum_precip_n = np.concatenate(([base[1]], base[1] + np.cumsum(precip_seen)))
+        cum_temp = np.concatenate(([base[2]], base[2] + np.cumsum(np.where(temp_seen, temp, 0.0))))
+        cum_temp_n = np.concatenate(([base[3]], base[3] + np.cumsum(temp_seen)))
+
+        index = np.arange(1, n + 1)
+        windows = {}
+        for w in PRECOMPUTED_WINDOWS:
+            # Totals before the window; days before `start` only exist if start > first
+            before = np.maximum(index - w, 0)
+            windows[f"precip_{w}d"] = cum_precip[index] - cum_precip[before]
+            temp_n = cum_temp_n[index] - cum_temp_n[before]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                windows[f"temp_{w}d"] = np.where(temp_n > 0, (cum_temp[index] - cum_temp[before]) / temp_n, np.nan)
+
+        def value(x):
+            return None if np.isnan(x) else float(x)
+
+        offset = first_new - start
+        columns = _window_columns()
+        rows = [
+            (
+                location, start + i, value(precip[i]), value(temp[i]),
+                float(cum_precip[i + 1]), int(cum_precip_n[i + 1]),
+                float(cum_temp[i + 1]), int(cum_temp_n[i + 1]),
+                *(value(windows[name][i]) for name in columns)
+            )
+            for i in range(offset, n)
+        ]
+        placeholders = ", ".join("?" * (8 + len(columns)))
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO weather_daily
+                (location, day, precipitation, temperature, cum_precip, cum_precip_n,
+                 cum_temp, cum_temp_n, {", ".join(columns)})
+            VALUES ({placeholders})
+            """,
+            rows
+        )
+
+    def window(self, location: str, days: int, end: Optional[str] = None) -> Optional[Dict]:
+        """
+        Aggregates over the `days` days ending at `end` (inclusive, default today).
+
+        Two primary-key lookups at most; precomputed windows ending on an
+        observed day take one.
+
+        Returns:
+            Dict with precipitation_mm, avg_temperature, observed_days,
+            or None if the location has no data up to `end`
+        """
+        end_day = date.fromisoformat(end[:10]).toordinal() if end else date.today().toordinal()
+        conn = self._connection()
+        conn.row_factory = sqlite3.Row
+        try:
+            row = conn.execute(
+                "SELECT * FROM weather_daily WHERE location = ? AND day <= ? ORDER BY day DESC LIMIT 1",
+                (location, end_day)
+            ).fetchone()
+            if row is None:
+                return None
+
+            if days in PRECOMPUTED_WINDOWS and row["day"] == end_day:
+                before = conn.execute(
+                    "SELECT cum_precip_n FROM weather_daily WHERE location = ? AND day <= ? ORDER BY day DESC LIMIT 1",
+                    (location, end_day - days)
+                ).fetchone()
+                precipitation = row[f"precip_{days}d"]
+                avg_temperature = row[f"temp_{days}d"]
+                observed = row["cum_precip_n"] - (before["cum_precip_n"] if before else 0)
+            else:
+                before = conn.execute(
+                    """
+                    SELECT cum_precip, cum_precip_n, cum_temp, cum_temp_n FROM weather_daily
+                    WHERE location = ? AND day <= ? ORDER BY day DESC LIMIT 1
+                    """,
+                    (location, end_day - days)
+                ).fetchone()
+                before = tuple(before) if before else (0.0, 0, 0.0, 0)
+                precipitation = row["cum_precip"] - before[0]
+                temp_n = row["cum_temp_n"] - before[3]
+                avg_temperature = (row["cum_temp"] - before[2]) / temp_n if temp_n else None
+                observed = row["cum_precip_n"] - before[1]
+        finally:
+            conn.row_factory = None
+
+        return {
+            "location": location,
+            "end": date.fromordinal(end_day).isoformat(),
+            "days": days,
+            "precipitation_mm": round(precipitation or 0.0, 1),
+            "avg_temperature": None if avg_temperature is None else round(avg_temperature, 1),
+            "observed_days": int(observed)
+        }
+
+    def features(self, location: str, end: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """ML weather features (avg_temperature, rainfall_30d, drought_index) for a location"""
+        aggregates = self.window(location, 30, end)
+        if aggregates is None or aggregates["observed_days"] == 0:
+            return None
+        rainfall = aggregates["precipitation_mm"]
+        temperature = aggregates["avg_temperature"]
+        return {
+            "avg_temperature": temperature if temperature is not None else 25.0,
+            "rainfall_30d": rainfall,
+            "drought_index": drought_index(rainfall, temperature)
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_weather_store() -> WeatherStore:
+    """Process-wide weather store; shares the feature store database file by default"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.getenv("WEATHER_STORE_PATH") or os.getenv("FEATURE_STORE_PATH") or "feature_store.db"
+                _store = WeatherStore(path)
+    return _store
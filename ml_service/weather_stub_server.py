@@ -0,0 +1,147 @@
+"""
+Local stand-in for a daily-weather API (Open-Meteo archive format).
+
+Serves GET /v1/archive with deterministic precipitation and temperature
+derived from the coordinates and date, after a configurable latency, and
+counts the requests it receives per cell so single-flight and caching can be
+checked offline.
+
+Run:
+    python weather_stub_server.py --port 8010 --latency 0.3
+
+Use:
+    WEATHER_API_URL=http://127.0.0.1:8010
+"""
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class StubConfig:
+    """Behaviour of the stand-in server"""
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate  # Share of requests answered with 503
+        self.requests = Counter()  # (latitude, longitude) -> count
+        self._lock = threading.Lock()
+
+    def record(self, latitude: str, longitude: str) -> int:
+        with self._lock:
+            self.requests[(latitude, longitude)] += 1
+            return sum(self.requests.values())
+
+
+def _unit(*parts: Any) -> float:
+    """Deterministic pseudo-random number in [0, 1)"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def build_daily(latitude: float, longitude: float, start: date, end: date) -> Dict[str, list]:
+    """Daily series: seasonal temperature curve, rain on roughly one day in three"""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    precipitation, temperature = [], []
+    for day in days:
+        seasonal = 12 - 14 * _cos_doy(day)
+        temperature.append(round(seasonal + 4 * (_unit(latitude, longitude, day, "t") - 0.5), 1))
+        wet = _unit(latitude, longitude, day, "p") < 0.33
+        precipitation.append(round(8 * _unit(latitude, longitude, day, "mm"), 1) if wet else 0.0)
+    return {
+        "time": [day.isoformat() for day in days],
+        "precipitation_sum": precipitation,
+        "temperature_2m_mean": temperature
+    }
+
+
+def _cos_doy(day: date) -> float:
+    return math.cos(2 * math.pi * (day.timetuple().tm_yday - 15) / 365)
+
+
+def make_handler(config: StubConfig):
+    """Request handler bound to a configuration"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any]):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.rstrip("/") != "/v1/archive":
+                self._send_json(404, {"error": True, "reason": "Not found"})
+                return
+
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            try:
+                latitude, longitude = float(params["latitude"]), float(params["longitude"])
+                start = date.fromisoformat(params["start_date"])
+                end = date.fromisoformat(params["end_date"])
+            except (KeyError, ValueError) as e:
+                self._send_json(400, {"error": True, "reason": f"Invalid parameters: {e}"})
+                return
+
+            total = config.record(params["latitude"], params["longitude"])
+            time.sleep(config.latency)
+            if config.fail_rate and _unit(total, "fail") < config.fail_rate:
+                self._send_json(503, {"error": True, "reason": "Stub failure"})
+                return
+
+            self._send_json(200, {
+                "latitude": latitude,
+                "longitude": longitude,
+                "daily_units": {"precipitation_sum": "mm", "temperature_2m_mean": "°C"},
+                "daily": build_daily(latitude, longitude, start, end)
+            })
+
+    return StubHandler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0,
+                      config: Optional[StubConfig] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stand-in server on a background thread.
+
+    Returns:
+        Tuple of (server, base URL for WEATHER_API_URL). Stop with server.shutdown()
+    """
+    config = config or StubConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.config = config
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daily-weather API stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay, s")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args()
+
+    stub_config = StubConfig(latency=args.latency, fail_rate=args.fail_rate)
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(stub_config))
+    print(f"Weather stub server listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass